@@ -1,22 +1,9 @@
-import re
-from openai import OpenAI
-import os
-from anthropic import Anthropic
-from together import Together
-import google.generativeai as genai
+import asyncio
+from typing import List
 
+import nest_asyncio
 
-
-claude_api = os.getenv("CLAUDE_API_KEY")
-gemini_api_key = os.getenv("GEMINI_API_KEY")
-cohere_api_key = os.getenv("COHERE_API_KEY")
-together_api_key = os.getenv("TOGETHER_API_KEY")
-openai_api_key = os.getenv("OPENAI_API_KEY")
-
-client_anth = Anthropic(api_key = claude_api)
-client_togeth = Together(api_key =  together_api_key)
-client_openai = OpenAI(api_key = openai_api_key)
-genai.configure(api_key = gemini_api_key)
+from metagpt.judge_client import JudgeClient, JudgeItem
 
 
 models = {"opus": "claude-3-opus-20240229", "haiku": "claude-3-haiku-20240307", "sonnet": "claude-3-sonnet-20240229", "llama3_8": "meta-llama/Meta-Llama-3-8B-Instruct-Turbo",
@@ -26,9 +13,11 @@ models = {"opus": "claude-3-opus-20240229", "haiku": "claude-3-haiku-20240307",
           "gpt-4-turbo": "gpt-4-turbo-preview", "gpt-4o": "gpt-4o", "gpt-3.5-turbo":"gpt-3.5-turbo"}
 
 
-def judge_answers_other(judge_model, temp, question, answer1, answer2):
+judge_client = JudgeClient(models)
 
-  prompt = f"""
+
+def judge_other_prompt(question, answer1, answer2):
+  return f"""
   You are a highly accurate judge. You will be given two defenses of two answers.
   Judge which one of the answers is the best based only on the defenses provided.
    Do not use any knowledge you have. Choose the answer based on the following criteria: Relevance, Accuracy, Depth and Completeness, Logic and Factuality,
@@ -43,47 +32,8 @@ def judge_answers_other(judge_model, temp, question, answer1, answer2):
   """
 
 
-
-  if judge_model in  ["gpt-4-turbo", "gpt-4o", "gpt-3.5-turbo"]:
-    response = client_openai.chat.completions.create(
-      model=models[judge_model],
-      messages=[
-          {"role": "user", "content": prompt}
-      ],
-      temperature=temp
-      )
-    scores = response.choices[0].message.content
-
-  elif judge_model in ["opus", "haiku", "sonnet"]:
-    message = client_anth.messages.create(
-        max_tokens=1024,
-        messages=[{"role": "user", "content": prompt}],
-        model = models[judge_model],
-        )
-    scores = message.content[0].text
-  elif judge_model == 'cohere':
-    response = co.chat(
-    model="command-r-plus",
-    message= prompt
-      )
-    scores = response.text
-  elif judge_model == 'gemini':
-    model = genai.GenerativeModel('gemini-pro')
-    response = model.generate_content(prompt)
-    scores = response.text
-  else:
-    message = client_togeth.chat.completions.create(
-        model=models[judge_model],
-        temperature=temp,
-        messages=[{"role": "user", "content": prompt}],
-    )
-    scores = message.choices[0].message.content
-  return scores
-
-
-def judge_answers(judge_model, temp, question, answer1, answer2):
-
-  prompt = f"""
+def judge_prompt(question, answer1, answer2):
+  return f"""
   You are a fair, impartial judge scoring a debate on the following question: {question}.
 
   Answer 1: {answer1}
@@ -114,40 +64,27 @@ def judge_answers(judge_model, temp, question, answer1, answer2):
   """
 
 
+async def ajudge_answers_other(judge_model, temp, question, answer1, answer2):
+  return await judge_client.ajudge(judge_model, temp, judge_other_prompt(question, answer1, answer2))
+
 
-  if judge_model in  ["gpt-4-turbo", "gpt-4o", "gpt-3.5-turbo"]:
-    response = client_openai.chat.completions.create(
-      model=models[judge_model],
-      messages=[
-          {"role": "user", "content": prompt}
-      ],
-      temperature=temp
-      )
-    scores = response.choices[0].message.content
-
-  elif judge_model in ["opus", "haiku", "sonnet"]:
-    message = client_anth.messages.create(
-        max_tokens=1024,
-        messages=[{"role": "user", "content": prompt}],
-        model = models[judge_model],
-        )
-    scores = message.content[0].text
-  elif judge_model == 'cohere':
-    response = co.chat(
-    model="command-r-plus",
-    message= prompt
-      )
-    scores = response.text
-  elif judge_model == 'gemini':
-    model = genai.GenerativeModel('gemini-pro')
-    response = model.generate_content(prompt)
-    scores = response.text
-  else:
-    message = client_togeth.chat.completions.create(
-        model=models[judge_model],
-        temperature=temp,
-        messages=[{"role": "user", "content": prompt}],
-    )
-    scores = message.choices[0].message.content
-
-  return scores
+async def ajudge_answers(judge_model, temp, question, answer1, answer2):
+  return await judge_client.ajudge(judge_model, temp, judge_prompt(question, answer1, answer2))
+
+
+async def ajudge_answers_batch(judge_models: List[str], temp, items: List[JudgeItem], prompt_fn=judge_prompt):
+  """Score all (question, answer1, answer2) items with every judge model, overlapping requests across providers."""
+  return await judge_client.ajudge_batch(judge_models, temp, items, prompt_fn)
+
+
+nest_asyncio.apply()
+
+
+def judge_answers_other(judge_model, temp, question, answer1, answer2):
+  loop = asyncio.get_event_loop()
+  return loop.run_until_complete(ajudge_answers_other(judge_model, temp, question, answer1, answer2))
+
+
+def judge_answers(judge_model, temp, question, answer1, answer2):
+  loop = asyncio.get_event_loop()
+  return loop.run_until_complete(ajudge_answers(judge_model, temp, question, answer1, answer2))
@@ -11,6 +11,11 @@ import fire
 from metagpt.ext.stanford_town.roles.st_role import STRole
 from metagpt.ext.stanford_town.stanford_town import StanfordTown
 from metagpt.ext.stanford_town.utils.const import STORAGE_PATH
+from metagpt.ext.stanford_town.utils.embedding_broker import (
+    EmbeddingBroker,
+    HashingEmbeddingModel,
+    set_embedding_broker,
+)
 from metagpt.ext.stanford_town.utils.mg_ga_transform import (
     get_reverie_meta,
     write_curr_sim_code,
@@ -67,6 +72,7 @@ def main(
     temp_storage_path: Optional[str] = None,
     investment: float = 30.0,
     n_round: int = 500,
+    local_embedding: bool = False,
 ):
     """
     Args:
@@ -76,7 +82,10 @@ def main(
         temp_storage_path: generative_agents temp_storage path inside `environment/frontend_server` to interact.
         investment: the investment of running agents
         n_round: rounds to run agents
+        local_embedding: embed memories with a local hashing model instead of the OpenAI API, for offline runs
     """
+    if local_embedding:
+        set_embedding_broker(EmbeddingBroker(HashingEmbeddingModel()))
 
     asyncio.run(
         startup(
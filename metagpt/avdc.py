@@ -1,13 +1,13 @@
 import asyncio
 import nest_asyncio
 import platform
-from typing import List, Tuple
-import re
+from typing import List, Optional, Tuple
 from metagpt.actions import Action
 from metagpt.logs import logger
 from metagpt.roles import Role
 from metagpt.schema import Message
 from metagpt.team import Team
+from metagpt.utils.score_parser import ScoreParser, extract_scores, format_scores
 import argparse
 
 print("Starting debate script...")
@@ -108,18 +108,17 @@ class ScoreAnswer(Action):
     """
     name: str = "ScoreAnswer"
 
-    async def run(self, question: str, answer1: str, answer2: str, defense1: str, defense2: str, current_round: int, total_rounds: int, previous_scores: list):
+    async def run(self, question: str, answer1: str, answer2: str, defense1: str, defense2: str, current_round: int, total_rounds: int, previous_scores: list,
+                  score_parser: Optional[ScoreParser] = None):
         prompt = self.PROMPT_TEMPLATE.format(
             question=question, answer1=answer1, answer2=answer2, defense1=defense1, defense2=defense2,
             current_round=current_round, total_rounds=total_rounds, previous_scores=previous_scores
         )
         response = await self._aask(prompt)
 
-        tuple_match = re.search(r'\((\d+),\s*(\d+)\)', response)
-        if tuple_match:
-            return f"({tuple_match.group(1)}, {tuple_match.group(2)})"
-        else:
-            return "(0, 0)"  # Default scores if no valid tuple is found
+        # Extract the final tuple from the response, re-asking briefly if it can't be read
+        scores = await (score_parser or ScoreParser()).aparse(response, self.llm)
+        return format_scores(scores) if scores else "(0, 0)"  # Default scores if no valid tuple is found
 
 class Advocate(Role):
     def __init__(self, name: str, question: str, answer: str, opponent_answer: str, **kwargs):
@@ -184,6 +183,7 @@ class Scorer(Role):
         self.answer1 = answer1
         self.answer2 = answer2
         self.score_action = ScoreAnswer()
+        self.score_parser = ScoreParser()
         self.set_actions([self.score_action])
         self._watch([DefendAnswer])
 
@@ -199,7 +199,7 @@ class Scorer(Role):
         scores = await self.score_action.run(question=self.question, answer1=self.answer1, answer2=self.answer2, 
                                              defense1=advocate1_arg, defense2=advocate2_arg,
                                              current_round=current_round, total_rounds=total_rounds, 
-                                             previous_scores=previous_scores)
+                                             previous_scores=previous_scores, score_parser=self.score_parser)
 
         msg = Message(content=scores, role=self.name)
         self.rc.memory.add(msg)
@@ -213,6 +213,7 @@ class InitialScorer(Role):
         self.answer1 = answer1
         self.answer2 = answer2
         self.score_action = ScoreAnswer()
+        self.score_parser = ScoreParser()
         self.set_actions([self.score_action])
 
     async def _act(self) -> Message:
@@ -220,7 +221,7 @@ class InitialScorer(Role):
         scores = await self.score_action.run(question=self.question, answer1=self.answer1, answer2=self.answer2, 
                                              defense1="", defense2="",
                                              current_round=0, total_rounds=0, 
-                                             previous_scores=[])
+                                             previous_scores=[], score_parser=self.score_parser)
 
         msg = Message(content=scores, role=self.name)
         self.rc.memory.add(msg)
@@ -248,13 +249,12 @@ async def debate(question:str, answer1:str, answer2:str, investment: float = 3.0
     previous_scores = []
     scores = [initial_score_msg.content]
 
-    try:
-        initial_scores = eval(initial_score_msg.content)
-        if isinstance(initial_scores, tuple) and len(initial_scores) == 2:
-            previous_scores.append(initial_scores)
-            print(f"Parsed Initial Scores: {initial_scores}")
-    except Exception as e:
-        print(f"Error parsing initial scores: {e}")
+    initial_scores = extract_scores(initial_score_msg.content)
+    if initial_scores:
+        previous_scores.append(initial_scores)
+        print(f"Parsed Initial Scores: {initial_scores}")
+    else:
+        print(f"Error parsing initial scores: {initial_score_msg.content}")
         previous_scores.append((0, 0))  # Default scores if parsing fails
 
     for i in range(n_round):
@@ -285,14 +285,12 @@ async def debate(question:str, answer1:str, answer2:str, investment: float = 3.0
         print(f"Raw Scores: {score_msg.content}")
         scores.append(score_msg.content)
         
-        try:
-            new_scores = eval(score_msg.content)
-            if not isinstance(new_scores, tuple) or len(new_scores) != 2:
-                raise ValueError("Invalid score format")
+        new_scores = extract_scores(score_msg.content)
+        if new_scores:
             previous_scores.append(new_scores)
             print(f"Parsed Scores: {new_scores}")
-        except Exception as e:
-            print(f"Error parsing scores: {e}")
+        else:
+            print(f"Error parsing scores: {score_msg.content}")
             previous_scores.append((0, 0))  # Default scores if parsing fails
 
     print("\nFinal Scores:")
@@ -300,6 +298,7 @@ async def debate(question:str, answer1:str, answer2:str, investment: float = 3.0
     for round_num, (score1, score2) in enumerate(previous_scores[1:], 1):
         print(f"Round {round_num}: Advocate1 - {score1}, Advocate2 - {score2}")
 
+    logger.info(f"Score parsing: {scorer.score_parser.stats}")
     print("Debate completed.")
     return scores
 
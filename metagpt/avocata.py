@@ -1,13 +1,13 @@
 import asyncio
 import nest_asyncio
 import platform
-from typing import List, Tuple
-import re
+from typing import List, Optional, Tuple
 from metagpt.actions import Action
 from metagpt.logs import logger
 from metagpt.roles import Role
 from metagpt.schema import Message
 from metagpt.team import Team
+from metagpt.utils.score_parser import ScoreParser, extract_scores, format_scores
 import argparse
 
 print("Starting debate script...")
@@ -108,26 +108,17 @@ class ScoreAnswer(Action):
     """
     name: str = "ScoreAnswer"
 
-    async def run(self, question: str, answer1: str, answer2: str, defense1: str, defense2: str, current_round: int, total_rounds: int, previous_scores: list):
+    async def run(self, question: str, answer1: str, answer2: str, defense1: str, defense2: str, current_round: int, total_rounds: int, previous_scores: list,
+                  score_parser: Optional[ScoreParser] = None):
         prompt = self.PROMPT_TEMPLATE.format(
             question=question, answer1=answer1, answer2=answer2, defense1=defense1, defense2=defense2,
             current_round=current_round, total_rounds=total_rounds, previous_scores=previous_scores
         )
         response = await self._aask(prompt)
 
-
-        # Find all tuples in the response
-        # all_tuples = re.findall(r'\((\d+),\s*(\d+)\)', response)
-        # tuple_match = all_tuples[-1]
-        # if tuple_match:
-        #     return f"({tuple_match.group(1)}, {tuple_match.group(2)})"
-        # else:
-        #     return "(0, 0)"  # Default scores if no valid tuple is found
-        tuple_match = re.search(r'\((\d+),\s*(\d+)\)', response)
-        if tuple_match:
-            return f"({tuple_match.group(1)}, {tuple_match.group(2)})"
-        else:
-            return "(0, 0)"  # Default scores if no valid tuple is found
+        # Extract the final tuple from the response, re-asking briefly if it can't be read
+        scores = await (score_parser or ScoreParser()).aparse(response, self.llm)
+        return format_scores(scores) if scores else "(0, 0)"  # Default scores if no valid tuple is found
 
 class Advocate(Role):
     def _init_(self, name: str, question: str, answer: str, opponent_answer: str, **kwargs):
@@ -192,6 +183,7 @@ class Scorer(Role):
         self.answer1 = answer1
         self.answer2 = answer2
         self.score_action = ScoreAnswer()
+        self.score_parser = ScoreParser()
         self.set_actions([self.score_action])
         self._watch([DefendAnswer])
 
@@ -207,7 +199,7 @@ class Scorer(Role):
         scores = await self.score_action.run(question=self.question, answer1=self.answer1, answer2=self.answer2, 
                                              defense1=advocate1_arg, defense2=advocate2_arg,
                                              current_round=current_round, total_rounds=total_rounds, 
-                                             previous_scores=previous_scores)
+                                             previous_scores=previous_scores, score_parser=self.score_parser)
 
         msg = Message(content=scores, role=self.name)
         self.rc.memory.add(msg)
@@ -259,14 +251,12 @@ async def debate(question:str, answer1:str, answer2:str, investment: float = 3.0
         scores.append(score_msg.content)
         
         # Parse and store the new scores
-        try:
-            new_scores = eval(score_msg.content)
-            if not isinstance(new_scores, tuple) or len(new_scores) != 2:
-                raise ValueError("Invalid score format")
+        new_scores = extract_scores(score_msg.content)
+        if new_scores:
             previous_scores.append(new_scores)
             print(f"Parsed Scores: {new_scores}")
-        except Exception as e:
-            print(f"Error parsing scores: {e}")
+        else:
+            print(f"Error parsing scores: {score_msg.content}")
             previous_scores.append((0, 0))  # Default scores if parsing fails
         
         print()  # Add a blank line between rounds
@@ -276,6 +266,7 @@ async def debate(question:str, answer1:str, answer2:str, investment: float = 3.0
     for round_num, (score1, score2) in enumerate(previous_scores, 1):
         print(f"Round {round_num}: Advocate1 - {score1}, Advocate2 - {score2}")
 
+    logger.info(f"Score parsing: {scorer.score_parser.stats}")
     print("Debate completed.")
     return scores
 
@@ -0,0 +1,280 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+@File    : batch_debate.py
+@Desc    : Run many advocate debates concurrently on a single event loop, with a global concurrency limit,
+           per-provider limits and a resumable JSONL or Parquet result sink.
+"""
+
+import asyncio
+import inspect
+import time
+from pathlib import Path
+from typing import Awaitable, Callable, Iterable, Optional, Union
+
+from pydantic import BaseModel
+
+from metagpt.logs import logger
+from metagpt.utils.async_helper import NestAsyncio
+from metagpt.utils.cost_manager import CostManager
+from metagpt.utils.result_sink import ResultSink, open_result_sink
+from metagpt.utils.score_parser import extract_scores
+
+DebateFn = Callable[..., Awaitable[list[str]]]
+
+QUESTION_COLUMNS = ("question", "prompt")
+ANSWER1_COLUMNS = ("answer1", "response_a")
+ANSWER2_COLUMNS = ("answer2", "response_b")
+
+
+class DebateItem(BaseModel):
+    """One row of a debate sweep."""
+
+    index: int
+    question: str
+    answer1: str
+    answer2: str
+    provider: str = ""
+
+
+class DebateRound(BaseModel):
+    """Transcript of one debate round."""
+
+    round: int
+    defense1: str = ""
+    defense2: str = ""
+    judge: str = ""
+    scores: str = ""
+    parsed_scores: Optional[tuple[float, float]] = None
+    elapsed: float = 0.0
+
+
+class DebateOutcome(BaseModel):
+    """The result of a single debate of a sweep.
+
+    `rounds` and the token counts are filled when `debate_fn` accepts `round_log` and `cost_manager`,
+    like `metagpt.new_multi_adv.debate`.
+    """
+
+    index: int
+    scores: list[str] = []
+    parsed_scores: list[Optional[tuple[float, float]]] = []
+    rounds: list[DebateRound] = []
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    cost: float = 0.0
+    error: str = ""
+    elapsed: float = 0.0
+
+
+class ProviderLimit(BaseModel):
+    """Limits applied to all debates of one provider.
+
+    `concurrency` caps the number of debates in flight, `debates_per_minute` spaces out their starts.
+    """
+
+    concurrency: int = 0
+    debates_per_minute: float = 0.0
+
+
+class _ProviderGate:
+    """Concurrency and start-rate gate for a single provider."""
+
+    def __init__(self, limit: ProviderLimit):
+        self._semaphore = asyncio.Semaphore(limit.concurrency) if limit.concurrency > 0 else None
+        self._interval = 60.0 / limit.debates_per_minute if limit.debates_per_minute > 0 else 0.0
+        self._next_start = 0.0
+        self._lock = asyncio.Lock()
+
+    async def acquire(self):
+        if self._semaphore:
+            await self._semaphore.acquire()
+        if self._interval:
+            async with self._lock:
+                now = time.monotonic()
+                delay = self._next_start - now
+                self._next_start = max(now, self._next_start) + self._interval
+            if delay > 0:
+                await asyncio.sleep(delay)
+
+    def release(self):
+        if self._semaphore:
+            self._semaphore.release()
+
+
+class BatchDebateRunner:
+    """Evaluate a table of (question, answer1, answer2) rows with many concurrent `debate()` instances.
+
+    Args:
+        debate_fn: The coroutine function running one debate, e.g. `metagpt.new_multi_adv.debate`.
+        concurrency: Maximum number of debates in flight across all providers.
+        provider_limits: Limits keyed by `DebateItem.provider`.
+        checkpoint_path: Result sink receiving each completed debate as soon as it finishes, a `*.parquet` directory
+            or a JSONL file. Rows already in it are skipped.
+        **debate_kwargs: Extra keyword arguments for `debate_fn`, such as `n_round` or `n_advocates`.
+    """
+
+    def __init__(
+        self,
+        debate_fn: DebateFn = None,
+        concurrency: int = 8,
+        provider_limits: Optional[dict[str, Union[ProviderLimit, dict]]] = None,
+        checkpoint_path: Optional[Union[str, Path]] = None,
+        **debate_kwargs,
+    ):
+        if debate_fn is None:
+            from metagpt.new_multi_adv import debate as debate_fn
+        self.debate_fn = debate_fn
+        self.concurrency = concurrency
+        self.provider_limits = {
+            k: v if isinstance(v, ProviderLimit) else ProviderLimit(**v) for k, v in (provider_limits or {}).items()
+        }
+        self.checkpoint_path = Path(checkpoint_path) if checkpoint_path else None
+        self.debate_kwargs = debate_kwargs
+        params = inspect.signature(self.debate_fn).parameters
+        self._records_rounds = "round_log" in params
+        self._records_usage = "cost_manager" in params
+
+    def open_sink(self) -> Optional[ResultSink]:
+        return open_result_sink(self.checkpoint_path) if self.checkpoint_path else None
+
+    def load_checkpoint(self) -> dict[int, DebateOutcome]:
+        """Return the outcomes already recorded in the checkpoint."""
+        sink = self.open_sink()
+        if not sink:
+            return {}
+        done = {}
+        for record in sink.read():
+            try:
+                outcome = DebateOutcome.model_validate(record)
+            except ValueError:
+                logger.warning(f"Skip malformed checkpoint record: {str(record)[:100]}")
+                continue
+            done[outcome.index] = outcome
+        return done
+
+    async def _run_one(self, item: DebateItem, gates: dict) -> DebateOutcome:
+        gate = gates.get(item.provider)
+        if gate:
+            await gate.acquire()
+        kwargs = dict(self.debate_kwargs)
+        rounds, cost_manager = [], CostManager()
+        if self._records_rounds:
+            kwargs["round_log"] = rounds
+        if self._records_usage:
+            kwargs["cost_manager"] = cost_manager
+        start = time.perf_counter()
+        try:
+            scores = await self.debate_fn(question=item.question, answer1=item.answer1, answer2=item.answer2, **kwargs)
+        except Exception as e:
+            logger.exception(f"Debate {item.index} failed: {e}")
+            return DebateOutcome(index=item.index, error=str(e), elapsed=time.perf_counter() - start)
+        finally:
+            if gate:
+                gate.release()
+        return DebateOutcome(
+            index=item.index,
+            scores=scores,
+            parsed_scores=[extract_scores(s) for s in scores],
+            rounds=rounds,
+            prompt_tokens=cost_manager.total_prompt_tokens,
+            completion_tokens=cost_manager.total_completion_tokens,
+            cost=cost_manager.total_cost,
+            elapsed=time.perf_counter() - start,
+        )
+
+    async def run(self, items: Iterable[DebateItem], collect: bool = True) -> list[DebateOutcome]:
+        """Run all debates not yet in the checkpoint and return the outcomes of every item, in input order.
+
+        Each completed debate is written to the checkpoint as soon as it finishes. Failed debates are reported
+        with `error` set and are not checkpointed, so a rerun retries them. Items are pulled lazily by
+        `concurrency` workers; with `collect=False` outcomes are only streamed to the checkpoint and an empty list
+        is returned, so memory stays constant however large the sweep is.
+        """
+        sink = self.open_sink()
+        done = self.load_checkpoint() if collect else {}
+        skip = set(done) if collect else (sink.keys() if sink else set())
+        if skip:
+            logger.info(f"Resuming sweep: {len(skip)} debates already completed")
+
+        gates = {k: _ProviderGate(v) for k, v in self.provider_limits.items()}
+        order = []
+        pending = iter(items)
+
+        async def worker():
+            for item in pending:  # workers share the iterator, so at most `concurrency` debates are in flight
+                if collect:
+                    order.append(item.index)
+                if item.index in skip:
+                    continue
+                outcome = await self._run_one(item, gates)
+                if sink and not outcome.error:
+                    sink.write(outcome)
+                if collect:
+                    done[item.index] = outcome
+
+        try:
+            await asyncio.gather(*[worker() for _ in range(self.concurrency)])
+        finally:
+            if sink:
+                sink.close()
+        return [done[i] for i in order]
+
+
+def _pick_column(columns: Iterable[str], explicit: Optional[str], candidates: tuple[str, ...]) -> str:
+    if explicit:
+        return explicit
+    lowered = {c.lower(): c for c in columns}
+    for name in candidates:
+        if name in lowered:
+            return lowered[name]
+    raise ValueError(f"None of the columns {candidates} found in {list(columns)}")
+
+
+def load_debate_items(
+    path: Union[str, Path],
+    question_col: str = None,
+    answer1_col: str = None,
+    answer2_col: str = None,
+    provider: str = "",
+) -> list[DebateItem]:
+    """Load debate rows from an xlsx/csv file such as `datasets/sample_data_200.xlsx`.
+
+    Columns are detected case-insensitively (`question`/`prompt`, `answer1`/`response_a`, `answer2`/`response_b`)
+    unless given explicitly.
+    """
+    import pandas as pd
+
+    path = Path(path)
+    df = pd.read_csv(path) if path.suffix == ".csv" else pd.read_excel(path)
+    q = _pick_column(df.columns, question_col, QUESTION_COLUMNS)
+    a1 = _pick_column(df.columns, answer1_col, ANSWER1_COLUMNS)
+    a2 = _pick_column(df.columns, answer2_col, ANSWER2_COLUMNS)
+    return [
+        DebateItem(index=i, question=str(row[q]), answer1=str(row[a1]), answer2=str(row[a2]), provider=provider)
+        for i, row in df.iterrows()
+    ]
+
+
+def get_batch_debate_scores(
+    rows: Iterable[Union[DebateItem, tuple[str, str, str]]],
+    concurrency: int = 8,
+    checkpoint_path: Optional[Union[str, Path]] = None,
+    debate_fn: DebateFn = None,
+    **debate_kwargs,
+) -> list[list[str]]:
+    """Synchronous counterpart of `get_multi_debate_scores_20` for a whole table of rows.
+
+    Returns the raw score strings of each row, in input order; failed rows yield an empty list.
+    """
+    items = [
+        r if isinstance(r, DebateItem) else DebateItem(index=i, question=r[0], answer1=r[1], answer2=r[2])
+        for i, r in enumerate(rows)
+    ]
+    runner = BatchDebateRunner(
+        debate_fn=debate_fn, concurrency=concurrency, checkpoint_path=checkpoint_path, **debate_kwargs
+    )
+    NestAsyncio.apply_once()
+    loop = asyncio.get_event_loop()
+    outcomes = loop.run_until_complete(runner.run(items))
+    return [o.scores for o in outcomes]
@@ -46,6 +46,11 @@ class EmbeddingConfig(YamlModel):
     embed_batch_size: Optional[int] = None
     dimensions: Optional[int] = None  # output dimension of embedding model
 
+    # Opt-in: reuse the embeddings of texts already embedded, in memory and in `cache_path`.
+    # The cache keeps a vector per embedded text on disk, keyed by a hash of the text.
+    cache: bool = False
+    cache_path: Optional[str] = None  # SQLite file of the embeddings, default ~/.metagpt/embedding_cache.sqlite
+
     @field_validator("api_type", mode="before")
     @classmethod
     def check_api_type(cls, v):
@@ -8,7 +8,7 @@
 from enum import Enum
 from typing import Optional
 
-from pydantic import field_validator
+from pydantic import BaseModel, field_validator
 
 from metagpt.const import LLM_API_TIMEOUT
 from metagpt.utils.yaml_model import YamlModel
@@ -39,6 +39,44 @@ class LLMType(Enum):
         return self.OPENAI
 
 
+class LLMCacheConfig(BaseModel):
+    """Config for the on-disk LLM response cache
+
+    path: SQLite file shared by every LLM using the same path
+    ttl: seconds before an entry expires, 0 for never
+    max_entries: least recently used entries are evicted beyond this size, 0 for unbounded
+    read_only: replay mode, never writes and raises `LLMCacheMissError` on misses instead of calling the API
+    """
+
+    enabled: bool = False
+    path: str = str(CONFIG_ROOT / "llm_cache.sqlite3")
+    ttl: int = 0
+    max_entries: int = 0
+    read_only: bool = False
+
+
+class LLMRateLimitConfig(BaseModel):
+    """Config for the process-wide rate limiter shared by all LLMs with the same base_url and model
+
+    rpm / tpm: requests and tokens per minute of the provider quota, 0 for unlimited
+    max_concurrency: ceiling of in-flight requests, 0 disables the concurrency control
+    min_concurrency: floor the adaptive concurrency never goes below
+    target_latency: seconds; slower responses shrink the concurrency like rate-limit errors do, but gently, 0 to ignore
+    max_retries: retries of a rate-limited request, paced by the limiter instead of a blind backoff
+    """
+
+    rpm: int = 0
+    tpm: int = 0
+    max_concurrency: int = 0
+    min_concurrency: int = 1
+    target_latency: float = 0.0
+    max_retries: int = 3
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.rpm or self.tpm or self.max_concurrency)
+
+
 class LLMConfig(YamlModel):
     """Config for LLM
 
@@ -90,6 +128,12 @@ class LLMConfig(YamlModel):
     # Cost Control
     calc_usage: bool = True
 
+    # Response cache
+    cache: LLMCacheConfig = LLMCacheConfig()
+
+    # Rate limit
+    rate_limit: LLMRateLimitConfig = LLMRateLimitConfig()
+
     @field_validator("api_key")
     @classmethod
     def check_llm_key(cls, v):
@@ -7,7 +7,7 @@
 """
 import os
 from pathlib import Path
-from typing import Any, Dict, Optional
+from typing import Any, Dict, Optional, Union
 
 from pydantic import BaseModel, ConfigDict
 
@@ -71,6 +71,18 @@ class Context(BaseModel):
 
     _llm: Optional[BaseLLM] = None
 
+    @classmethod
+    def from_llm_config(cls, llm_config: Union[LLMConfig, dict]) -> "Context":
+        """Build a context bound to `llm_config` in memory, without reading or writing config2.yaml.
+
+        Roles created with `context=Context.from_llm_config(...)` use that model, so several models can run
+        side by side in one process.
+        example:
+        judge_ctx = Context.from_llm_config({"api_type": "openai", "api_key": "xxx", "model": "gpt-4o"})
+        judge = Judge(question, answer1, answer2, context=judge_ctx)
+        """
+        return cls(config=Config.from_llm_config(llm_config))
+
     def new_environ(self):
         """Return a new os.environ object"""
         env = os.environ.copy()
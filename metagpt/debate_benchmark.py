@@ -0,0 +1,323 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+@File    : debate_benchmark.py
+@Desc    : Throughput and cost benchmark of the advocate debate variants against a local mock LLM provider.
+
+Usage:
+    python -m metagpt.debate_benchmark --variants='["new_multi_adv","avocata"]' --n_rounds='[3,5]' \
+        --n_advocates='[1,3]' --concurrency='[1,8]' --n_debates=16 --latency=0.2 --output=bench.jsonl
+"""
+
+import asyncio
+import contextvars
+import importlib
+import io
+import itertools
+import math
+import random
+import time
+import tracemalloc
+from collections import defaultdict
+from contextlib import contextmanager, redirect_stdout
+from functools import partial
+from pathlib import Path
+from typing import Awaitable, Callable, Iterable, Optional
+
+import fire
+import numpy as np
+from pydantic import BaseModel
+
+from metagpt.configs.llm_config import LLMConfig
+from metagpt.const import USE_CONFIG_TIMEOUT
+from metagpt.logs import logger
+from metagpt.provider.base_llm import BaseLLM
+from metagpt.provider.llm_provider_registry import LLM_REGISTRY
+
+CHARS_PER_TOKEN = 4  # prompt tokens are estimated, so the benchmark runs offline
+ROUND_MARKER = "Starting Round"  # printed by every debate variant when a round opens
+
+QUESTION = "What is the best way to learn a new language?"
+ANSWER1 = "Immersion in a country where the language is spoken, using it every day."
+ANSWER2 = "Structured classes with a teacher, grammar drills and regular practice."
+
+
+class MockLLMProfile(BaseModel):
+    """Latency and response length distribution of the mock provider.
+
+    Each call waits a log-normal time to first token (median `latency`), then streams a log-normal number of
+    tokens (median `output_tokens`) at `tokens_per_second`.
+    """
+
+    latency: float = 0.2
+    latency_sigma: float = 0.3
+    tokens_per_second: float = 80.0
+    output_tokens: int = 120
+    output_tokens_sigma: float = 0.3
+    seed: Optional[int] = None
+
+
+class DebateTrace:
+    """LLM usage and round boundaries of one debate, collected through a context variable."""
+
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.end = self.start
+        self.round_starts: list[float] = []
+        self.llm_calls = 0
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+        self.ok = False
+
+    def add_call(self, prompt_tokens: int, completion_tokens: int):
+        self.llm_calls += 1
+        self.prompt_tokens += prompt_tokens
+        self.completion_tokens += completion_tokens
+
+    def round_latencies(self) -> list[float]:
+        """Time from each round start to the next; the last round also covers any post-debate step."""
+        marks = self.round_starts + [self.end]
+        return [b - a for a, b in zip(marks, marks[1:])]
+
+
+_current_trace: contextvars.ContextVar[Optional[DebateTrace]] = contextvars.ContextVar("debate_trace", default=None)
+
+
+class MockDebateLLM(BaseLLM):
+    """Offline provider answering every prompt with filler text ending in a score tuple, e.g. `(87, 74)`."""
+
+    def __init__(self, config: LLMConfig, profile: Optional[MockLLMProfile] = None):
+        self.config = config
+        self.profile = profile or MockLLMProfile()
+        self._rng = random.Random(self.profile.seed)
+
+    def _lognormal(self, median: float, sigma: float) -> float:
+        return self._rng.lognormvariate(math.log(median), sigma) if median > 0 else 0.0
+
+    async def acompletion_text(self, messages: list[dict], stream=False, timeout=USE_CONFIG_TIMEOUT) -> str:
+        profile = self.profile
+        prompt_tokens = sum(len(str(m.get("content", ""))) for m in messages) // CHARS_PER_TOKEN
+        completion_tokens = max(1, round(self._lognormal(profile.output_tokens, profile.output_tokens_sigma)))
+        await asyncio.sleep(
+            self._lognormal(profile.latency, profile.latency_sigma) + completion_tokens / profile.tokens_per_second
+        )
+
+        trace = _current_trace.get()
+        if trace:
+            trace.add_call(prompt_tokens, completion_tokens)
+        scores = (self._rng.randint(50, 100), self._rng.randint(50, 100))
+        return " ".join(["argument"] * completion_tokens) + f"\nFinal scores: {scores}"
+
+    async def _achat_completion(self, messages: list[dict], timeout=USE_CONFIG_TIMEOUT):
+        return {"choices": [{"message": {"content": await self.acompletion_text(messages)}}]}
+
+    async def acompletion(self, messages: list[dict], timeout=USE_CONFIG_TIMEOUT):
+        return await self._achat_completion(messages, timeout=timeout)
+
+    async def _achat_completion_stream(self, messages: list[dict], timeout: int = USE_CONFIG_TIMEOUT) -> str:
+        return await self.acompletion_text(messages)
+
+
+@contextmanager
+def mock_llm_provider(profile: Optional[MockLLMProfile] = None):
+    """Serve every LLM created inside the block, whatever its api_type, with `MockDebateLLM`."""
+    providers = LLM_REGISTRY.providers
+    LLM_REGISTRY.providers = defaultdict(lambda: partial(MockDebateLLM, profile=profile))
+    try:
+        yield
+    finally:
+        LLM_REGISTRY.providers = providers
+
+
+class _RoundTap(io.TextIOBase):
+    """Stdout replacement that timestamps round starts of the debate printing them, and drops everything else."""
+
+    def write(self, s: str) -> int:
+        trace = _current_trace.get()
+        if trace and ROUND_MARKER in s:
+            trace.round_starts.append(time.perf_counter())
+        return len(s)
+
+
+def _run_multi_advocate(module, n_round: int, n_advocates: int) -> Awaitable:
+    return module.run_debate(QUESTION, ANSWER1, ANSWER2, n_round=n_round, n_advocates=n_advocates)
+
+
+def _run_single_advocate(module, n_round: int, n_advocates: int) -> Awaitable:
+    return module.run_debate(QUESTION, ANSWER1, ANSWER2, n_round=n_round)
+
+
+def _run_jury(module, n_round: int, n_advocates: int) -> Awaitable:
+    return module.run_debate(QUESTION, ANSWER1, ANSWER2, max_rounds=n_round)
+
+
+# variant module under `metagpt` -> (runner, whether it has several advocates per side)
+VARIANTS: dict[str, tuple[Callable[..., Awaitable], bool]] = {
+    "avocata": (_run_single_advocate, False),
+    "avdc": (_run_single_advocate, False),
+    "new_multi_adv": (_run_multi_advocate, True),
+    "new_only_adv": (_run_jury, False),
+}
+
+
+def _succeeded(result) -> bool:
+    """The variants swallow errors and return empty scores instead."""
+    scores = result[0] if isinstance(result, tuple) else result
+    return bool(scores)
+
+
+class BenchmarkResult(BaseModel):
+    """Measurements of one (variant, n_round, n_advocates, concurrency) scenario."""
+
+    variant: str
+    n_round: int
+    n_advocates: int
+    concurrency: int
+    debates: int = 0
+    failed: int = 0
+    elapsed: float = 0.0
+    debates_per_minute: float = 0.0
+    round_p50: float = 0.0
+    round_p95: float = 0.0
+    llm_calls_per_debate: float = 0.0
+    tokens_per_debate: float = 0.0
+    prompt_tokens_per_debate: float = 0.0
+    peak_memory_mb: float = 0.0
+    error: str = ""
+
+
+async def run_scenario(
+    variant: str,
+    n_round: int = 3,
+    n_advocates: int = 3,
+    concurrency: int = 1,
+    n_debates: int = 4,
+    profile: Optional[MockLLMProfile] = None,
+    trace_memory: bool = True,
+) -> BenchmarkResult:
+    """Run `n_debates` debates of `variant`, at most `concurrency` at a time, against the mock provider."""
+    result = BenchmarkResult(variant=variant, n_round=n_round, n_advocates=n_advocates, concurrency=concurrency)
+    runner, _ = VARIANTS[variant]
+    try:
+        with redirect_stdout(_RoundTap()):
+            module = importlib.import_module(f"metagpt.{variant}")
+    except Exception as e:
+        result.error = f"{type(e).__name__}: {e}"
+        logger.warning(f"Cannot benchmark {variant}: {result.error}")
+        return result
+
+    semaphore = asyncio.Semaphore(concurrency)
+    traces: list[DebateTrace] = []
+
+    async def run_one():
+        async with semaphore:
+            trace = DebateTrace()
+            _current_trace.set(trace)  # each gathered task runs in its own copy of the context
+            try:
+                trace.ok = _succeeded(await runner(module, n_round=n_round, n_advocates=n_advocates))
+            except Exception as e:
+                logger.warning(f"{variant} debate failed: {e}")
+            trace.end = time.perf_counter()
+            traces.append(trace)
+
+    started_tracing = trace_memory and not tracemalloc.is_tracing()
+    if started_tracing:
+        tracemalloc.start()
+    if trace_memory:
+        tracemalloc.reset_peak()
+    start = time.perf_counter()
+    try:
+        with mock_llm_provider(profile), redirect_stdout(_RoundTap()):
+            await asyncio.gather(*[run_one() for _ in range(n_debates)])
+    finally:
+        result.elapsed = time.perf_counter() - start
+        if trace_memory:
+            result.peak_memory_mb = tracemalloc.get_traced_memory()[1] / 2**20
+        if started_tracing:
+            tracemalloc.stop()
+
+    latencies = [latency for t in traces if t.ok for latency in t.round_latencies()]
+    succeeded = [t for t in traces if t.ok]
+    result.debates = len(traces)
+    result.failed = len(traces) - len(succeeded)
+    result.debates_per_minute = len(succeeded) / result.elapsed * 60 if result.elapsed else 0.0
+    if latencies:
+        result.round_p50, result.round_p95 = (float(v) for v in np.percentile(latencies, [50, 95]))
+    if succeeded:
+        result.llm_calls_per_debate = sum(t.llm_calls for t in succeeded) / len(succeeded)
+        result.prompt_tokens_per_debate = sum(t.prompt_tokens for t in succeeded) / len(succeeded)
+        result.tokens_per_debate = result.prompt_tokens_per_debate + sum(t.completion_tokens for t in succeeded) / len(
+            succeeded
+        )
+    return result
+
+
+async def run_benchmark(
+    variants: Iterable[str] = tuple(VARIANTS),
+    n_rounds: Iterable[int] = (3,),
+    n_advocates: Iterable[int] = (3,),
+    concurrency: Iterable[int] = (1, 8),
+    n_debates: int = 8,
+    profile: Optional[MockLLMProfile] = None,
+    trace_memory: bool = True,
+) -> list[BenchmarkResult]:
+    """Run every scenario of the grid in turn. Single-advocate variants ignore `n_advocates` and run once."""
+    results = []
+    for variant in variants:
+        advocates = n_advocates if VARIANTS[variant][1] else (1,)
+        for n_round, n_adv, limit in itertools.product(n_rounds, advocates, concurrency):
+            result = await run_scenario(variant, n_round, n_adv, limit, n_debates, profile, trace_memory)
+            logger.info(f"{result.model_dump()}")
+            results.append(result)
+            if result.error:
+                break
+    return results
+
+
+def format_report(results: list[BenchmarkResult]) -> str:
+    header = (
+        "| variant | rounds | advocates | concurrency | debates/min | round p50 (s) | round p95 (s) "
+        "| calls/debate | tokens/debate | peak MB | failed |"
+    )
+    lines = [header, "|" + "---|" * (header.count("|") - 1)]
+    for r in results:
+        if r.error:
+            lines.append(f"| {r.variant} | - | - | - | {r.error} | | | | | | |")
+            continue
+        lines.append(
+            f"| {r.variant} | {r.n_round} | {r.n_advocates} | {r.concurrency} | {r.debates_per_minute:.1f} "
+            f"| {r.round_p50:.3f} | {r.round_p95:.3f} | {r.llm_calls_per_debate:.1f} | {r.tokens_per_debate:.0f} "
+            f"| {r.peak_memory_mb:.1f} | {r.failed}/{r.debates} |"
+        )
+    return "\n".join(lines)
+
+
+def main(
+    variants: list[str] = list(VARIANTS),
+    n_rounds: list[int] = [3],
+    n_advocates: list[int] = [3],
+    concurrency: list[int] = [1, 8],
+    n_debates: int = 8,
+    latency: float = 0.2,
+    latency_sigma: float = 0.3,
+    tokens_per_second: float = 80.0,
+    output_tokens: int = 120,
+    seed: Optional[int] = None,
+    output: str = "",
+):
+    profile = MockLLMProfile(
+        latency=latency,
+        latency_sigma=latency_sigma,
+        tokens_per_second=tokens_per_second,
+        output_tokens=output_tokens,
+        seed=seed,
+    )
+    results = asyncio.run(run_benchmark(variants, n_rounds, n_advocates, concurrency, n_debates, profile))
+    if output:
+        with Path(output).open("a", encoding="utf-8") as f:
+            f.writelines(r.model_dump_json() + "\n" for r in results)
+    print(format_report(results))
+
+
+if __name__ == "__main__":
+    fire.Fire(main)
@@ -4,13 +4,34 @@
 
 import asyncio
 from abc import abstractmethod
+from collections import defaultdict, deque
 from enum import Enum
-from typing import TYPE_CHECKING, Any, Dict, Iterable, Optional, Set, Union
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Callable,
+    DefaultDict,
+    Deque,
+    Dict,
+    Iterable,
+    Optional,
+    Set,
+    Union,
+)
 
 from gymnasium import spaces
 from gymnasium.core import ActType, ObsType
-from pydantic import BaseModel, ConfigDict, Field, SerializeAsAny, model_validator
+from pydantic import (
+    BaseModel,
+    ConfigDict,
+    Field,
+    PrivateAttr,
+    SerializeAsAny,
+    computed_field,
+    model_validator,
+)
 
+from metagpt.const import MESSAGE_ROUTE_TO_ALL
 from metagpt.context import Context
 from metagpt.environment.api.env_api import (
     EnvAPIAbstract,
@@ -20,7 +41,7 @@ from metagpt.environment.api.env_api import (
 from metagpt.environment.base_env_space import BaseEnvAction, BaseEnvObsParams
 from metagpt.logs import logger
 from metagpt.schema import Message
-from metagpt.utils.common import get_function_schema, is_coroutine_func, is_send_to
+from metagpt.utils.common import get_function_schema, is_coroutine_func
 
 if TYPE_CHECKING:
     from metagpt.roles.role import Role  # noqa: F401
@@ -131,9 +152,28 @@ class Environment(ExtEnv):
     desc: str = Field(default="")  # 环境描述
     roles: dict[str, SerializeAsAny["Role"]] = Field(default_factory=dict, validate_default=True)
     member_addrs: Dict["Role", Set] = Field(default_factory=dict, exclude=True)
-    history: str = ""  # For debug
+    history_log: Deque[str] = Field(default_factory=deque, exclude=True)  # For debug, serialized as `history`
+    max_history: int = 0  # number of messages kept in `history`, all if 0
     context: Context = Field(default_factory=Context, exclude=True)
 
+    _ready: dict["Role", None] = PrivateAttr(default_factory=dict)  # roles with undelivered news, in arrival order
+    _routes: DefaultDict[str, dict["Role", None]] = PrivateAttr(default_factory=lambda: defaultdict(dict))
+
+    @model_validator(mode="before")
+    @classmethod
+    def load_history(cls, data: Any) -> Any:
+        if isinstance(data, dict) and isinstance(data.get("history"), str):
+            data = dict(data)
+            history = data.pop("history")
+            data.setdefault("history_log", deque([history] if history else []))
+        return data
+
+    @computed_field
+    @property
+    def history(self) -> str:
+        """All the published messages, one per line. For debug"""
+        return "".join(self.history_log)
+
     def reset(
         self,
         *,
@@ -181,16 +221,17 @@ class Environment(ExtEnv):
         route the message to the message recipient is a problem addressed by the transport framework designed
         in RFC 113.
         """
-        logger.debug(f"publish_message: {message.dump()}")
-        found = False
+        logger.opt(lazy=True).debug("publish_message: {}", message.dump)
         # According to the routing feature plan in Chapter 2.2.3.2 of RFC 113
-        for role, addrs in self.member_addrs.items():
-            if is_send_to(message, addrs):
-                role.put_message(message)
-                found = True
-        if not found:
+        recipients = self.get_recipients(message)
+        for role in recipients:
+            role.put_message(message)
+            self._ready[role] = None
+        if not recipients:
             logger.warning(f"Message no recipients: {message.dump()}")
-        self.history += f"\n{message}"  # For debug
+        self.history_log.append(f"\n{message}")  # For debug
+        if self.max_history and len(self.history_log) > self.max_history:
+            self.history_log.popleft()
 
         return True
 
@@ -199,6 +240,7 @@ class Environment(ExtEnv):
         Process all Role runs at once
         """
         for _ in range(k):
+            self._ready.clear()
             futures = []
             for role in self.roles.values():
                 future = role.run()
@@ -207,6 +249,50 @@ class Environment(ExtEnv):
             await asyncio.gather(*futures)
             logger.debug(f"is idle: {self.is_idle}")
 
+    async def run_until_idle(self, max_runs: int = 0, before_run: Optional[Callable[[], None]] = None) -> int:
+        """Run the roles as soon as messages are delivered to them, until no role has pending work.
+
+        Unlike `run`, roles are not stepped in lock-step rounds: only the roles `publish_message` delivered to are
+        run, each one again as soon as its previous run finishes if more news arrived meanwhile, and a role never
+        runs concurrently with itself.
+
+        Args:
+            max_runs: Upper bound on the number of role runs, unbounded if 0.
+            before_run: Called before every role run, e.g. to check the budget; exceptions it raises stop the run.
+
+        Returns:
+            The number of role runs.
+        """
+        for role in self.roles.values():
+            if not role.rc.msg_buffer.empty():
+                self._ready[role] = None
+
+        running: dict[asyncio.Task, "Role"] = {}
+        runs = 0
+        try:
+            while True:
+                for role in list(self._ready):
+                    if max_runs and runs >= max_runs:
+                        break
+                    if role in running.values():
+                        continue
+                    del self._ready[role]
+                    if before_run:
+                        before_run()
+                    running[asyncio.create_task(role.run())] = role
+                    runs += 1
+                if not running:
+                    break
+                done, _ = await asyncio.wait(running, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    running.pop(task)
+                    task.result()  # a role that got news while running is still in `_ready`
+        finally:
+            for task in running:
+                task.cancel()
+        logger.debug(f"quiescent after {runs} role runs, is idle: {self.is_idle}")
+        return runs
+
     def get_roles(self) -> dict[str, "Role"]:
         """获得环境内的所有角色
         Process all Role runs at once
@@ -236,7 +322,22 @@ class Environment(ExtEnv):
 
     def set_addresses(self, obj, addresses):
         """Set the addresses of the object"""
+        for addr in self.member_addrs.get(obj, ()):
+            self._routes[addr].pop(obj, None)
         self.member_addrs[obj] = addresses
+        for addr in addresses:
+            self._routes[addr][obj] = None
+
+    def get_recipients(self, message: Message) -> list["Role"]:
+        """Return the members the message is sent to, looked up by address instead of testing every member"""
+        if MESSAGE_ROUTE_TO_ALL in message.send_to:
+            return list(self.member_addrs)
+        if len(message.send_to) == 1:
+            return list(self._routes.get(next(iter(message.send_to)), ()))
+        recipients = {}
+        for addr in message.send_to:
+            recipients.update(self._routes.get(addr, {}))
+        return list(recipients)
 
     def archive(self, auto_archive=True):
         if auto_archive and self.context.git_repo:
@@ -0,0 +1,80 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# @Desc   : spatial index of the StanfordTown tile events, bucketed by grid cell and by event subject
+
+from collections import Counter, defaultdict
+from typing import DefaultDict
+
+EVENT_BUCKET_SIZE = 8  # side, in tiles, of the square cells the tiles with events are bucketed in
+
+
+class TileEventIndex:
+    """Tiles holding events, bucketed in square cells of the maze and indexed by event subject.
+
+    The index doesn't copy the events, it references the `events` set of each tile, and must be told of every
+    change to them through `add` and `discard`. A query over a square of radius r only visits the cells overlapping
+    it and the tiles in them that do have events, instead of every tile of the square; the tiles of a subject are
+    found without scanning the maze.
+    """
+
+    def __init__(self, bucket_size: int = EVENT_BUCKET_SIZE):
+        self.bucket_size = bucket_size
+        self._events: dict[tuple[int, int], set] = {}  # tile -> its events set, for tiles with events
+        self._buckets: DefaultDict[tuple[int, int], set[tuple[int, int]]] = defaultdict(set)
+        self._subjects: DefaultDict[str, Counter] = defaultdict(Counter)  # subject -> events count per tile
+
+    @classmethod
+    def from_tiles(cls, tiles: list[list[dict]], **kwargs) -> "TileEventIndex":
+        index = cls(**kwargs)
+        for y, row in enumerate(tiles):
+            for x, details in enumerate(row):
+                for event in details["events"]:
+                    index.add((x, y), event, details["events"])
+        return index
+
+    def _bucket(self, tile: tuple[int, int]) -> tuple[int, int]:
+        return tile[0] // self.bucket_size, tile[1] // self.bucket_size
+
+    def add(self, tile: tuple[int, int], event: tuple, events: set):
+        """Index `event`, just added to `events`, the events set of `tile`"""
+        if tile not in self._events:
+            self._events[tile] = events
+            self._buckets[self._bucket(tile)].add(tile)
+        self._subjects[event[0]][tile] += 1
+
+    def discard(self, tile: tuple[int, int], event: tuple):
+        """Unindex `event`, just removed from the events set of `tile`"""
+        tiles = self._subjects.get(event[0])
+        if tiles is not None:
+            tiles[tile] -= 1
+            if tiles[tile] <= 0:
+                del tiles[tile]
+            if not tiles:
+                del self._subjects[event[0]]
+        events = self._events.get(tile)
+        if events is not None and not events:
+            del self._events[tile]
+            bucket = self._buckets[self._bucket(tile)]
+            bucket.discard(tile)
+            if not bucket:
+                del self._buckets[self._bucket(tile)]
+
+    def has_subject(self, subject: str, tile: tuple[int, int]) -> bool:
+        return tile in self._subjects.get(subject, ())
+
+    def subject_tiles(self, subject: str) -> list[tuple[int, int]]:
+        """Tiles holding an event whose subject is `subject`"""
+        return sorted(self._subjects.get(subject, ()))
+
+    def events_within(self, left: int, right: int, top: int, bottom: int) -> list[tuple[tuple[int, int], set]]:
+        """Tiles with events in x of [left, right) and y of [top, bottom) with their events, ordered by x then y"""
+        if right <= left or bottom <= top:
+            return []
+        size = self.bucket_size
+        found = []
+        for bx in range(left // size, (right - 1) // size + 1):
+            for by in range(top // size, (bottom - 1) // size + 1):
+                for tile in self._buckets.get((bx, by), ()):
+                    if left <= tile[0] < right and top <= tile[1] < bottom:
+                        found.append(tile)
+        return [(tile, self._events[tile]) for tile in sorted(found)]
@@ -0,0 +1,226 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# @Desc   : compiled StanfordTown maze: the maze assets preprocessed into one memory-mapped file keyed by their hash
+
+import hashlib
+import json
+import os
+import struct
+import tempfile
+from pathlib import Path
+from typing import Optional
+
+import numpy as np
+
+from metagpt.const import CONFIG_ROOT
+from metagpt.logs import logger
+from metagpt.utils.common import read_csv_to_list, read_json_file
+
+MAZE_CACHE_DIR = CONFIG_ROOT / "maze_cache"
+MAGIC = b"STMAZE1\n"
+ALIGNMENT = 64
+
+# layers of the maze, in the order of the compiled array; the tile detail key of each layer is its name
+LAYERS = ("collision", "sector", "arena", "game_object", "spawning_location")
+META_FILE = "maze_meta_info.json"
+
+
+def _block_file(layer: str) -> str:
+    return f"special_blocks/{layer}_blocks.csv"
+
+
+def _maze_file(layer: str) -> str:
+    return f"maze/{layer}_maze.csv"
+
+
+def maze_asset_files() -> list[str]:
+    """Files of `<maze_asset_path>/matrix` the maze is built from"""
+    files = [META_FILE, _block_file("world")]
+    files += [_block_file(layer) for layer in LAYERS if layer != "collision"]
+    files += [_maze_file(layer) for layer in LAYERS]
+    return files
+
+
+def maze_asset_hash(maze_asset_path: Path) -> str:
+    """Hash of the names and contents of the maze asset files"""
+    matrix_path = Path(maze_asset_path).joinpath("matrix")
+    digest = hashlib.sha256()
+    for name in maze_asset_files():
+        digest.update(name.encode("utf-8") + b"\0")
+        digest.update(matrix_path.joinpath(name).read_bytes())
+    return digest.hexdigest()
+
+
+class CompiledMaze:
+    """The maze of a StanfordTown asset directory, one label code per tile and layer.
+
+    `codes[k, y, x]` indexes `labels[LAYERS[k]]`: the block names for sector, arena, game object and spawning
+    location, "" meaning none, and the raw tile values for collision. It is compiled from the CSV assets once and
+    saved in a single file: a JSON header with the meta info, the label tables and the address index, followed by the
+    raw code array, which is memory-mapped when loading.
+    """
+
+    _loaded: dict[str, "CompiledMaze"] = {}  # asset hash -> maze, shared by the envs of a process
+
+    def __init__(self, meta: dict, world: str, labels: dict[str, list[str]], codes: np.ndarray, address_tiles: dict):
+        self.meta = meta
+        self.world = world
+        self.labels = labels
+        self.codes = codes
+        self.address_index: dict[str, list[tuple[int, int]]] = address_tiles
+        self._templates: Optional[list[list[tuple[dict, Optional[tuple]]]]] = None
+
+    @classmethod
+    def from_assets(cls, maze_asset_path: Path, cache_dir: Optional[Path] = MAZE_CACHE_DIR) -> "CompiledMaze":
+        """Return the compiled maze of the assets, compiling and caching it in `cache_dir` if needed, None for no
+        file cache"""
+        asset_hash = maze_asset_hash(maze_asset_path)
+        maze = cls._loaded.get(asset_hash)
+        if maze is not None:
+            return maze
+
+        cache_file = Path(cache_dir).joinpath(f"{asset_hash}.maze") if cache_dir else None
+        if cache_file and cache_file.exists():
+            try:
+                maze = cls.load(cache_file)
+            except (OSError, ValueError) as exp:
+                logger.warning(f"Recompile the maze, failed to load {cache_file}: {exp}")
+        if maze is None:
+            maze = cls.compile(maze_asset_path)
+            if cache_file:
+                maze.save(cache_file)
+        cls._loaded[asset_hash] = maze
+        return maze
+
+    @classmethod
+    def compile(cls, maze_asset_path: Path) -> "CompiledMaze":
+        """Build the maze from the CSV assets"""
+        matrix_path = Path(maze_asset_path).joinpath("matrix")
+        meta = read_json_file(matrix_path.joinpath(META_FILE))
+        width, height = int(meta["maze_width"]), int(meta["maze_height"])
+        world = read_csv_to_list(matrix_path.joinpath(_block_file("world")), header=False)[0][-1]
+
+        labels, layers = {}, []
+        for layer in LAYERS:
+            raw = np.asarray(read_csv_to_list(matrix_path.joinpath(_maze_file(layer)), header=False)[0])
+            raw = raw.reshape(height, width)
+            uniques, inverse = np.unique(raw, return_inverse=True)
+            if layer == "collision":
+                names = uniques.tolist()
+            else:
+                # e.g. "25331, Double Studio, Studio, Bedroom 2, Painting" maps 25331 to "Painting"
+                rows = read_csv_to_list(matrix_path.joinpath(_block_file(layer)), header=False)
+                blocks = {row[0]: row[-1] for row in rows}
+                names = [blocks.get(value, "") for value in uniques.tolist()]
+            table = sorted(set(names) - {""})
+            table = table if layer == "collision" else [""] + table
+            code_of = np.array([table.index(name) for name in names], dtype=np.int64)
+            labels[layer] = table
+            layers.append(code_of[inverse].reshape(height, width))
+
+        dtype = np.uint16 if max(len(table) for table in labels.values()) <= np.iinfo(np.uint16).max else np.int32
+        maze = cls(meta, world, labels, np.stack(layers).astype(dtype), {})
+        maze.address_index = maze._build_address_index()
+        return maze
+
+    def _build_address_index(self) -> dict[str, list[tuple[int, int]]]:
+        """String address -> tiles, e.g. 'the Ville:Hobbs Cafe:cafe' or '<spawn_loc>bedroom-2-a'"""
+        address_tiles = {}
+        for y, row in enumerate(self.tile_labels()):
+            for x, (sector, arena, game_object, spawning_location) in enumerate(row):
+                addresses = []
+                if sector:
+                    addresses += [f"{self.world}:{sector}"]
+                if arena:
+                    addresses += [f"{self.world}:{sector}:{arena}"]
+                if game_object:
+                    addresses += [f"{self.world}:{sector}:{arena}:{game_object}"]
+                if spawning_location:
+                    addresses += [f"<spawn_loc>{spawning_location}"]
+                for address in addresses:
+                    address_tiles.setdefault(address, []).append((x, y))
+        return address_tiles
+
+    def tile_labels(self) -> list[list[tuple[str, str, str, str]]]:
+        """(sector, arena, game_object, spawning_location) names of every tile, by row"""
+        names = [np.asarray(self.labels[layer], dtype=object)[self.codes[k]] for k, layer in enumerate(LAYERS) if k]
+        return np.stack(names, axis=-1).tolist()
+
+    def collision_maze(self) -> list[list[str]]:
+        return np.asarray(self.labels["collision"], dtype=object)[self.codes[0]].tolist()
+
+    def _tile_templates(self) -> list[list[tuple[dict, Optional[tuple]]]]:
+        """Tile detail dicts without events, each with the default event of its game object"""
+        if self._templates is None:
+            free = self.labels["collision"].index("0") if "0" in self.labels["collision"] else -1
+            collision = (self.codes[0] != free).tolist()
+            self._templates = []
+            for labels_row, collision_row in zip(self.tile_labels(), collision):
+                row = []
+                for (sector, arena, game_object, spawning_location), blocked in zip(labels_row, collision_row):
+                    details = {
+                        "world": self.world,
+                        "sector": sector,
+                        "arena": arena,
+                        "game_object": game_object,
+                        "spawning_location": spawning_location,
+                        "collision": blocked,
+                    }
+                    # Each game object occupies an event in the tile.
+                    event = (f"{self.world}:{sector}:{arena}:{game_object}", None, None, None) if game_object else None
+                    row.append((details, event))
+                self._templates.append(row)
+        return self._templates
+
+    def build_tiles(self) -> list[list[dict]]:
+        """Fresh tile detail dicts, with the default event of their game object"""
+        tiles = []
+        for templates_row in self._tile_templates():
+            row = []
+            for details, event in templates_row:
+                tile = details.copy()
+                tile["events"] = {event} if event else set()
+                row.append(tile)
+            tiles.append(row)
+        return tiles
+
+    def address_tiles(self) -> dict[str, set[tuple[int, int]]]:
+        return {address: set(tiles) for address, tiles in self.address_index.items()}
+
+    def save(self, path: Path):
+        """Write the maze atomically, so concurrent workers never read a partial file"""
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        header = {
+            "meta": self.meta,
+            "world": self.world,
+            "labels": self.labels,
+            "dtype": self.codes.dtype.str,
+            "shape": list(self.codes.shape),
+            "address_tiles": self.address_index,
+        }
+        header_bytes = json.dumps(header, ensure_ascii=False).encode("utf-8")
+        offset = len(MAGIC) + 8 + len(header_bytes)
+        padding = -offset % ALIGNMENT
+        fd, tmp_path = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(MAGIC + struct.pack("<Q", len(header_bytes) + padding))
+                f.write(header_bytes + b" " * padding)
+                f.write(np.ascontiguousarray(self.codes).tobytes())
+            os.replace(tmp_path, path)
+        except BaseException:
+            Path(tmp_path).unlink(missing_ok=True)
+            raise
+
+    @classmethod
+    def load(cls, path: Path) -> "CompiledMaze":
+        with open(path, "rb") as f:
+            if f.read(len(MAGIC)) != MAGIC:
+                raise ValueError("not a compiled maze")
+            (header_size,) = struct.unpack("<Q", f.read(8))
+            header = json.loads(f.read(header_size))
+        offset = len(MAGIC) + 8 + header_size
+        codes = np.memmap(path, dtype=np.dtype(header["dtype"]), mode="r", offset=offset, shape=tuple(header["shape"]))
+        address_tiles = {address: [tuple(tile) for tile in tiles] for address, tiles in header["address_tiles"].items()}
+        return cls(header["meta"], header["world"], header["labels"], codes, address_tiles)
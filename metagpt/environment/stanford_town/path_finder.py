@@ -0,0 +1,107 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# @Desc   : shortest paths on the StanfordTown tile grid, with cached BFS distance fields per destination
+
+from collections import deque
+from functools import lru_cache
+from typing import Callable, Optional
+
+import numpy as np
+
+from metagpt.logs import logger
+
+DISTANCE_FIELD_CACHE_SIZE = 256  # a field of the_ville maze takes 56KB
+UNREACHABLE = -1
+
+
+class GridPathFinder:
+    """Shortest 4-connected paths between tiles of a collision maze.
+
+    The maze is turned into a boolean numpy grid once. A path is found by walking down the BFS distance field of its
+    destination, and the fields of the most recently used destinations are kept in an LRU cache, as many personas
+    head for the same arenas. Tiles are given in (x, y) form, like everywhere in the StanfordTown env.
+    """
+
+    def __init__(
+        self,
+        collision_maze: list[list[str]],
+        is_blocked: Optional[Callable[[np.ndarray], np.ndarray]] = None,
+        cache_size: int = DISTANCE_FIELD_CACHE_SIZE,
+    ):
+        maze = np.asarray(collision_maze)
+        self.blocked: np.ndarray = is_blocked(maze) if is_blocked else maze != "0"
+        self.height, self.width = self.blocked.shape
+        self._passable = (~self.blocked).ravel().tolist()
+        self.distance_field = lru_cache(maxsize=cache_size)(self._distance_field)
+
+    @classmethod
+    def from_block_char(cls, collision_maze: list[list[str]], collision_block_char: str, **kwargs):
+        return cls(collision_maze, is_blocked=lambda maze: maze == collision_block_char, **kwargs)
+
+    def _distance_field(self, end: tuple[int, int]) -> np.ndarray:
+        """Steps from every tile to `end` (x, y), -1 for the tiles it can't be reached from"""
+        width, size = self.width, self.width * self.height
+        dist = [UNREACHABLE] * size
+        origin = end[1] * width + end[0]
+        dist[origin] = 0
+        passable = self._passable
+        queue = deque([origin])
+        while queue:
+            cell = queue.popleft()
+            step = dist[cell] + 1
+            x = cell % width
+            for nbr in (
+                cell - width if cell >= width else -1,
+                cell - 1 if x > 0 else -1,
+                cell + width if cell + width < size else -1,
+                cell + 1 if x < width - 1 else -1,
+            ):
+                if nbr >= 0 and dist[nbr] == UNREACHABLE and passable[nbr]:
+                    dist[nbr] = step
+                    queue.append(nbr)
+        field = np.array(dist, dtype=np.int32).reshape(self.height, self.width)
+        field.setflags(write=False)
+        return field
+
+    def _neighbors(self, tile: tuple[int, int]) -> list[tuple[int, int]]:
+        x, y = tile
+        candidates = ((x, y - 1), (x - 1, y), (x, y + 1), (x + 1, y))
+        return [(i, j) for i, j in candidates if 0 <= i < self.width and 0 <= j < self.height]
+
+    def distance(self, start: tuple[int, int], end: tuple[int, int]) -> int:
+        """Number of steps from `start` to `end`, -1 if unreachable"""
+        start, end = tuple(start), tuple(end)
+        if start == end:
+            return 0
+        if self.blocked[end[1], end[0]]:
+            return UNREACHABLE
+        field = self.distance_field(end)
+        dist = int(field[start[1], start[0]])
+        if dist == UNREACHABLE and self.blocked[start[1], start[0]]:
+            # a persona standing on a blocked tile can still step off it
+            reachable = [int(field[j, i]) for i, j in self._neighbors(start) if field[j, i] != UNREACHABLE]
+            dist = min(reachable) + 1 if reachable else UNREACHABLE
+        return dist
+
+    def find_path(self, start: tuple[int, int], end: tuple[int, int]) -> list[tuple[int, int]]:
+        """Return a shortest path from `start` to `end`, both included.
+
+        As the former `path_finder`, an unreachable `end` gives `[end]`, i.e. nowhere to walk to.
+        """
+        start, end = tuple(start), tuple(end)
+        dist = self.distance(start, end)
+        if dist == UNREACHABLE:
+            logger.debug(f"No path from {start} to {end}")
+            return [end]
+
+        field = self.distance_field(end) if dist else None
+        path = [start]
+        tile = start
+        while dist > 0:
+            dist -= 1
+            tile = next(nbr for nbr in self._neighbors(tile) if field[nbr[1], nbr[0]] == dist)
+            path.append(tile)
+        return path
+
+    def clear_cache(self):
+        self.distance_field.cache_clear()
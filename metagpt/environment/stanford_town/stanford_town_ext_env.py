@@ -4,10 +4,12 @@
 #           refs to `generative_agents maze.py`
 
 import math
+from contextlib import contextmanager
+from contextvars import ContextVar
 from pathlib import Path
-from typing import Any, Optional
+from typing import Any, Iterator, Optional
 
-from pydantic import ConfigDict, Field, model_validator
+from pydantic import ConfigDict, Field, PrivateAttr, SkipValidation, model_validator
 
 from metagpt.environment.base_env import ExtEnv, mark_as_readable, mark_as_writeable
 from metagpt.environment.stanford_town.env_space import (
@@ -19,22 +21,34 @@ from metagpt.environment.stanford_town.env_space import (
     get_action_space,
     get_observation_space,
 )
-from metagpt.utils.common import read_csv_to_list, read_json_file
+from metagpt.environment.stanford_town.event_index import TileEventIndex
+from metagpt.environment.stanford_town.maze_cache import MAZE_CACHE_DIR, CompiledMaze
+from metagpt.environment.stanford_town.path_finder import GridPathFinder
+
+# actions stepped by the current task while buffering, see `StanfordTownExtEnv.buffer_actions`
+_action_buffer: ContextVar[Optional[list[EnvAction]]] = ContextVar("stanford_town_action_buffer", default=None)
 
 
 class StanfordTownExtEnv(ExtEnv):
     model_config = ConfigDict(arbitrary_types_allowed=True)
 
     maze_asset_path: Optional[Path] = Field(default=None, description="the path to store maze assets")
+    maze_cache_dir: Optional[Path] = Field(
+        default=MAZE_CACHE_DIR, description="the path to cache compiled mazes in, None to compile on every start"
+    )
     maze_width: int = Field(default=140, description="maze map width")
     maze_height: int = Field(default=100, description="maze map height")
     sq_tile_size: int = Field(default=32, description="the pixel height/width of a tile")
     special_constraint: str = Field(
         default="", description="a string description of any relevant special constraints " "the world might have"
     )
-    tiles: list[list[dict]] = Field(default=[])
-    address_tiles: dict[str, set] = Field(default=dict())
-    collision_maze: list[list] = Field(default=[])
+    # built by `_init_maze` from the compiled maze, not validated again as they are large
+    tiles: SkipValidation[list[list[dict]]] = Field(default=[])
+    address_tiles: SkipValidation[dict[str, set]] = Field(default=dict())
+    collision_maze: SkipValidation[list[list]] = Field(default=[])
+
+    _path_finder: Optional[GridPathFinder] = PrivateAttr(default=None)
+    _event_index: Optional[TileEventIndex] = PrivateAttr(default=None)
 
     @model_validator(mode="before")
     @classmethod
@@ -43,8 +57,9 @@ class StanfordTownExtEnv(ExtEnv):
         assert maze_asset_path
         maze_asset_path = Path(maze_asset_path)
 
-        maze_matrix_path = maze_asset_path.joinpath("matrix")
-        meta_info = read_json_file(maze_matrix_path.joinpath("maze_meta_info.json"))
+        # The CSV assets are compiled once into a memory-mapped file keyed by their hash, see `CompiledMaze`
+        maze = CompiledMaze.from_assets(maze_asset_path, cache_dir=values.get("maze_cache_dir", MAZE_CACHE_DIR))
+        meta_info = maze.meta
 
         maze_width = int(meta_info["maze_width"])
         maze_height = int(meta_info["maze_height"])
@@ -53,121 +68,14 @@ class StanfordTownExtEnv(ExtEnv):
         values["sq_tile_size"] = int(meta_info["sq_tile_size"])
         values["special_constraint"] = meta_info["special_constraint"]
 
-        # READING IN SPECIAL BLOCKS
-        # Special blocks are those that are colored in the Tiled map.
-        # Here is an example row for the arena block file:
-        # e.g, "25331, Double Studio, Studio, Bedroom 2, Painting"
-
-        blocks_folder = maze_matrix_path.joinpath("special_blocks")
-
-        _wb = blocks_folder.joinpath("world_blocks.csv")
-        wb_rows = read_csv_to_list(_wb, header=False)
-        wb = wb_rows[0][-1]
-
-        _sb = blocks_folder.joinpath("sector_blocks.csv")
-        sb_rows = read_csv_to_list(_sb, header=False)
-        sb_dict = dict()
-        for i in sb_rows:
-            sb_dict[i[0]] = i[-1]
-
-        _ab = blocks_folder.joinpath("arena_blocks.csv")
-        ab_rows = read_csv_to_list(_ab, header=False)
-        ab_dict = dict()
-        for i in ab_rows:
-            ab_dict[i[0]] = i[-1]
-
-        _gob = blocks_folder.joinpath("game_object_blocks.csv")
-        gob_rows = read_csv_to_list(_gob, header=False)
-        gob_dict = dict()
-        for i in gob_rows:
-            gob_dict[i[0]] = i[-1]
-
-        _slb = blocks_folder.joinpath("spawning_location_blocks.csv")
-        slb_rows = read_csv_to_list(_slb, header=False)
-        slb_dict = dict()
-        for i in slb_rows:
-            slb_dict[i[0]] = i[-1]
-
-        # [SECTION 3] Reading in the matrices
-        # This is your typical two dimensional matrices. It's made up of 0s and
-        # the number that represents the color block from the blocks folder.
-        maze_folder = maze_matrix_path.joinpath("maze")
-
-        _cm = maze_folder.joinpath("collision_maze.csv")
-        collision_maze_raw = read_csv_to_list(_cm, header=False)[0]
-        _sm = maze_folder.joinpath("sector_maze.csv")
-        sector_maze_raw = read_csv_to_list(_sm, header=False)[0]
-        _am = maze_folder.joinpath("arena_maze.csv")
-        arena_maze_raw = read_csv_to_list(_am, header=False)[0]
-        _gom = maze_folder.joinpath("game_object_maze.csv")
-        game_object_maze_raw = read_csv_to_list(_gom, header=False)[0]
-        _slm = maze_folder.joinpath("spawning_location_maze.csv")
-        spawning_location_maze_raw = read_csv_to_list(_slm, header=False)[0]
-
-        # Loading the maze. The mazes are taken directly from the json exports of
-        # Tiled maps. They should be in csv format.
-        # Importantly, they are "not" in a 2-d matrix format -- they are single
-        # row matrices with the length of width x height of the maze. So we need
-        # to convert here.
-        # example format: [['0', '0', ... '25309', '0',...], ['0',...]...]
-        # 25309 is the collision bar number right now.
-        collision_maze = []
-        sector_maze = []
-        arena_maze = []
-        game_object_maze = []
-        spawning_location_maze = []
-        for i in range(0, len(collision_maze_raw), maze_width):
-            tw = maze_width
-            collision_maze += [collision_maze_raw[i : i + tw]]
-            sector_maze += [sector_maze_raw[i : i + tw]]
-            arena_maze += [arena_maze_raw[i : i + tw]]
-            game_object_maze += [game_object_maze_raw[i : i + tw]]
-            spawning_location_maze += [spawning_location_maze_raw[i : i + tw]]
-        values["collision_maze"] = collision_maze
-
-        tiles = []
-        for i in range(maze_height):
-            row = []
-            for j in range(maze_width):
-                tile_details = dict()
-                tile_details["world"] = wb
-
-                tile_details["sector"] = ""
-                if sector_maze[i][j] in sb_dict:
-                    tile_details["sector"] = sb_dict[sector_maze[i][j]]
-
-                tile_details["arena"] = ""
-                if arena_maze[i][j] in ab_dict:
-                    tile_details["arena"] = ab_dict[arena_maze[i][j]]
-
-                tile_details["game_object"] = ""
-                if game_object_maze[i][j] in gob_dict:
-                    tile_details["game_object"] = gob_dict[game_object_maze[i][j]]
-
-                tile_details["spawning_location"] = ""
-                if spawning_location_maze[i][j] in slb_dict:
-                    tile_details["spawning_location"] = slb_dict[spawning_location_maze[i][j]]
-
-                tile_details["collision"] = False
-                if collision_maze[i][j] != "0":
-                    tile_details["collision"] = True
-
-                tile_details["events"] = set()
-
-                row += [tile_details]
-            tiles += [row]
-        values["tiles"] = tiles
-
-        # Each game object occupies an event in the tile. We are setting up the
-        # default event value here.
-        for i in range(maze_height):
-            for j in range(maze_width):
-                if tiles[i][j]["game_object"]:
-                    object_name = ":".join(
-                        [tiles[i][j]["world"], tiles[i][j]["sector"], tiles[i][j]["arena"], tiles[i][j]["game_object"]]
-                    )
-                    go_event = (object_name, None, None, None)
-                    tiles[i][j]["events"].add(go_event)
+        # The collision maze is made up of 0s and the number of the collision block,
+        # e.g. [['0', '0', ... '32125', '0',...], ['0',...]...]
+        values["collision_maze"] = maze.collision_maze()
+
+        # Each tile details its world, sector, arena, game object and spawning location
+        # names, whether it is blocked, and its events. Each game object occupies an
+        # event in the tile.
+        values["tiles"] = maze.build_tiles()
 
         # Reverse tile access.
         # <address_tiles> -- given a string address, we return a set of all
@@ -177,35 +85,7 @@ class StanfordTownExtEnv(ExtEnv):
         # address_tiles['<spawn_loc>bedroom-2-a'] == {(58, 9)}
         # address_tiles['double studio:recreation:pool table']
         #   == {(29, 14), (31, 11), (30, 14), (32, 11), ...},
-        address_tiles = dict()
-        for i in range(maze_height):
-            for j in range(maze_width):
-                addresses = []
-                if tiles[i][j]["sector"]:
-                    add = f'{tiles[i][j]["world"]}:'
-                    add += f'{tiles[i][j]["sector"]}'
-                    addresses += [add]
-                if tiles[i][j]["arena"]:
-                    add = f'{tiles[i][j]["world"]}:'
-                    add += f'{tiles[i][j]["sector"]}:'
-                    add += f'{tiles[i][j]["arena"]}'
-                    addresses += [add]
-                if tiles[i][j]["game_object"]:
-                    add = f'{tiles[i][j]["world"]}:'
-                    add += f'{tiles[i][j]["sector"]}:'
-                    add += f'{tiles[i][j]["arena"]}:'
-                    add += f'{tiles[i][j]["game_object"]}'
-                    addresses += [add]
-                if tiles[i][j]["spawning_location"]:
-                    add = f'<spawn_loc>{tiles[i][j]["spawning_location"]}'
-                    addresses += [add]
-
-                for add in addresses:
-                    if add in address_tiles:
-                        address_tiles[add].add((j, i))
-                    else:
-                        address_tiles[add] = set([(j, i)])
-        values["address_tiles"] = address_tiles
+        values["address_tiles"] = maze.address_tiles()
 
         values["action_space"] = get_action_space((maze_width, maze_height))
         values["observation_space"] = get_observation_space()
@@ -245,12 +125,19 @@ class StanfordTownExtEnv(ExtEnv):
             obs = self.get_tile_path(tile=obs_params.coord, level=obs_params.level)
         elif obs_type == EnvObsType.TILE_NBR:
             obs = self.get_nearby_tiles(tile=obs_params.coord, vision_r=obs_params.vision_radius)
+        elif obs_type == EnvObsType.TILE_EVENTS:
+            obs = self.get_nearby_events(tile=obs_params.coord, vision_r=obs_params.vision_radius)
         return obs
 
     def step(self, action: EnvAction) -> tuple[dict[str, EnvObsValType], float, bool, bool, dict[str, Any]]:
         """Execute action and then return observation
         Return results corresponding to `observation, reward, terminated, truncated, info`
         """
+        buffer = _action_buffer.get()
+        if buffer is not None:
+            buffer.append(action)
+            return self._get_obs(), 1.0, False, False, {}
+
         terminated = False
         try:
             self._execute_env_action(action)
@@ -262,6 +149,18 @@ class StanfordTownExtEnv(ExtEnv):
         ret = (obs, 1.0, terminated, False, {})
         return ret
 
+    @contextmanager
+    def buffer_actions(self) -> Iterator[list[EnvAction]]:
+        """Within the context, the actions stepped by the current task are appended to the yielded list instead of
+        being executed, so concurrent roles see the env as it was and the caller applies them in the order it wants.
+        """
+        buffer = []
+        token = _action_buffer.set(buffer)
+        try:
+            yield buffer
+        finally:
+            _action_buffer.reset(token)
+
     def _execute_env_action(self, action: EnvAction):
         action_type = action.action_type
         if action_type == EnvActionType.NONE:
@@ -287,6 +186,29 @@ class StanfordTownExtEnv(ExtEnv):
     def get_collision_maze(self) -> list:
         return self.collision_maze
 
+    @property
+    def path_finder(self) -> GridPathFinder:
+        """Path finder over the collision maze, built on first use"""
+        if self._path_finder is None:
+            self._path_finder = GridPathFinder(self.collision_maze)
+        return self._path_finder
+
+    @mark_as_readable
+    def find_path(self, start: tuple[int, int], end: tuple[int, int]) -> list[tuple[int, int]]:
+        """
+        Returns a shortest path of tiles from start to end, both in (x, y) form and included.
+        The distance fields of recent destinations are cached, so personas heading for the same
+        arena share the search.
+        """
+        return self.path_finder.find_path(start, end)
+
+    @property
+    def event_index(self) -> TileEventIndex:
+        """Spatial index of the tile events, built on first use"""
+        if self._event_index is None:
+            self._event_index = TileEventIndex.from_tiles(self.tiles)
+        return self._event_index
+
     @mark_as_readable
     def get_address_tiles(self) -> dict:
         return self.address_tiles
@@ -370,6 +292,15 @@ class StanfordTownExtEnv(ExtEnv):
         OUTPUT:
           nearby_tiles: a list of tiles that are within the radius.
         """
+        left_end, right_end, top_end, bottom_end = self._vision_bounds(tile, vision_r)
+        nearby_tiles = []
+        for i in range(left_end, right_end):
+            for j in range(top_end, bottom_end):
+                nearby_tiles += [(i, j)]
+        return nearby_tiles
+
+    def _vision_bounds(self, tile: tuple[int, int], vision_r: int) -> tuple[int, int, int, int]:
+        """Half-open x range then y range of the tiles `get_nearby_tiles` returns"""
         left_end = 0
         if tile[0] - vision_r > left_end:
             left_end = tile[0] - vision_r
@@ -386,11 +317,20 @@ class StanfordTownExtEnv(ExtEnv):
         if tile[1] - vision_r > top_end:
             top_end = tile[1] - vision_r
 
-        nearby_tiles = []
-        for i in range(left_end, right_end):
-            for j in range(top_end, bottom_end):
-                nearby_tiles += [(i, j)]
-        return nearby_tiles
+        return int(left_end), int(right_end), int(top_end), int(bottom_end)
+
+    @mark_as_readable
+    def get_nearby_events(self, tile: tuple[int, int], vision_r: int) -> list[tuple[tuple[int, int], set]]:
+        """
+        Return the tiles of `get_nearby_tiles` that hold events, each with its events set, in the same order.
+        Only the tiles with events are visited, through the spatial event index.
+        """
+        return self.event_index.events_within(*self._vision_bounds(tile, vision_r))
+
+    @mark_as_readable
+    def get_subject_tiles(self, subject: str) -> list[tuple[int, int]]:
+        """Return the tiles holding an event of the subject, e.g. where a persona is"""
+        return self.event_index.subject_tiles(subject)
 
     @mark_as_writeable
     def add_event_from_tile(self, curr_event: tuple[str], tile: tuple[int, int]) -> None:
@@ -405,7 +345,11 @@ class StanfordTownExtEnv(ExtEnv):
         OUPUT:
           None
         """
-        self.tiles[tile[1]][tile[0]]["events"].add(curr_event)
+        event_index = self.event_index  # built before the change, as it indexes the tiles on first use
+        events = self.tiles[tile[1]][tile[0]]["events"]
+        if curr_event not in events:
+            events.add(curr_event)
+            event_index.add(_as_tile(tile), curr_event, events)
 
     @mark_as_writeable
     def remove_event_from_tile(self, curr_event: tuple[str], tile: tuple[int, int]) -> None:
@@ -420,19 +364,17 @@ class StanfordTownExtEnv(ExtEnv):
         OUPUT:
           None
         """
-        curr_tile_ev_cp = self.tiles[tile[1]][tile[0]]["events"].copy()
-        for event in curr_tile_ev_cp:
-            if event == curr_event:
-                self.tiles[tile[1]][tile[0]]["events"].remove(event)
+        event_index = self.event_index  # built before the change, as it indexes the tiles on first use
+        events = self.tiles[tile[1]][tile[0]]["events"]
+        if curr_event in events:
+            events.remove(curr_event)
+            event_index.discard(_as_tile(tile), curr_event)
 
     @mark_as_writeable
     def turn_event_from_tile_idle(self, curr_event: tuple[str], tile: tuple[int, int]) -> None:
-        curr_tile_ev_cp = self.tiles[tile[1]][tile[0]]["events"].copy()
-        for event in curr_tile_ev_cp:
-            if event == curr_event:
-                self.tiles[tile[1]][tile[0]]["events"].remove(event)
-                new_event = (event[0], None, None, None)
-                self.tiles[tile[1]][tile[0]]["events"].add(new_event)
+        if curr_event in self.tiles[tile[1]][tile[0]]["events"]:
+            self.remove_event_from_tile(curr_event, tile)
+            self.add_event_from_tile((curr_event[0], None, None, None), tile)
 
     @mark_as_writeable
     def remove_subject_events_from_tile(self, subject: str, tile: tuple[int, int]) -> None:
@@ -445,7 +387,20 @@ class StanfordTownExtEnv(ExtEnv):
         OUPUT:
           None
         """
-        curr_tile_ev_cp = self.tiles[tile[1]][tile[0]]["events"].copy()
-        for event in curr_tile_ev_cp:
-            if event[0] == subject:
-                self.tiles[tile[1]][tile[0]]["events"].remove(event)
+        if not self.event_index.has_subject(subject, _as_tile(tile)):
+            return
+        for event in [event for event in self.tiles[tile[1]][tile[0]]["events"] if event[0] == subject]:
+            self.remove_event_from_tile(event, tile)
+
+    @mark_as_writeable
+    def remove_subject_events(self, subject: str) -> None:
+        """
+        Remove the events that have the input subject from all the tiles, found through the event index.
+        """
+        for tile in self.event_index.subject_tiles(subject):
+            self.remove_subject_events_from_tile(subject, tile)
+
+
+def _as_tile(tile) -> tuple[int, int]:
+    """(x, y) key of the event index, coordinates may come as a numpy array"""
+    return int(tile[0]), int(tile[1])
@@ -6,8 +6,11 @@ from datetime import datetime
 from pathlib import Path
 from typing import Optional
 
-from pydantic import Field, field_serializer, model_validator
+import numpy as np
+from pydantic import Field, PrivateAttr, field_serializer, model_validator
 
+from metagpt.ext.stanford_town.memory.memory_store import BinaryMemoryStore
+from metagpt.ext.stanford_town.memory.retrieval_index import RetrievalIndex
 from metagpt.logs import logger
 from metagpt.memory.memory import Memory
 from metagpt.schema import Message
@@ -114,6 +117,23 @@ class AgentMemory(Memory):
 
     memory_saved: Optional[Path] = Field(default=None)
     embeddings: dict[str, list[float]] = dict()
+    # "json": nodes.json/embeddings.json rewritten on every save; "binary": append-only BinaryMemoryStore files
+    storage_format: str = "json"
+
+    _store: Optional[BinaryMemoryStore] = PrivateAttr(default=None)
+    _nodes_by_id: dict[str, BasicMemory] = PrivateAttr(default_factory=dict)
+    _loading: bool = PrivateAttr(default=False)  # while loading, nodes are appended to the lists then reversed
+    _retrieval_index: RetrievalIndex = PrivateAttr(default_factory=RetrievalIndex)
+    _indexed: int = PrivateAttr(default=0)  # number of nodes of storage looked at by the retrieval index
+
+    @property
+    def retrieval_index(self) -> RetrievalIndex:
+        """Columnar index of the nodes for retrieval, catching up with the nodes added since the last call"""
+        for node in self.storage[self._indexed :]:
+            if node.embedding_key in self.embeddings:
+                self._retrieval_index.add(node, self.embeddings[node.embedding_key])
+        self._indexed = len(self.storage)
+        return self._retrieval_index
 
     def set_mem_path(self, memory_saved: Path):
         self.memory_saved = memory_saved
@@ -124,52 +144,77 @@ class AgentMemory(Memory):
         将MemoryBasic类存储为Nodes.json形式。复现GA中的Kw Strength.json形式
         这里添加一个路径即可
         TODO 这里在存储时候进行倒序存储，之后需要验证（test_memory通过）
+        storage_format为binary时，只追加上次保存之后新增的节点与embedding
         """
-        memory_json = dict()
-        for i in range(len(self.storage)):
-            memory_node = self.storage[len(self.storage) - i - 1]
-            memory_node = memory_node.save_to_dict()
-            memory_json.update(memory_node)
-        write_json_file(memory_saved.joinpath("nodes.json"), memory_json)
-        write_json_file(memory_saved.joinpath("embeddings.json"), self.embeddings)
+        if self.storage_format == "binary":
+            self._save_binary(memory_saved)
+        else:
+            memory_json = dict()
+            for i in range(len(self.storage)):
+                memory_node = self.storage[len(self.storage) - i - 1]
+                memory_node = memory_node.save_to_dict()
+                memory_json.update(memory_node)
+            write_json_file(memory_saved.joinpath("nodes.json"), memory_json)
+            embeddings = {k: v.tolist() if isinstance(v, np.ndarray) else v for k, v in self.embeddings.items()}
+            write_json_file(memory_saved.joinpath("embeddings.json"), embeddings)
 
         strength_json = dict()
         strength_json["kw_strength_event"] = self.kw_strength_event
         strength_json["kw_strength_thought"] = self.kw_strength_thought
         write_json_file(memory_saved.joinpath("kw_strength.json"), strength_json)
 
+    def _save_binary(self, memory_saved: Path):
+        if self._store is None or self._store.path != Path(memory_saved):
+            self._store = BinaryMemoryStore(memory_saved)
+            self._store.reset()
+        new_nodes = self.storage[self._store.saved_nodes :]
+        self._store.append([self._node_record(node) for node in new_nodes], self.embeddings)
+
+    @staticmethod
+    def _node_record(node: BasicMemory) -> dict:
+        """The `nodes.json` layout of a node, that `load` reads back"""
+        return {
+            "node_id": node.memory_id,
+            "type": node.memory_type,
+            "created": node.created.strftime("%Y-%m-%d %H:%M:%S") if node.created else None,
+            "expiration": node.expiration.strftime("%Y-%m-%d %H:%M:%S") if node.expiration else None,
+            "subject": node.subject,
+            "predicate": node.predicate,
+            "object": node.object,
+            "description": node.description,
+            "embedding_key": node.embedding_key,
+            "poignancy": node.poignancy,
+            "keywords": list(node.keywords),
+            "filling": node.filling,
+        }
+
     def load(self, memory_saved: Path):
         """
         将GA的JSON解析，填充到AgentMemory类之中
+        目录中存在BinaryMemoryStore文件时从中加载，embedding为内存映射，使用时才读取
         """
-        self.embeddings = read_json_file(memory_saved.joinpath("embeddings.json"))
-        memory_load = read_json_file(memory_saved.joinpath("nodes.json"))
-        for count in range(len(memory_load.keys())):
-            node_id = f"node_{str(count + 1)}"
-            node_details = memory_load[node_id]
-            node_type = node_details["type"]
-            created = datetime.strptime(node_details["created"], "%Y-%m-%d %H:%M:%S")
-            expiration = None
-            if node_details["expiration"]:
-                expiration = datetime.strptime(node_details["expiration"], "%Y-%m-%d %H:%M:%S")
-
-            s = node_details["subject"]
-            p = node_details["predicate"]
-            o = node_details["object"]
-
-            description = node_details["description"]
-            embedding_pair = (node_details["embedding_key"], self.embeddings[node_details["embedding_key"]])
-            poignancy = node_details["poignancy"]
-            keywords = set(node_details["keywords"])
-            filling = node_details["filling"]
-            if node_type == "thought":
-                self.add_thought(
-                    created, expiration, s, p, o, description, keywords, poignancy, embedding_pair, filling
-                )
-            if node_type == "event":
-                self.add_event(created, expiration, s, p, o, description, keywords, poignancy, embedding_pair, filling)
-            if node_type == "chat":
-                self.add_chat(created, expiration, s, p, o, description, keywords, poignancy, embedding_pair, filling)
+        self._loading = True
+        try:
+            if BinaryMemoryStore.exists(memory_saved):
+                self.storage_format = "binary"
+                self._store = BinaryMemoryStore(memory_saved)
+                for node_details in self._store.read_nodes():
+                    self._load_node(node_details, self._store.embedding(node_details["row"]))
+            else:
+                self.embeddings = read_json_file(memory_saved.joinpath("embeddings.json"))
+                memory_load = read_json_file(memory_saved.joinpath("nodes.json"))
+                for count in range(len(memory_load.keys())):
+                    node_id = f"node_{str(count + 1)}"
+                    node_details = memory_load[node_id]
+                    self._load_node(node_details, self.embeddings[node_details["embedding_key"]])
+        finally:
+            self._loading = False
+            # nodes were appended in loading order, the lists keep the newest first
+            for nodes in (self.event_list, self.thought_list, self.chat_list):
+                nodes.reverse()
+            for keywords in (self.event_keywords, self.thought_keywords, self.chat_keywords):
+                for nodes in keywords.values():
+                    nodes.reverse()
 
         strength_keywords_load = read_json_file(memory_saved.joinpath("kw_strength.json"))
         if strength_keywords_load["kw_strength_event"]:
@@ -177,22 +222,55 @@ class AgentMemory(Memory):
         if strength_keywords_load["kw_strength_thought"]:
             self.kw_strength_thought = strength_keywords_load["kw_strength_thought"]
 
+    def _load_node(self, node_details: dict, embedding):
+        node_type = node_details["type"]
+        created = datetime.strptime(node_details["created"], "%Y-%m-%d %H:%M:%S")
+        expiration = None
+        if node_details["expiration"]:
+            expiration = datetime.strptime(node_details["expiration"], "%Y-%m-%d %H:%M:%S")
+
+        s = node_details["subject"]
+        p = node_details["predicate"]
+        o = node_details["object"]
+
+        description = node_details["description"]
+        embedding_pair = (node_details["embedding_key"], embedding)
+        poignancy = node_details["poignancy"]
+        keywords = set(node_details["keywords"])
+        filling = node_details["filling"]
+        if node_type == "thought":
+            self.add_thought(created, expiration, s, p, o, description, keywords, poignancy, embedding_pair, filling)
+        if node_type == "event":
+            self.add_event(created, expiration, s, p, o, description, keywords, poignancy, embedding_pair, filling)
+        if node_type == "chat":
+            self.add_chat(created, expiration, s, p, o, description, keywords, poignancy, embedding_pair, filling)
+
+    def _insert_newest(self, nodes: list[BasicMemory], node: BasicMemory):
+        """Put the node first, or last while loading as the lists are reversed afterwards"""
+        if self._loading:
+            nodes.append(node)
+        else:
+            nodes[0:0] = [node]
+
     def add(self, memory_basic: BasicMemory):
         """
         Add a new message to storage, while updating the index
         重写add方法，修改原有的Message类为BasicMemory类，并添加不同的记忆类型添加方式
         """
-        if memory_basic.memory_id in self.storage:
+        if len(self._nodes_by_id) != len(self.storage):  # storage was changed without `add`
+            self._nodes_by_id = {node.memory_id: node for node in self.storage}
+        if memory_basic.memory_id in self._nodes_by_id:
             return
         self.storage.append(memory_basic)
+        self._nodes_by_id[memory_basic.memory_id] = memory_basic
         if memory_basic.memory_type == "chat":
-            self.chat_list[0:0] = [memory_basic]
+            self._insert_newest(self.chat_list, memory_basic)
             return
         if memory_basic.memory_type == "thought":
-            self.thought_list[0:0] = [memory_basic]
+            self._insert_newest(self.thought_list, memory_basic)
             return
         if memory_basic.memory_type == "event":
-            self.event_list[0:0] = [memory_basic]
+            self._insert_newest(self.event_list, memory_basic)
             return
 
     def add_chat(
@@ -228,10 +306,7 @@ class AgentMemory(Memory):
 
         keywords = [i.lower() for i in keywords]
         for kw in keywords:
-            if kw in self.chat_keywords:
-                self.chat_keywords[kw][0:0] = [memory_node]
-            else:
-                self.chat_keywords[kw] = [memory_node]
+            self._insert_newest(self.chat_keywords.setdefault(kw, []), memory_node)
 
         self.add(memory_node)
 
@@ -250,7 +325,7 @@ class AgentMemory(Memory):
 
         try:
             if filling:
-                depth_list = [memory_node.depth for memory_node in self.storage if memory_node.memory_id in filling]
+                depth_list = [self._nodes_by_id[node_id].depth for node_id in filling if node_id in self._nodes_by_id]
                 depth += max(depth_list)
         except Exception as exp:
             logger.warning(f"filling init occur {exp}")
@@ -276,10 +351,7 @@ class AgentMemory(Memory):
 
         keywords = [i.lower() for i in keywords]
         for kw in keywords:
-            if kw in self.thought_keywords:
-                self.thought_keywords[kw][0:0] = [memory_node]
-            else:
-                self.thought_keywords[kw] = [memory_node]
+            self._insert_newest(self.thought_keywords.setdefault(kw, []), memory_node)
 
         self.add(memory_node)
 
@@ -326,10 +398,7 @@ class AgentMemory(Memory):
 
         keywords = [i.lower() for i in keywords]
         for kw in keywords:
-            if kw in self.event_keywords:
-                self.event_keywords[kw][0:0] = [memory_node]
-            else:
-                self.event_keywords[kw] = [memory_node]
+            self._insert_newest(self.event_keywords.setdefault(kw, []), memory_node)
 
         self.add(memory_node)
 
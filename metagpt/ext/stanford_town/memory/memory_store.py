@@ -0,0 +1,99 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# @Desc   : append-only binary storage of AgentMemory: a memmapped float32 embedding matrix and a JSONL node table
+
+import json
+from pathlib import Path
+from typing import Iterator, Optional
+
+import numpy as np
+
+from metagpt.logs import logger
+from metagpt.utils.common import read_json_file, write_json_file
+
+NODES_FILE = "nodes.jsonl"
+EMBEDDINGS_FILE = "embeddings.f32"
+META_FILE = "store_meta.json"
+
+
+class BinaryMemoryStore:
+    """Binary files of one AgentMemory directory, written incrementally.
+
+    `nodes.jsonl` holds one node per line with the row of its embedding in `embeddings.f32`, a raw row-major float32
+    matrix whose width is kept in `store_meta.json`. Saving only appends the nodes and embeddings added since the
+    last save; embeddings are written before the nodes referring to them, so a save torn by a crash loses at most
+    its last nodes. Loading memory-maps the matrix, embeddings are only read from disk when used.
+    """
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self.dim: Optional[int] = None
+        self.rows: dict[str, int] = {}  # embedding_key -> row of the matrix
+        self.saved_nodes = 0
+        self._embeddings: Optional[np.ndarray] = None
+
+    @classmethod
+    def exists(cls, path: Path) -> bool:
+        return Path(path).joinpath(NODES_FILE).exists()
+
+    def read_nodes(self) -> Iterator[dict]:
+        """Iterate over the saved nodes and index their embedding rows, skipping a torn last line"""
+        self.rows, self.saved_nodes = {}, 0
+        if self.path.joinpath(META_FILE).exists():
+            self.dim = read_json_file(self.path.joinpath(META_FILE))["dim"]
+        nodes_file = self.path.joinpath(NODES_FILE)
+        if not nodes_file.exists():
+            return
+        with open(nodes_file, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    node = json.loads(line)
+                except ValueError:
+                    logger.warning(f"Skip malformed memory node: {line[:100]}")
+                    continue
+                self.rows[node["embedding_key"]] = node["row"]
+                self.saved_nodes += 1
+                yield node
+
+    def embedding(self, row: int) -> np.ndarray:
+        """Row of the memory-mapped embedding matrix"""
+        if self._embeddings is None or row >= len(self._embeddings):
+            n_rows = self.path.joinpath(EMBEDDINGS_FILE).stat().st_size // (4 * self.dim)
+            self._embeddings = np.memmap(self.path.joinpath(EMBEDDINGS_FILE), np.float32, "r", shape=(n_rows, self.dim))
+        return self._embeddings[row]
+
+    def reset(self):
+        """Truncate the files, the next `append` writes everything"""
+        self.path.mkdir(parents=True, exist_ok=True)
+        for name in (NODES_FILE, EMBEDDINGS_FILE, META_FILE):
+            self.path.joinpath(name).unlink(missing_ok=True)
+        self.dim = None
+        self.rows = {}
+        self.saved_nodes = 0
+        self._embeddings = None
+
+    def append(self, nodes: list[dict], embeddings: dict):
+        """Append node records, in the `nodes.json` layout, and the embeddings of keys not saved yet"""
+        new_keys = list(dict.fromkeys(n["embedding_key"] for n in nodes if n["embedding_key"] not in self.rows))
+        if new_keys:
+            matrix = np.asarray([embeddings[k] for k in new_keys], dtype=np.float32)
+            if self.dim is None:
+                self.dim = matrix.shape[1]
+                write_json_file(self.path.joinpath(META_FILE), {"dim": self.dim})
+            embeddings_file = self.path.joinpath(EMBEDDINGS_FILE)
+            size = embeddings_file.stat().st_size if embeddings_file.exists() else 0
+            first_row = size // (4 * self.dim)
+            with open(embeddings_file, "ab") as f:
+                f.truncate(first_row * 4 * self.dim)  # drop a row torn by a crash
+                f.write(matrix.tobytes())
+            for i, key in enumerate(new_keys):
+                self.rows[key] = first_row + i
+
+        with open(self.path.joinpath(NODES_FILE), "a+", encoding="utf-8") as f:
+            if f.tell():
+                f.seek(f.tell() - 1)
+                if f.read(1) != "\n":  # terminate a line torn by a crash
+                    f.write("\n")
+            for node in nodes:
+                f.write(json.dumps({**node, "row": self.rows[node["embedding_key"]]}, ensure_ascii=False) + "\n")
+        self.saved_nodes += len(nodes)
@@ -0,0 +1,123 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# @Desc   : columnar index of AgentMemory nodes for vectorized retrieval scoring
+
+from datetime import datetime
+from typing import Iterable, Optional
+
+import numpy as np
+
+EPOCH = datetime(1970, 1, 1)
+SECONDS_PER_DAY = 86400
+
+
+def to_seconds(time: Optional[datetime]) -> float:
+    return (time - EPOCH).total_seconds() if time else 0.0
+
+
+def normalize(values: np.ndarray, target_min: float = 0, target_max: float = 1) -> np.ndarray:
+    """Vectorized `normalize_list_floats`: scale to [target_min, target_max], the middle if all values are equal"""
+    if not len(values):
+        return values
+    min_val, max_val = values.min(), values.max()
+    range_val = max_val - min_val
+    if range_val == 0:
+        return np.full(len(values), (target_max - target_min) / 2)
+    return (values - min_val) * (target_max - target_min) / range_val + target_min
+
+
+class RetrievalIndex:
+    """Memory nodes laid out column-wise: embeddings in one float32 matrix with their norms, poignancy, creation
+    and last access times in arrays, so retrieval scores all the candidates in a few numpy operations.
+
+    Rows are appended in node order and addressed by `memory_id`.
+    """
+
+    def __init__(self):
+        self.nodes: list = []
+        self.rows: dict[str, int] = {}
+        self.size = 0
+        self._embeddings: Optional[np.ndarray] = None
+        self._norms = np.zeros(0, dtype=np.float32)
+        self._poignancy = np.zeros(0, dtype=np.float32)
+        self._created = np.zeros(0, dtype=np.float64)
+        self._last_accessed = np.zeros(0, dtype=np.float64)
+
+    def __len__(self) -> int:
+        return self.size
+
+    def _grow(self, dim: int):
+        capacity = max(16, 2 * len(self._norms))
+        embeddings = np.zeros((capacity, dim), dtype=np.float32)
+        if self._embeddings is not None:
+            embeddings[: self.size] = self._embeddings[: self.size]
+        self._embeddings = embeddings
+        for name in ("_norms", "_poignancy", "_created", "_last_accessed"):
+            column = getattr(self, name)
+            grown = np.zeros(capacity, dtype=column.dtype)
+            grown[: self.size] = column[: self.size]
+            setattr(self, name, grown)
+
+    def add(self, node, embedding: Iterable[float]):
+        """Append a node with its embedding, a node already indexed is skipped"""
+        if node.memory_id in self.rows:
+            return
+        vector = np.asarray(embedding, dtype=np.float32)
+        if self._embeddings is None or self.size == len(self._norms):
+            self._grow(len(vector))
+        row = self.size
+        self._embeddings[row] = vector
+        self._norms[row] = np.linalg.norm(vector)
+        self._poignancy[row] = node.poignancy
+        self._created[row] = to_seconds(node.created)
+        self._last_accessed[row] = to_seconds(node.last_accessed)
+        self.rows[node.memory_id] = row
+        self.nodes.append(node)
+        self.size += 1
+
+    def lookup(self, nodes: Iterable) -> np.ndarray:
+        """Return the rows of the nodes, in the order given"""
+        return np.fromiter((self.rows[node.memory_id] for node in nodes), dtype=np.int64)
+
+    def touch(self, rows: np.ndarray, time: datetime):
+        """Set the last access time of the rows and of their nodes"""
+        self._last_accessed[rows] = to_seconds(time)
+        for row in rows:
+            self.nodes[row].last_accessed = time
+
+    def score(
+        self,
+        rows: np.ndarray,
+        query_embedding: Iterable[float],
+        curr_time: datetime,
+        recency_decay: float,
+        weights: tuple[float, float, float] = (1, 1, 1),
+    ) -> tuple[np.ndarray, np.ndarray]:
+        """Score the rows by normalized importance, recency and relevance to the query.
+
+        The rows are first ordered by last access time, most recent first and stable, as `agent_retrieve` always did,
+        so that ties between scores keep their former order.
+
+        Returns:
+            The reordered rows and their scores.
+        """
+        rows = rows[np.argsort(-self._last_accessed[rows], kind="stable")]
+        query = np.asarray(query_embedding, dtype=np.float32)
+
+        importance = self._poignancy[rows].astype(np.float64)
+        days = np.floor((to_seconds(curr_time) - self._created[rows]) / SECONDS_PER_DAY)
+        recency = np.power(recency_decay, days)
+        relevance = (self._embeddings[rows] @ query).astype(np.float64) / (
+            self._norms[rows].astype(np.float64) * np.linalg.norm(query)
+        )
+
+        importance_w, recency_w, relevance_w = weights
+        scores = (
+            importance_w * normalize(importance) + recency_w * normalize(recency) + relevance_w * normalize(relevance)
+        )
+        return rows, scores
+
+    @staticmethod
+    def top_k(rows: np.ndarray, scores: np.ndarray, k: int) -> np.ndarray:
+        """Return the `k` rows with the highest scores, ties in row order"""
+        return rows[np.argsort(-scores, kind="stable")[:k]]
@@ -4,14 +4,16 @@
 
 import datetime
 
+import numpy as np
 from numpy import dot
 from numpy.linalg import norm
 
 from metagpt.ext.stanford_town.memory.agent_memory import BasicMemory
-from metagpt.ext.stanford_town.utils.utils import get_embedding
+from metagpt.ext.stanford_town.memory.retrieval_index import RetrievalIndex
+from metagpt.ext.stanford_town.utils.utils import aget_embedding, aget_embeddings
 
 
-def agent_retrieve(
+async def agent_retrieve(
     agent_memory,
     curr_time: datetime.datetime,
     memory_forget: float,
@@ -22,64 +24,50 @@ def agent_retrieve(
     """
     Retrieve需要集合Role使用,原因在于Role才具有AgentMemory,scratch
     逻辑:Role调用该函数,self.rc.AgentMemory,self.rc.scratch.curr_time,self.rc.scratch.memory_forget
-    输入希望查询的内容与希望回顾的条数,返回TopK条高分记忆，即List[BasicMemory]
-
-    Score_lists示例
-    {
-        "memory": memories[i],             BasicMemory类
-        "importance": memories[i].poignancy
-        "recency": 衰减因子计算结果
-        "relevance": 搜索结果
-    }
-    """
-    memories = nodes
-    agent_memory_embedding = agent_memory.embeddings
-    memories = sorted(memories, key=lambda memory_node: memory_node.last_accessed, reverse=True)
-
-    score_list = []
-    score_list = extract_importance(memories, score_list)
-    score_list = extract_recency(curr_time, memory_forget, score_list)
-    score_list = extract_relevance(agent_memory_embedding, query, score_list)
-    score_list = normalize_score_floats(score_list, 0, 1)
-
-    total_dict = {}
-    gw = [1, 1, 1]  # 三个因素的权重,重要性,近因性,相关性,
-    for i in range(len(score_list)):
-        total_score = (
-            score_list[i]["importance"] * gw[0] + score_list[i]["recency"] * gw[1] + score_list[i]["relevance"] * gw[2]
-        )
-        total_dict[score_list[i]["memory"].memory_id] = total_score
+    输入希望查询的内容与希望回顾的条数,返回TopK条高分记忆的memory_id
+    重要性、近因性、相关性在AgentMemory.retrieval_index上向量化计算，与extract_*、normalize_score_floats的结果一致
+    """
+    if not nodes:
+        return []
+    index = agent_memory.retrieval_index
+    query_embedding = await aget_embedding(query)
+    rows = retrieve_rows(index, index.lookup(nodes), curr_time, memory_forget, query_embedding, topk)
+    return [index.nodes[row].memory_id for row in rows]  # 返回的是memory_id列表
 
-    result = top_highest_x_values(total_dict, topk)
 
-    return result  # 返回的是一个BasicMemory列表
+def retrieve_rows(
+    index: RetrievalIndex,
+    rows: np.ndarray,
+    curr_time: datetime.datetime,
+    memory_forget: float,
+    query_embedding: list[float],
+    topk: int,
+) -> np.ndarray:
+    """
+    在RetrievalIndex上一次性计算重要性、近因性、相关性的归一化加权和，返回得分最高的topk行
+    query_embedding为已计算好的query向量，由调用方通过embedding broker异步获取，不阻塞事件循环
+    """
+    gw = (1, 1, 1)  # 三个因素的权重,重要性,近因性,相关性,
+    rows, scores = index.score(rows, query_embedding, curr_time, memory_forget, weights=gw)
+    return index.top_k(rows, scores, topk)
 
 
-def new_agent_retrieve(role, focus_points: list, n_count=30) -> dict:
+async def new_agent_retrieve(role, focus_points: list, n_count=30) -> dict:
     """
     输入为role，关注点列表,返回记忆数量
     输出为字典，键为focus_point，值为对应的记忆列表
     """
     retrieved = dict()
-    for focal_pt in focus_points:
-        nodes = [
-            [i.last_accessed, i]
-            for i in role.memory.event_list + role.memory.thought_list
-            if "idle" not in i.embedding_key
-        ]
-        nodes = sorted(nodes, key=lambda x: x[0])
-        nodes = [i for created, i in nodes]
-        results = agent_retrieve(
-            role.memory, role.scratch.curr_time, role.scratch.recency_decay, focal_pt, nodes, n_count
-        )
-        final_result = []
-        for n in results:
-            for i in role.memory.storage:
-                if i.memory_id == n:
-                    i.last_accessed = role.scratch.curr_time
-                    final_result.append(i)
-
-        retrieved[focal_pt] = final_result
+    nodes = [i for i in role.memory.event_list + role.memory.thought_list if "idle" not in i.embedding_key]
+    if not nodes:
+        return {focal_pt: [] for focal_pt in focus_points}
+    index = role.memory.retrieval_index
+    candidates = index.lookup(nodes)
+    embeddings = await aget_embeddings(focus_points)  # 与同一tick内其他角色的请求合并为批量请求
+    for focal_pt, embedding in zip(focus_points, embeddings):
+        rows = retrieve_rows(index, candidates, role.scratch.curr_time, role.scratch.recency_decay, embedding, n_count)
+        index.touch(rows, role.scratch.curr_time)
+        retrieved[focal_pt] = [index.nodes[row] for row in rows]
 
     return retrieved
 
@@ -103,11 +91,11 @@ def extract_importance(memories, score_list):
     return score_list
 
 
-def extract_relevance(agent_memory_embedding, query, score_list):
+async def extract_relevance(agent_memory_embedding, query, score_list):
     """
     抽取相关性
     """
-    query_embedding = get_embedding(query)
+    query_embedding = await aget_embedding(query)
     # 进行
     for i in range(len(score_list)):
         node_embedding = agent_memory_embedding[score_list[i]["memory"].embedding_key]
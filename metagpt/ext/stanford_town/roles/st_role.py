@@ -10,9 +10,9 @@ Do the steps following:
 - reflect, do the High-level thinking based on memories and re-add into the memory
 - execute, move or else in the Maze
 """
+import asyncio
 import math
 import random
-import time
 from datetime import datetime, timedelta
 from operator import itemgetter
 from pathlib import Path
@@ -37,13 +37,13 @@ from metagpt.ext.stanford_town.memory.scratch import Scratch
 from metagpt.ext.stanford_town.memory.spatial_memory import MemoryTree
 from metagpt.ext.stanford_town.plan.st_plan import plan
 from metagpt.ext.stanford_town.reflect.reflect import generate_poig_score, role_reflect
-from metagpt.ext.stanford_town.utils.const import STORAGE_PATH, collision_block_id
+from metagpt.ext.stanford_town.utils.const import STORAGE_PATH
 from metagpt.ext.stanford_town.utils.mg_ga_transform import (
     get_role_environment,
     save_environment,
     save_movement,
 )
-from metagpt.ext.stanford_town.utils.utils import get_embedding, path_finder
+from metagpt.ext.stanford_town.utils.utils import aget_embedding
 from metagpt.logs import logger
 from metagpt.roles.role import Role, RoleContext
 from metagpt.schema import Message
@@ -217,7 +217,7 @@ class STRole(Role):
         s, p, o = await run_event_triple.run(thought, self)
         keywords = set([s, p, o])
         thought_poignancy = await generate_poig_score(self, "event", whisper)
-        thought_embedding_pair = (thought, get_embedding(thought))
+        thought_embedding_pair = (thought, await aget_embedding(thought))
         self.rc.memory.add_thought(
             created, expiration, s, p, o, thought, keywords, thought_poignancy, thought_embedding_pair, None
         )
@@ -267,23 +267,26 @@ class STRole(Role):
         # getting priorities.
         percept_events_list = []
         # First, we put all events that are occuring in the nearby tiles into the
-        # percept_events_list
-        for tile in nearby_tiles:
-            tile_details = self.rc.env.observe(EnvObsParams(obs_type=EnvObsType.GET_TITLE, coord=tile))
-            if tile_details["events"]:
-                tmp_arena_path = self.rc.env.observe(
-                    EnvObsParams(obs_type=EnvObsType.TILE_PATH, coord=tile, level="arena")
-                )
-
-                if tmp_arena_path == curr_arena_path:
-                    # This calculates the distance between the persona's current tile,
-                    # and the target tile.
-                    dist = math.dist([tile[0], tile[1]], [self.rc.scratch.curr_tile[0], self.rc.scratch.curr_tile[1]])
-                    # Add any relevant events to our temp set/list with the distant info.
-                    for event in tile_details["events"]:
-                        if event not in percept_events_set:
-                            percept_events_list += [[dist, event]]
-                            percept_events_set.add(event)
+        # percept_events_list. The env only returns the nearby tiles holding events.
+        nearby_events = self.rc.env.observe(
+            EnvObsParams(
+                obs_type=EnvObsType.TILE_EVENTS,
+                coord=self.rc.scratch.curr_tile,
+                vision_radius=self.rc.scratch.vision_r,
+            )
+        )
+        for tile, tile_events in nearby_events:
+            tmp_arena_path = self.rc.env.observe(EnvObsParams(obs_type=EnvObsType.TILE_PATH, coord=tile, level="arena"))
+
+            if tmp_arena_path == curr_arena_path:
+                # This calculates the distance between the persona's current tile,
+                # and the target tile.
+                dist = math.dist([tile[0], tile[1]], [self.rc.scratch.curr_tile[0], self.rc.scratch.curr_tile[1]])
+                # Add any relevant events to our temp set/list with the distant info.
+                for event in tile_events:
+                    if event not in percept_events_set:
+                        percept_events_list += [[dist, event]]
+                        percept_events_set.add(event)
 
         # We sort, and perceive only self.rc.scratch.att_bandwidth of the closest
         # events. If the bandwidth is larger, then it means the persona can perceive
@@ -329,7 +332,7 @@ class STRole(Role):
                 if desc_embedding_in in self.rc.memory.embeddings:
                     event_embedding = self.rc.memory.embeddings[desc_embedding_in]
                 else:
-                    event_embedding = get_embedding(desc_embedding_in)
+                    event_embedding = await aget_embedding(desc_embedding_in)
                 event_embedding_pair = (desc_embedding_in, event_embedding)
 
                 # Get event poignancy.
@@ -344,7 +347,7 @@ class STRole(Role):
                     if self.rc.scratch.act_description in self.rc.memory.embeddings:
                         chat_embedding = self.rc.memory.embeddings[self.rc.scratch.act_description]
                     else:
-                        chat_embedding = get_embedding(self.rc.scratch.act_description)
+                        chat_embedding = await aget_embedding(self.rc.scratch.act_description)
                     chat_embedding_pair = (self.rc.scratch.act_description, chat_embedding)
                     chat_poignancy = await generate_poig_score(self, "chat", self.rc.scratch.act_description)
                     chat_node = self.rc.memory.add_chat(
@@ -413,6 +416,8 @@ class STRole(Role):
             e.g., "dolores double studio:double studio:bedroom 1:bed"
         """
         roles = self.rc.env.get_roles()
+        # seeded by role and step, so the tiles picked don't depend on how concurrent roles interleave
+        rng = random.Random(f"{self.name}:{self.step}")
         if "<random>" in plan and self.rc.scratch.planned_path == []:
             self.rc.scratch.act_path_set = False
 
@@ -427,26 +432,16 @@ class STRole(Role):
             if "<persona>" in plan:
                 # Executing persona-persona interaction.
                 target_p_tile = roles[plan.split("<persona>")[-1].strip()].scratch.curr_tile
-                collision_maze = self.rc.env.observe()["collision_maze"]
-                potential_path = path_finder(
-                    collision_maze, self.rc.scratch.curr_tile, target_p_tile, collision_block_id
-                )
+                potential_path = self.rc.env.find_path(self.rc.scratch.curr_tile, target_p_tile)
                 if len(potential_path) <= 2:
                     target_tiles = [potential_path[0]]
                 else:
-                    collision_maze = self.rc.env.observe()["collision_maze"]
-                    potential_1 = path_finder(
-                        collision_maze,
-                        self.rc.scratch.curr_tile,
-                        potential_path[int(len(potential_path) / 2)],
-                        collision_block_id,
+                    potential_1 = self.rc.env.find_path(
+                        self.rc.scratch.curr_tile, potential_path[int(len(potential_path) / 2)]
                     )
 
-                    potential_2 = path_finder(
-                        collision_maze,
-                        self.rc.scratch.curr_tile,
-                        potential_path[int(len(potential_path) / 2) + 1],
-                        collision_block_id,
+                    potential_2 = self.rc.env.find_path(
+                        self.rc.scratch.curr_tile, potential_path[int(len(potential_path) / 2) + 1]
                     )
                     if len(potential_1) <= len(potential_2):
                         target_tiles = [potential_path[int(len(potential_path) / 2)]]
@@ -466,7 +461,7 @@ class STRole(Role):
 
                 address_tiles = self.rc.env.observe()["address_tiles"]
                 target_tiles = address_tiles[plan]
-                target_tiles = random.sample(list(target_tiles), 1)
+                target_tiles = rng.sample(list(target_tiles), 1)
 
             else:
                 # This is our default execution. We simply take the persona to the
@@ -484,9 +479,9 @@ class STRole(Role):
             # may stretch many coordinates). So, we sample a few here. And from that
             # random sample, we will take the closest ones.
             if len(target_tiles) < 4:
-                target_tiles = random.sample(list(target_tiles), len(target_tiles))
+                target_tiles = rng.sample(list(target_tiles), len(target_tiles))
             else:
-                target_tiles = random.sample(list(target_tiles), 4)
+                target_tiles = rng.sample(list(target_tiles), 4)
             # If possible, we want personas to occupy different tiles when they are
             # headed to the same location on the maze. It is ok if they end up on the
             # same time, but we try to lower that probability.
@@ -512,12 +507,11 @@ class STRole(Role):
             closest_target_tile = None
             path = None
             for i in target_tiles:
-                # path_finder takes a collision_mze and the curr_tile coordinate as
+                # find_path takes the curr_tile and the target tile coordinates as
                 # an input, and returns a list of coordinate tuples that becomes the
                 # path.
                 # e.g., [(0, 1), (1, 1), (1, 2), (1, 3), (1, 4)...]
-                collision_maze = self.rc.env.observe()["collision_maze"]
-                curr_path = path_finder(collision_maze, curr_tile, i, collision_block_id)
+                curr_path = self.rc.env.find_path(curr_tile, i)
                 if not closest_target_tile:
                     closest_target_tile = i
                     path = curr_path
@@ -584,7 +578,7 @@ class STRole(Role):
             self.rc.scratch.curr_tile = new_tile
         else:
             ret = False
-            time.sleep(1)
+            await asyncio.sleep(1)
             logger.warning(
                 f"{self.sim_code}/environment/{self.step}.json not exist or parses failed, " f"sleep 1s and re-check"
             )
@@ -598,6 +592,24 @@ class STRole(Role):
             logger.info(f"Role: {self.name} update_role_env return False")
             return DummyMessage()
 
+        return await self.run_step()
+
+    async def think_step(self, moved: bool) -> Message:
+        """
+        The LLM-bound part of a step, run by `StanfordTown.run_tick` once the role's move was applied to the env by
+        `update_role_env`, or `moved` is False if it couldn't be.
+        """
+        await self._observe()
+        if not moved:
+            logger.info(f"Role: {self.name} update_role_env return False")
+            rsp = DummyMessage()
+        else:
+            rsp = await self.run_step()
+        self.set_todo(None)
+        return rsp
+
+    async def run_step(self) -> Message:
+        """perceive, retrieve, plan, reflect and execute, then save the next movement"""
         new_day = False
         if not self.scratch.curr_time or self.inner_voice:
             new_day = "First day"
@@ -633,7 +645,7 @@ class STRole(Role):
         self.curr_time += timedelta(seconds=self.sec_per_step)
         self.inner_voice = False
 
-        time.sleep(0.5)
+        await asyncio.sleep(0.5)
         return DummyMessage()
 
 
@@ -2,18 +2,23 @@
 # -*- coding: utf-8 -*-
 # @Desc   : StanfordTown to works like SoftwareCompany
 
+import asyncio
 from typing import Any, Optional
 
+from pydantic import Field
+
 from metagpt.context import Context
 from metagpt.environment import StanfordTownEnv
 from metagpt.ext.stanford_town.roles.st_role import STRole
 from metagpt.ext.stanford_town.utils.const import MAZE_ASSET_PATH
 from metagpt.logs import logger
+from metagpt.schema import Message
 from metagpt.team import Team
 
 
 class StanfordTown(Team):
     env: Optional[StanfordTownEnv] = None
+    max_concurrency: int = Field(default=8, description="roles thinking at the same time in a tick")
 
     def __init__(self, context: Context = None, **data: Any):
         super(Team, self).__init__(**data)
@@ -35,7 +40,7 @@ class StanfordTown(Team):
             n_round -= 1
             logger.debug(f"{n_round=}")
             self._check_balance()
-            await self.env.run()
+            await self.run_tick()
 
         # save simulation result including environment and roles after all rounds
         roles = self.env.get_roles()
@@ -43,3 +48,29 @@ class StanfordTown(Team):
             role.save_into()
 
         return self.env.history
+
+    async def run_tick(self) -> list[Message]:
+        """Step every role once.
+
+        The moves the roles decided in the previous tick are applied to the env one role at a time, in hiring order.
+        Then roles perceive, retrieve, plan, reflect and execute concurrently, at most `max_concurrency` at once, over
+        an env that stays unchanged: their env actions and messages are buffered and applied in hiring order once all
+        are done, so the outcome of a tick doesn't depend on which LLM call returns first.
+        """
+        roles: list[STRole] = list(self.env.get_roles().values())
+        moved = [await role.update_role_env() for role in roles]
+
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+
+        async def think(role: STRole, role_moved: bool) -> tuple[Message, list]:
+            async with semaphore:
+                with self.env.buffer_actions() as actions:
+                    rsp = await role.think_step(role_moved)
+            return rsp, actions
+
+        results = await asyncio.gather(*[think(role, role_moved) for role, role_moved in zip(roles, moved)])
+        for role, (rsp, actions) in zip(roles, results):
+            for action in actions:
+                self.env.step(action)
+            role.publish_message(rsp)
+        return [rsp for rsp, _ in results]
@@ -0,0 +1,244 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# @Desc   : embedding broker of StanfordTown: batched and deduplicated requests over a persistent content-hash cache
+
+import asyncio
+import hashlib
+import re
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Optional
+
+import numpy as np
+from openai import AsyncOpenAI, OpenAI
+
+from metagpt.config2 import config
+from metagpt.ext.stanford_town.utils.const import STORAGE_PATH
+from metagpt.logs import logger
+from metagpt.utils.embedding_cache import EmbeddingCache
+
+EMBEDDING_CACHE_PATH = STORAGE_PATH.joinpath("embedding_cache.sqlite")
+BLANK_TEXT = "this is blank"
+
+
+def prepare_text(text: str) -> str:
+    """Text actually embedded, as `get_embedding` always did"""
+    return text.replace("\n", " ") or BLANK_TEXT
+
+
+class EmbeddingModel(ABC):
+    """Model turning a batch of texts into embeddings, `name` tells the embeddings of different models apart"""
+
+    name: str
+
+    @abstractmethod
+    def embed(self, texts: list[str]) -> list[list[float]]:
+        """Embed the texts, in the order given"""
+
+    async def aembed(self, texts: list[str]) -> list[list[float]]:
+        return self.embed(texts)
+
+
+class OpenAIEmbeddingModel(EmbeddingModel):
+    def __init__(self, model: str = "text-embedding-ada-002", api_key: str = None, max_retries: int = 3):
+        self.name = model
+        self.api_key = api_key
+        self.max_retries = max_retries
+        self._client: Optional[OpenAI] = None
+        self._aclient: Optional[AsyncOpenAI] = None
+
+    @staticmethod
+    def _parse(response) -> list[list[float]]:
+        return [item.embedding for item in sorted(response.data, key=lambda item: item.index)]
+
+    def embed(self, texts: list[str]) -> list[list[float]]:
+        self._client = self._client or OpenAI(api_key=self.api_key)
+        for idx in range(self.max_retries):
+            try:
+                return self._parse(self._client.embeddings.create(input=texts, model=self.name))
+            except Exception as exp:
+                logger.info(f"get_embedding failed, exp: {exp}, will retry.")
+                time.sleep(5)
+        raise ValueError("get_embedding failed")
+
+    async def aembed(self, texts: list[str]) -> list[list[float]]:
+        self._aclient = self._aclient or AsyncOpenAI(api_key=self.api_key)
+        for idx in range(self.max_retries):
+            try:
+                return self._parse(await self._aclient.embeddings.create(input=texts, model=self.name))
+            except Exception as exp:
+                logger.info(f"get_embedding failed, exp: {exp}, will retry.")
+                await asyncio.sleep(5)
+        raise ValueError("get_embedding failed")
+
+
+class HashingEmbeddingModel(EmbeddingModel):
+    """Local stand-in model for offline runs: words and word bigrams hashed into a signed, L2-normalized vector.
+
+    It is deterministic across processes and texts sharing words get similar embeddings, which is enough for
+    retrieval to behave sensibly without any API.
+    """
+
+    def __init__(self, dim: int = 256):
+        self.name = f"hashing-{dim}"
+        self.dim = dim
+
+    def _embed_one(self, text: str) -> list[float]:
+        words = re.findall(r"\w+", text.lower())
+        vector = np.zeros(self.dim, dtype=np.float64)
+        for feature in words + [f"{a} {b}" for a, b in zip(words, words[1:])]:
+            digest = int.from_bytes(hashlib.blake2b(feature.encode("utf-8"), digest_size=8).digest(), "little")
+            vector[digest % self.dim] += 1.0 if digest >> 63 else -1.0
+        norm = np.linalg.norm(vector)
+        if norm:
+            vector /= norm
+        return vector.tolist()
+
+    def embed(self, texts: list[str]) -> list[list[float]]:
+        return [self._embed_one(text) for text in texts]
+
+
+class EmbeddingBroker:
+    """Embedding service shared by all the personas.
+
+    `aembed` queues the texts not cached yet and sends them in one batched request when `max_batch_size` texts are
+    waiting or `max_wait` seconds after the first one, so the personas stepping concurrently in a tick share their
+    API calls; identical texts are only requested once. Embeddings are kept in a small in-process LRU in front of an
+    optional persistent `EmbeddingCache`, so forked simulations never pay twice for the same string.
+    """
+
+    def __init__(
+        self,
+        model: EmbeddingModel,
+        cache: Optional[EmbeddingCache] = None,
+        max_batch_size: int = 64,
+        max_wait: float = 0.01,
+        memo_size: int = 4096,
+    ):
+        self.model = model
+        self.cache = cache
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait
+        self.memo_size = memo_size
+        self.api_calls = 0
+        self.embedded = 0
+        self._memo: OrderedDict[str, np.ndarray] = OrderedDict()
+        self._pending: dict[str, asyncio.Future] = {}
+        self._flush_task: Optional[asyncio.Task] = None
+        self._tasks: set[asyncio.Task] = set()
+
+    def key(self, text: str) -> str:
+        return hashlib.sha256(f"{self.model.name}\n{text}".encode("utf-8")).hexdigest()
+
+    def _lookup(self, key: str) -> Optional[np.ndarray]:
+        vector = self._memo.get(key)
+        if vector is not None:
+            self._memo.move_to_end(key)
+            return vector
+        vector = self.cache.get(key) if self.cache is not None else None
+        if vector is not None:
+            self._remember(key, vector)
+        return vector
+
+    def _remember(self, key: str, vector: np.ndarray):
+        self._memo[key] = vector
+        self._memo.move_to_end(key)
+        while len(self._memo) > self.memo_size:
+            self._memo.popitem(last=False)
+
+    def _store(self, texts: list[str], embeddings: list[list[float]]) -> list[np.ndarray]:
+        self.api_calls += 1
+        self.embedded += len(texts)
+        items = [
+            (self.key(text), np.asarray(embedding, dtype=np.float32)) for text, embedding in zip(texts, embeddings)
+        ]
+        for key, vector in items:
+            self._remember(key, vector)
+        if self.cache is not None:
+            self.cache.put_many(items)
+        return [vector for _, vector in items]
+
+    def embed_batch(self, texts: list[str]) -> list[list[float]]:
+        """Embed the texts synchronously, requesting the ones not cached in batches of `max_batch_size`"""
+        texts = [prepare_text(text) for text in texts]
+        found = {text: self._lookup(self.key(text)) for text in texts}
+        missing = [text for text, vector in found.items() if vector is None]
+        for start in range(0, len(missing), self.max_batch_size):
+            batch = missing[start : start + self.max_batch_size]
+            found.update(zip(batch, self._store(batch, self.model.embed(batch))))
+        return [found[text].tolist() for text in texts]
+
+    def embed(self, text: str) -> list[float]:
+        return self.embed_batch([text])[0]
+
+    async def aembed(self, text: str) -> list[float]:
+        text = prepare_text(text)
+        vector = self._lookup(self.key(text))
+        if vector is not None:
+            return vector.tolist()
+
+        future = self._pending.get(text)
+        if future is None:
+            future = asyncio.get_running_loop().create_future()
+            self._pending[text] = future
+            if len(self._pending) >= self.max_batch_size:
+                if self._flush_task is not None:
+                    self._flush_task.cancel()
+                    self._flush_task = None
+                self._spawn(self._flush(self._take_pending()))
+            elif self._flush_task is None:
+                self._flush_task = self._spawn(self._flush_later())
+        return (await asyncio.shield(future)).tolist()
+
+    async def aembed_batch(self, texts: list[str]) -> list[list[float]]:
+        return list(await asyncio.gather(*[self.aembed(text) for text in texts]))
+
+    def _spawn(self, coro) -> asyncio.Task:
+        task = asyncio.create_task(coro)
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return task
+
+    def _take_pending(self) -> dict[str, asyncio.Future]:
+        pending, self._pending = self._pending, {}
+        return pending
+
+    async def _flush_later(self):
+        await asyncio.sleep(self.max_wait)
+        self._flush_task = None
+        await self._flush(self._take_pending())
+
+    async def _flush(self, pending: dict[str, asyncio.Future]):
+        """Send the queued texts in one request and resolve their futures"""
+        if not pending:
+            return
+        texts = list(pending)
+        try:
+            vectors = self._store(texts, await self.model.aembed(texts))
+        except Exception as exp:
+            for future in pending.values():
+                if not future.done():
+                    future.set_exception(exp)
+            return
+        for future, vector in zip(pending.values(), vectors):
+            if not future.done():
+                future.set_result(vector)
+
+
+_broker: Optional[EmbeddingBroker] = None
+
+
+def get_embedding_broker() -> EmbeddingBroker:
+    """The broker used by `get_embedding`, OpenAI embeddings cached in `EMBEDDING_CACHE_PATH` unless set"""
+    global _broker
+    if _broker is None:
+        model = OpenAIEmbeddingModel(api_key=config.llm.api_key)
+        _broker = EmbeddingBroker(model, cache=EmbeddingCache(EMBEDDING_CACHE_PATH))
+    return _broker
+
+
+def set_embedding_broker(broker: Optional[EmbeddingBroker]):
+    """Replace the shared broker, e.g. with a `HashingEmbeddingModel` one for offline runs; None restores the default"""
+    global _broker
+    _broker = broker
@@ -7,13 +7,11 @@ import errno
 import json
 import os
 import shutil
-import time
 from pathlib import Path
 from typing import Union
 
-from openai import OpenAI
-
-from metagpt.config2 import config
+from metagpt.environment.stanford_town.path_finder import GridPathFinder
+from metagpt.ext.stanford_town.utils.embedding_broker import get_embedding_broker
 from metagpt.logs import logger
 
 
@@ -47,22 +45,23 @@ def read_csv_to_list(curr_file: str, header=False, strip_trail=True):
         return analysis_list[0], analysis_list[1:]
 
 
-def get_embedding(text, model: str = "text-embedding-ada-002"):
-    text = text.replace("\n", " ")
-    embedding = None
-    if not text:
-        text = "this is blank"
-    for idx in range(3):
-        try:
-            embedding = (
-                OpenAI(api_key=config.llm.api_key).embeddings.create(input=[text], model=model).data[0].embedding
-            )
-        except Exception as exp:
-            logger.info(f"get_embedding failed, exp: {exp}, will retry.")
-            time.sleep(5)
-    if not embedding:
-        raise ValueError("get_embedding failed")
-    return embedding
+def get_embedding(text: str) -> list[float]:
+    return get_embedding_broker().embed(text)
+
+
+def get_embeddings(texts: list[str]) -> list[list[float]]:
+    """Embed several texts, the ones not cached are requested in batches"""
+    return get_embedding_broker().embed_batch(texts)
+
+
+async def aget_embedding(text: str) -> list[float]:
+    """Embed a text along with the requests of the other personas in the same tick"""
+    return await get_embedding_broker().aembed(text)
+
+
+async def aget_embeddings(texts: list[str]) -> list[list[float]]:
+    """Embed several texts along with the requests of the other personas in the same tick"""
+    return await get_embedding_broker().aembed_batch(texts)
 
 
 def extract_first_json_dict(data_str: str) -> Union[None, dict]:
@@ -155,19 +154,11 @@ def path_finder_v2(a, start, end, collision_block_char) -> list[int]:
 
 
 def path_finder(collision_maze: list, start: list[int], end: list[int], collision_block_char: str) -> list[int]:
-    # EMERGENCY PATCH
-    start = (start[1], start[0])
-    end = (end[1], end[0])
-    # END EMERGENCY PATCH
-
-    path = path_finder_v2(collision_maze, start, end, collision_block_char)
-
-    new_path = []
-    for i in path:
-        new_path += [(i[1], i[0])]
-    path = new_path
-
-    return path
+    """
+    start and end are (x, y) tiles. Builds the collision grid on every call, prefer
+    `StanfordTownExtEnv.find_path` which keeps it with cached distance fields.
+    """
+    return GridPathFinder.from_block_char(collision_maze, collision_block_char, cache_size=1).find_path(start, end)
 
 
 def create_folder_if_not_there(curr_path):
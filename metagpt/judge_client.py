@@ -0,0 +1,112 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+@File    : judge_client.py
+@Desc    : Async single-judge client for the debate baselines, built on the `metagpt.provider` registry.
+"""
+
+import asyncio
+import os
+from typing import Callable, Iterable, Optional
+
+from pydantic import BaseModel
+
+from metagpt.configs.llm_config import LLMConfig, LLMType
+from metagpt.provider.base_llm import BaseLLM
+from metagpt.provider.llm_provider_registry import create_llm_instance
+from metagpt.utils.cost_manager import CostManager
+
+# (provider, base_url, environment variable holding the api key)
+OPENAI_JUDGE = (LLMType.OPENAI, "https://api.openai.com/v1", "OPENAI_API_KEY")
+ANTHROPIC_JUDGE = (LLMType.ANTHROPIC, "https://api.anthropic.com", "CLAUDE_API_KEY")
+GEMINI_JUDGE = (LLMType.GEMINI, "", "GEMINI_API_KEY")
+TOGETHER_JUDGE = (LLMType.TOGETHER, "https://api.together.xyz/v1", "TOGETHER_API_KEY")
+
+JUDGE_PROVIDERS = {
+    "gpt-4-turbo": OPENAI_JUDGE,
+    "gpt-4o": OPENAI_JUDGE,
+    "gpt-3.5-turbo": OPENAI_JUDGE,
+    "opus": ANTHROPIC_JUDGE,
+    "haiku": ANTHROPIC_JUDGE,
+    "sonnet": ANTHROPIC_JUDGE,
+    "gemini": GEMINI_JUDGE,
+}  # any other judge model is served by Together
+
+
+class JudgeItem(BaseModel):
+    """One (question, answer1, answer2) triple to be scored by a single judge."""
+
+    question: str
+    answer1: str
+    answer2: str
+
+
+def judge_llm_config(judge_model: str, temp: float, models: dict[str, str]) -> LLMConfig:
+    """Build the LLMConfig serving `judge_model`, one of the short names of `models`."""
+    if judge_model == "cohere":
+        raise ValueError("cohere judges are not supported by metagpt.provider")
+    api_type, base_url, key_env = JUDGE_PROVIDERS.get(judge_model, TOGETHER_JUDGE)
+    return LLMConfig(
+        api_type=api_type,
+        base_url=base_url,
+        api_key=os.getenv(key_env) or "sk-",
+        model=models[judge_model],
+        temperature=temp,
+        max_token=1024,
+        stream=False,
+    )
+
+
+class JudgeClient:
+    """Async judge client with one pooled provider instance per (judge model, temperature).
+
+    Args:
+        models: Short judge name to provider model name, e.g. `basemodel.models`.
+        provider_limits: Maximum concurrent requests per provider, e.g. `{"anthropic": 4}`.
+        default_limit: Maximum concurrent requests of providers absent from `provider_limits`.
+    """
+
+    def __init__(self, models: dict[str, str], provider_limits: Optional[dict[str, int]] = None, default_limit=8):
+        self.models = models
+        self.provider_limits = provider_limits or {}
+        self.default_limit = default_limit
+        self.cost_manager = CostManager()
+        self._llms: dict[tuple[str, float], BaseLLM] = {}
+        self._semaphores: dict[str, asyncio.Semaphore] = {}
+
+    def get_llm(self, judge_model: str, temp: float) -> BaseLLM:
+        key = (judge_model, temp)
+        if key not in self._llms:
+            llm = create_llm_instance(judge_llm_config(judge_model, temp, self.models))
+            llm.use_system_prompt = False  # the baselines send a single user message
+            llm.cost_manager = self.cost_manager
+            self._llms[key] = llm
+        return self._llms[key]
+
+    def _semaphore(self, provider: str) -> asyncio.Semaphore:
+        if provider not in self._semaphores:
+            self._semaphores[provider] = asyncio.Semaphore(self.provider_limits.get(provider, self.default_limit))
+        return self._semaphores[provider]
+
+    async def ajudge(self, judge_model: str, temp: float, prompt: str) -> str:
+        """Send one judging prompt, waiting for a free slot of the judge's provider."""
+        llm = self.get_llm(judge_model, temp)
+        async with self._semaphore(llm.config.api_type.value):
+            return await llm.aask(prompt, stream=False)
+
+    async def ajudge_batch(
+        self,
+        judge_models: list[str],
+        temp: float,
+        items: Iterable[JudgeItem],
+        prompt_fn: Callable[[str, str, str], str],
+    ) -> dict[str, list[str]]:
+        """Judge every item with every judge model concurrently, each provider under its own cap.
+
+        Returns the raw responses of each judge model, in item order.
+        """
+        prompts = [prompt_fn(i.question, i.answer1, i.answer2) for i in items]
+        results = await asyncio.gather(
+            *[asyncio.gather(*[self.ajudge(m, temp, p) for p in prompts]) for m in judge_models]
+        )
+        return dict(zip(judge_models, results))
@@ -0,0 +1,87 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+@File    : debate_transcript.py
+@Desc    : Rolling debate transcript kept under a token budget, for the advocate prompts of the debate scripts.
+"""
+from typing import Generator, List
+
+from pydantic import BaseModel, Field
+
+from metagpt.logs import logger
+from metagpt.provider.base_llm import BaseLLM
+from metagpt.schema import Message
+from metagpt.utils.text import reduce_message_length
+from metagpt.utils.token_counter import TOKEN_MAX, count_output_tokens
+
+# Budgets are enforced with this model's tokenizer when the debate model has no known context window
+DEFAULT_BUDGET_MODEL = "gpt-3.5-turbo"
+
+
+class DebateTranscript(BaseModel):
+    """Debate transcript of one role, or of a whole advocate group when shared.
+
+    The latest `keep_rounds` rounds are kept verbatim. Once the transcript grows over `max_tokens`, older rounds
+    are folded into a running summary with `BrainMemory.summarize`, so each round is summarized at most once and
+    the prompt size stays flat however many rounds are played.
+    """
+
+    max_tokens: int = 600
+    keep_rounds: int = 1
+    summary_words: int = 150
+    model: str = DEFAULT_BUDGET_MODEL
+    summary: str = ""
+    rounds: List[str] = Field(default_factory=list)
+
+    def add_round(self, round_num: int, entries: dict[str, str]):
+        """Append one round, `entries` maps a speaker to what they said."""
+        lines = [f"Round {round_num}:"] + [f"{speaker}: {text}" for speaker, text in entries.items() if text]
+        self.rounds.append("\n".join(lines))
+
+    def count_tokens(self, text: str) -> int:
+        return count_output_tokens(text, self._budget_model)
+
+    @property
+    def _budget_model(self) -> str:
+        return self.model if self.model in TOKEN_MAX else DEFAULT_BUDGET_MODEL
+
+    def _candidates(self) -> Generator[str, None, None]:
+        """Progressively shorter renderings, dropping the oldest verbatim rounds first."""
+        summary = [f"Summary of earlier rounds: {self.summary}"] if self.summary else []
+        for start in range(len(self.rounds) + 1):
+            yield "\n".join(summary + self.rounds[start:])
+        if self.summary:
+            words = self.summary.split()
+            while len(words) > 1:
+                words = words[: len(words) // 2]
+                yield f"Summary of earlier rounds: {' '.join(words)}"
+        yield ""
+
+    def render(self) -> str:
+        """Return the transcript within `max_tokens`."""
+        model = self._budget_model
+        return reduce_message_length(
+            self._candidates(), model, system_text="", reserved=TOKEN_MAX[model] - self.max_tokens
+        )
+
+    async def update(self, llm: BaseLLM):
+        """Fold the rounds older than `keep_rounds` into the summary if the transcript is over budget."""
+        if len(self.rounds) <= self.keep_rounds:
+            return
+        if self.count_tokens("\n".join([self.summary] + self.rounds)) <= self.max_tokens:
+            return
+        split = len(self.rounds) - self.keep_rounds
+        folded, self.rounds = self.rounds[:split], self.rounds[split:]
+        try:
+            self.summary = await self._summarize(llm, folded)
+        except ValueError as e:
+            logger.warning(f"Failed to summarize the debate transcript, keeping the latest rounds only: {e}")
+
+    async def _summarize(self, llm: BaseLLM, rounds: List[str]) -> str:
+        # brain_memory pulls in the redis client, import on demand
+        from metagpt.memory.brain_memory import BrainMemory
+
+        memory = BrainMemory(
+            historical_summary=self.summary, history=[Message(content=r) for r in rounds], cacheable=False
+        )
+        return await memory.summarize(llm=llm, max_words=self.summary_words)
@@ -4,7 +4,7 @@
 @Desc   : the implement of Long-term memory
 """
 
-from typing import Optional
+from typing import Iterable, Optional
 
 from pydantic import ConfigDict, Field
 
@@ -47,6 +47,15 @@ class LongTermMemory(Memory):
                 # and ignore adding messages from recover repeatedly
                 self.memory_storage.add(message)
 
+    def add_batch(self, messages: Iterable[Message]):
+        """Add the messages, those watched to the memory_storage in one batch"""
+        watched = []
+        for message in messages:
+            super().add(message)
+            if message.cause_by in self.rc.watch and not self.msg_from_recover:
+                watched.append(message)
+        self.memory_storage.add_batch(watched)
+
     async def find_news(self, observed: list[Message], k=0) -> list[Message]:
         """
         find news (previously unseen messages) from the the most recent k memories, from all memories when k=0
@@ -58,12 +67,9 @@ class LongTermMemory(Memory):
             # memory_storage hasn't initialized, use default `find_news` to get stm_news
             return stm_news
 
-        ltm_news: list[Message] = []
-        for mem in stm_news:
-            # filter out messages similar to those seen previously in ltm, only keep fresh news
-            mem_searched = await self.memory_storage.search_similar(mem)
-            if len(mem_searched) == 0:
-                ltm_news.append(mem)
+        # filter out messages similar to those seen previously in ltm, only keep fresh news
+        mems_searched = await self.memory_storage.search_similar_batch(stm_news)
+        ltm_news = [mem for mem, mem_searched in zip(stm_news, mems_searched) if len(mem_searched) == 0]
         return ltm_news[-k:]
 
     def persist(self):
@@ -7,29 +7,99 @@
 @Modified By: mashenquan, 2023-11-1. According to RFC 116: Updated the type of index key.
 """
 from collections import defaultdict
-from typing import DefaultDict, Iterable, Set
+from typing import DefaultDict, Hashable, Iterable, Optional, Set
 
-from pydantic import BaseModel, Field, SerializeAsAny
+from pydantic import BaseModel, Field, PrivateAttr, SerializeAsAny
 
 from metagpt.const import IGNORED_MESSAGE_ID
 from metagpt.schema import Message
 from metagpt.utils.common import any_to_str, any_to_str_set
 
+GRAM_SIZE = 3  # length of the substrings indexed for keyword lookup
+
+
+def _grams(text: str) -> set[str]:
+    return {text[i : i + GRAM_SIZE] for i in range(len(text) - GRAM_SIZE + 1)}
+
 
 class Memory(BaseModel):
-    """The most basic memory: super-memory"""
+    """The most basic memory: super-memory
+
+    Messages are kept in `storage` in insertion order and indexed by a key built from their id, role, cause_by,
+    sent_from and content, so deduplication and lookups by role or sender don't scan the whole history. With
+    `token_index`, the content is also indexed by character trigrams, so `get_by_content` and `try_remember` only
+    check the messages sharing every trigram of the keyword.
+    """
 
     storage: list[SerializeAsAny[Message]] = []
     index: DefaultDict[str, list[SerializeAsAny[Message]]] = Field(default_factory=lambda: defaultdict(list))
     ignore_id: bool = False
+    token_index: bool = False
+
+    _messages: dict[Hashable, Message] = PrivateAttr(default_factory=dict)
+    _by_role: DefaultDict[str, dict[Hashable, Message]] = PrivateAttr(default_factory=lambda: defaultdict(dict))
+    _by_sent_from: DefaultDict[str, dict[Hashable, Message]] = PrivateAttr(default_factory=lambda: defaultdict(dict))
+    _by_gram: DefaultDict[str, dict[Hashable, Message]] = PrivateAttr(default_factory=lambda: defaultdict(dict))
+    _synced: Optional[tuple[int, int]] = PrivateAttr(default=None)
+
+    def __eq__(self, other) -> bool:
+        # the private indexes are derived from `storage`, two memories holding the same messages are equal
+        if not isinstance(other, BaseModel):
+            return NotImplemented
+        return type(self) is type(other) and self.__dict__ == other.__dict__
+
+    def _key(self, message: Message) -> Hashable:
+        msg_id = IGNORED_MESSAGE_ID if self.ignore_id else message.id
+        return msg_id, message.role, message.cause_by, message.sent_from, message.content
+
+    def _index_message(self, key: Hashable, message: Message):
+        self._messages[key] = message
+        self._by_role[message.role][key] = message
+        self._by_sent_from[message.sent_from][key] = message
+        if self.token_index:
+            for gram in _grams(message.content):
+                self._by_gram[gram][key] = message
+
+    def _unindex_message(self, key: Hashable, message: Message):
+        self._messages.pop(key, None)
+        self._by_role[message.role].pop(key, None)
+        self._by_sent_from[message.sent_from].pop(key, None)
+        if self.token_index:
+            for gram in _grams(message.content):
+                self._by_gram[gram].pop(key, None)
+
+    def _sync(self):
+        """Rebuild the private indexes if `storage` was loaded or changed without going through this class"""
+        state = (id(self.storage), len(self.storage))
+        if self._synced == state:
+            return
+        self._messages.clear()
+        self._by_role.clear()
+        self._by_sent_from.clear()
+        self._by_gram.clear()
+        for message in self.storage:
+            self._index_message(self._key(message), message)
+        self._synced = state
+
+    def _mark_synced(self):
+        self._synced = (id(self.storage), len(self.storage))
+
+    def contains(self, message: Message) -> bool:
+        """Return whether an identical message is already stored"""
+        self._sync()
+        return self._key(message) in self._messages
 
     def add(self, message: Message):
         """Add a new message to storage, while updating the index"""
         if self.ignore_id:
             message.id = IGNORED_MESSAGE_ID
-        if message in self.storage:
+        self._sync()
+        key = self._key(message)
+        if key in self._messages:
             return
         self.storage.append(message)
+        self._index_message(key, message)
+        self._mark_synced()
         if message.cause_by:
             self.index[message.cause_by].append(message)
 
@@ -39,18 +109,36 @@ class Memory(BaseModel):
 
     def get_by_role(self, role: str) -> list[Message]:
         """Return all messages of a specified role"""
-        return [message for message in self.storage if message.role == role]
+        self._sync()
+        return list(self._by_role.get(role, {}).values())
+
+    def get_by_sent_from(self, sent_from: str) -> list[Message]:
+        """Return all messages sent from a specified role"""
+        self._sync()
+        return list(self._by_sent_from.get(sent_from, {}).values())
 
     def get_by_content(self, content: str) -> list[Message]:
         """Return all messages containing a specified content"""
-        return [message for message in self.storage if content in message.content]
+        self._sync()
+        grams = _grams(content) if self.token_index else set()
+        if not grams:
+            return [message for message in self.storage if content in message.content]
+        postings = sorted((self._by_gram.get(gram, {}) for gram in grams), key=len)
+        smallest, others = postings[0], postings[1:]
+        return [
+            message
+            for key, message in smallest.items()
+            if all(key in posting for posting in others) and content in message.content
+        ]
 
     def delete_newest(self) -> "Message":
         """delete the newest message from the storage"""
         if len(self.storage) > 0:
+            self._sync()
             newest_msg = self.storage.pop()
-            if newest_msg.cause_by and newest_msg in self.index[newest_msg.cause_by]:
-                self.index[newest_msg.cause_by].remove(newest_msg)
+            self._unindex_message(self._key(newest_msg), newest_msg)
+            self._mark_synced()
+            self._remove_from_index(newest_msg)
         else:
             newest_msg = None
         return newest_msg
@@ -59,14 +147,26 @@ class Memory(BaseModel):
         """Delete the specified message from storage, while updating the index"""
         if self.ignore_id:
             message.id = IGNORED_MESSAGE_ID
+        self._sync()
         self.storage.remove(message)
-        if message.cause_by and message in self.index[message.cause_by]:
-            self.index[message.cause_by].remove(message)
+        self._unindex_message(self._key(message), message)
+        self._mark_synced()
+        self._remove_from_index(message)
+
+    def _remove_from_index(self, message: Message):
+        if not message.cause_by or message.cause_by not in self.index:
+            return
+        messages = self.index[message.cause_by]
+        if messages and messages[-1] == message:
+            messages.pop()
+        elif message in messages:
+            messages.remove(message)
 
     def clear(self):
         """Clear storage and index"""
         self.storage = []
         self.index = defaultdict(list)
+        self._sync()
 
     def count(self) -> int:
         """Return the number of messages in storage"""
@@ -74,7 +174,7 @@ class Memory(BaseModel):
 
     def try_remember(self, keyword: str) -> list[Message]:
         """Try to recall all messages containing a specified keyword"""
-        return [message for message in self.storage if keyword in message.content]
+        return self.get_by_content(keyword)
 
     def get(self, k=0) -> list[Message]:
         """Return the most recent k memories, return all when k=0"""
@@ -82,13 +182,12 @@ class Memory(BaseModel):
 
     def find_news(self, observed: list[Message], k=0) -> list[Message]:
         """find news (previously unseen messages) from the the most recent k memories, from all memories when k=0"""
-        already_observed = self.get(k)
-        news: list[Message] = []
-        for i in observed:
-            if i in already_observed:
-                continue
-            news.append(i)
-        return news
+        if k:
+            already_observed = {self._key(i) for i in self.get(k)}
+        else:
+            self._sync()
+            already_observed = self._messages
+        return [i for i in observed if self._key(i) not in already_observed]
 
     def get_by_action(self, action) -> list[Message]:
         """Return all messages triggered by a specified Action"""
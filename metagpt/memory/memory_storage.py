@@ -3,15 +3,21 @@
 """
 @Desc   : the implement of memory storage
 """
+import asyncio
 import shutil
+import time
 from pathlib import Path
 
+import faiss
+import numpy as np
 from llama_index.core.embeddings import BaseEmbedding
+from llama_index.core.schema import NodeWithScore
+from llama_index.core.storage.docstore import BaseDocumentStore
 
 from metagpt.const import DATA_PATH, MEM_TTL
 from metagpt.logs import logger
 from metagpt.rag.engines.simple import SimpleEngine
-from metagpt.rag.schema import FAISSIndexConfig, FAISSRetrieverConfig
+from metagpt.rag.schema import FAISSIndexConfig, FAISSRetrieverConfig, ObjectNode
 from metagpt.schema import Message
 from metagpt.utils.embedding import get_embedding
 
@@ -24,7 +30,7 @@ class MemoryStorage(object):
     def __init__(self, mem_ttl: int = MEM_TTL, embedding: BaseEmbedding = None):
         self.role_id: str = None
         self.role_mem_path: str = None
-        self.mem_ttl: int = mem_ttl  # later use
+        self.mem_ttl: int = mem_ttl  # seconds a message is remembered
         self.threshold: float = 0.1  # experience value. TODO The threshold to filter similar memories
         self._initialized: bool = False
         self.embedding = embedding or get_embedding()
@@ -47,6 +53,8 @@ class MemoryStorage(object):
                 retriever_configs=[FAISSRetrieverConfig()],
                 embed_model=self.embedding,
             )
+            if self.expire():
+                self.persist()
         else:
             self.faiss_engine = SimpleEngine.from_objs(
                 objs=[], retriever_configs=[FAISSRetrieverConfig()], embed_model=self.embedding
@@ -55,18 +63,92 @@ class MemoryStorage(object):
 
     def add(self, message: Message) -> bool:
         """add message into memory storage"""
-        self.faiss_engine.add_objs([message])
-        logger.info(f"Role {self.role_id}'s memory_storage add a message")
+        self.add_batch([message])
+
+    def add_batch(self, messages: list[Message]):
+        """add messages into memory storage, embedding them in one request"""
+        if not messages:
+            return
+        now = time.time()
+        nodes = []
+        for message in messages:
+            node = ObjectNode(
+                text=message.rag_key(), metadata={**ObjectNode.get_obj_metadata(message), "created_at": now}
+            )
+            node.excluded_embed_metadata_keys.append("created_at")  # shared with excluded_llm_metadata_keys
+            nodes.append(node)
+        self.faiss_engine._save_nodes(nodes)
+        logger.info(f"Role {self.role_id}'s memory_storage add {len(messages)} messages")
 
     async def search_similar(self, message: Message, k=4) -> list[Message]:
         """search for similar messages"""
-        # filter the result which score is smaller than the threshold
-        filtered_resp = []
         resp = await self.faiss_engine.aretrieve(message.content)
-        for item in resp:
-            if item.score < self.threshold:
-                filtered_resp.append(item.metadata.get("obj"))
-        return filtered_resp
+        return self._filter_similar(resp)
+
+    async def search_similar_batch(self, messages: list[Message], k=4) -> list[list[Message]]:
+        """search for the similar messages of each message, embedding them concurrently and searching them at once"""
+        if not messages:
+            return []
+        # query embeddings as `search_similar` uses through the retriever, so both paths score alike
+        embeddings = await asyncio.gather(*[self.embedding.aget_query_embedding(m.content) for m in messages])
+        return [self._filter_similar(resp) for resp in self._search_batch(embeddings)]
+
+    def _search_batch(self, embeddings: list[list[float]]) -> list[list[NodeWithScore]]:
+        """One FAISS search for all the embeddings, scored by L2 distance as the retriever does"""
+        faiss_index, nodes_dict, docstore = self._faiss_state()
+        if not faiss_index.ntotal:
+            return [[] for _ in embeddings]
+
+        top_k = self.faiss_engine.retriever.similarity_top_k
+        dists, indices = faiss_index.search(np.asarray(embeddings, dtype=np.float32), top_k)
+        results = []
+        for row_dists, row_indices in zip(dists, indices):
+            hits = [(nodes_dict[str(idx)], float(dist)) for dist, idx in zip(row_dists, row_indices) if idx >= 0]
+            nodes = docstore.get_nodes([node_id for node_id, _ in hits])
+            results.append([NodeWithScore(node=node, score=score) for node, (_, score) in zip(nodes, hits)])
+        return results
+
+    def _faiss_state(self) -> tuple[faiss.Index, dict[str, str], BaseDocumentStore]:
+        """The FAISS index, its map of FAISS id to node id, and the docstore of the nodes
+
+        They are private fields of the llama-index FAISS retriever, relied on as of llama-index-core 0.10.15 and
+        llama-index-vector-stores-faiss 0.1.1 pinned in setup.py.
+        """
+        retriever = self.faiss_engine.retriever
+        return retriever._vector_store._faiss_index, retriever._index.index_struct.nodes_dict, retriever._docstore
+
+    def _filter_similar(self, resp: list[NodeWithScore]) -> list[Message]:
+        """the messages of the unexpired results which score is smaller than the threshold"""
+        now = time.time()
+        similar = [item for item in resp if item.score < self.threshold and not self._is_expired(item.node, now)]
+        SimpleEngine._try_reconstruct_obj(similar)
+        return [item.metadata.get("obj") for item in similar]
+
+    def _is_expired(self, node: ObjectNode, now: float) -> bool:
+        created_at = node.metadata.get("created_at")
+        return created_at is not None and now - created_at > self.mem_ttl
+
+    def expire(self) -> int:
+        """forget the messages older than `mem_ttl`, return how many
+
+        The index is rebuilt from the vectors of the others, without embedding them again.
+        """
+        faiss_index, nodes_dict, docstore = self._faiss_state()
+        now, live = time.time(), []
+        for faiss_id in sorted(nodes_dict, key=int):
+            node = docstore.get_node(nodes_dict[faiss_id])
+            if not self._is_expired(node, now):
+                node.embedding = faiss_index.reconstruct(int(faiss_id)).tolist()
+                live.append(node)
+
+        expired = len(nodes_dict) - len(live)
+        if expired:
+            self.faiss_engine = SimpleEngine.from_objs(
+                objs=[], retriever_configs=[FAISSRetrieverConfig()], embed_model=self.embedding
+            )
+            self.faiss_engine._save_nodes(live)
+            logger.info(f"Role {self.role_id}'s memory_storage forgets {expired} expired messages")
+        return expired
 
     def clean(self):
         shutil.rmtree(self.cache_dir, ignore_errors=True)
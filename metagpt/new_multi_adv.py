@@ -1,13 +1,20 @@
 import asyncio
 import nest_asyncio
 import platform
-from typing import List, Tuple
-import re
+import time
+from typing import Dict, List, Optional, Tuple, Union
 from metagpt.actions import Action
+from metagpt.batch_debate import DebateRound
+from metagpt.configs.llm_config import LLMConfig
+from metagpt.context import Context
 from metagpt.logs import logger
+from metagpt.memory.debate_transcript import DebateTranscript
 from metagpt.roles import Role
 from metagpt.schema import Message
 from metagpt.team import Team
+from metagpt.utils.cost_manager import CostManager
+from metagpt.utils.round_scheduler import RoundScheduler
+from metagpt.utils.score_parser import ScoreParser, extract_scores, format_scores
 import argparse
 
 print("Starting debate script...")
@@ -28,7 +35,7 @@ class DefendAnswer(Action):
     """
     name: str = "DefendAnswer"
 
-    async def run(self, question: str, answer: str, opponent_answer: str, advocate_id: int, team_arguments: List[str], opponent_argument: str = "", feedback: str = ""):
+    async def run(self, question: str, answer: str, opponent_answer: str, advocate_id: int, team_arguments: Union[List[str], str], opponent_argument: str = "", feedback: str = ""):
         prompt = self.PROMPT_TEMPLATE.format(question=question, answer=answer, opponent_answer=opponent_answer,
                                              opponent_argument=opponent_argument, feedback=feedback,
                                              advocate_id=advocate_id, team_arguments=team_arguments)
@@ -115,19 +122,17 @@ class ScoreAnswer(Action):
     """
     name: str = "ScoreAnswer"
 
-    async def run(self, question: str, answer1: str, answer2: str, defense1: str, defense2: str, current_round: int, total_rounds: int, previous_scores: list):
+    async def run(self, question: str, answer1: str, answer2: str, defense1: str, defense2: str, current_round: int, total_rounds: int, previous_scores: list,
+                  score_parser: Optional[ScoreParser] = None):
         prompt = self.PROMPT_TEMPLATE.format(
             question=question, answer1=answer1, answer2=answer2, defense1=defense1, defense2=defense2,
             current_round=current_round, total_rounds=total_rounds, previous_scores=previous_scores
         )
         response = await self._aask(prompt)
 
-        # Extract the tuple from the response
-        tuple_match = re.search(r'\((\d+),\s*(\d+)\)', response)
-        if tuple_match:
-            return f"({tuple_match.group(1)}, {tuple_match.group(2)})"
-        else:
-            return "(0, 0)"  # Default scores if no valid tuple is found
+        # Extract the final tuple from the response, re-asking briefly if it can't be read
+        scores = await (score_parser or ScoreParser()).aparse(response, self.llm)
+        return format_scores(scores) if scores else "(0, 0)"  # Default scores if no valid tuple is found
 
 class Advocate(Role):
     def __init__(self, name: str, question:str, answer: str, opponent_answer: str, advocate_id: int, **kwargs):
@@ -141,7 +146,7 @@ class Advocate(Role):
         self.set_actions([self.defend_action])
         self._watch([DefendAnswer])
 
-    async def _act(self, team_arguments: List[str]) -> Message:
+    async def _act(self, team_arguments: Union[List[str], str]) -> Message:
         logger.info(f"{self.name} (Advocate {self.advocate_id}): Preparing argument")
         memories = self.rc.memory.get_by_role(role=self.name)
         opponent_memories = self.rc.memory.get_by_role(role=f"Opponent of {self.name}")
@@ -181,22 +186,62 @@ class Aggregator(Role):
         return msg
 
 class AdvocateGroup:
-    def __init__(self, name: str, question:str, answer: str, opponent_answer: str, n_advocates: int):
+    """Advocates defending one answer, whose defenses are merged by an aggregator.
+
+    With `transcript_tokens > 0` advocates see a rolling transcript of the debate, kept under that many tokens,
+    instead of their team's latest arguments. `share_transcript` keeps one transcript for the whole group, so it is
+    summarized once per round; otherwise each advocate keeps its own, which also records its own arguments.
+    """
+
+    def __init__(self, name: str, question:str, answer: str, opponent_answer: str, n_advocates: int,
+                 advocate_context: Optional[Context] = None, aggregator_context: Optional[Context] = None,
+                 transcript_tokens: int = 0, share_transcript: bool = True):
         self.name = name
-        self.advocates = [Advocate(f"{name}_Advocate{i+1}", question, answer, opponent_answer, i+1) for i in range(n_advocates)]
-        self.aggregator = Aggregator(f"{name}_Aggregator", question, answer, opponent_answer)
+        self.advocates = [Advocate(f"{name}_Advocate{i+1}", question, answer, opponent_answer, i+1, context=advocate_context)
+                          for i in range(n_advocates)]
+        self.aggregator = Aggregator(f"{name}_Aggregator", question, answer, opponent_answer, context=aggregator_context)
         self.answer = answer
         self.opponent_answer = opponent_answer
+        self.transcripts: List[DebateTranscript] = []
+        if transcript_tokens > 0:
+            n_transcripts = 1 if share_transcript else n_advocates
+            self.transcripts = [DebateTranscript(max_tokens=transcript_tokens, model=adv.llm.config.model)
+                                for adv in self.advocates[:n_transcripts]]
+        self.last_defenses: List[str] = []
+        self.last_argument = ""
+
+    def transcript_of(self, advocate_index: int) -> Optional[DebateTranscript]:
+        if not self.transcripts:
+            return None
+        return self.transcripts[0] if len(self.transcripts) == 1 else self.transcripts[advocate_index]
 
     async def act(self) -> str:
-        team_arguments = [adv.rc.memory.get_by_role(role=adv.name)[-1].content if adv.rc.memory.get_by_role(role=adv.name) else "" for adv in self.advocates]
+        if self.transcripts:
+            team_arguments = [self.transcript_of(i).render() for i in range(len(self.advocates))]
+        else:
+            latest = [adv.rc.memory.get_by_role(role=adv.name)[-1].content if adv.rc.memory.get_by_role(role=adv.name) else "" for adv in self.advocates]
+            team_arguments = [latest] * len(self.advocates)
 
-        defenses = await asyncio.gather(*[adv._act(team_arguments) for adv in self.advocates])
+        defenses = await asyncio.gather(*[adv._act(args) for adv, args in zip(self.advocates, team_arguments)])
         individual_defenses = [d.content for d in defenses]
 
         aggregated_defense = await self.aggregator._act(individual_defenses)
+        self.last_defenses = individual_defenses
+        self.last_argument = aggregated_defense.content
         return aggregated_defense.content
 
+    async def record_round(self, round_num: int, opponent_argument: str, feedback: str):
+        """Append the finished round to the transcripts and compress them, once per transcript."""
+        if not self.transcripts:
+            return
+        entries = {"Our team": self.last_argument, "Opponent": opponent_argument, "Judge": feedback}
+        if len(self.transcripts) == 1:
+            self.transcripts[0].add_round(round_num, entries)
+        else:
+            for transcript, defense in zip(self.transcripts, self.last_defenses):
+                transcript.add_round(round_num, {"You": defense, **entries})
+        await asyncio.gather(*[t.update(adv.llm) for t, adv in zip(self.transcripts, self.advocates)])
+
 class Judge(Role):
     def __init__(self, question, answer1, answer2, **kwargs):
         super().__init__(**kwargs)
@@ -234,6 +279,7 @@ class Scorer(Role):
         self.answer1 = answer1
         self.answer2 = answer2
         self.score_action = ScoreAnswer()
+        self.score_parser = ScoreParser()
         self.set_actions([self.score_action])
         self._watch([DefendAnswer, AggregateDefense])
 
@@ -249,18 +295,72 @@ class Scorer(Role):
         scores = await self.score_action.run(question=self.question, answer1=self.answer1, answer2=self.answer2,
                                              defense1=advocate1_arg, defense2=advocate2_arg,
                                              current_round=current_round, total_rounds=total_rounds,
-                                             previous_scores=previous_scores)
+                                             previous_scores=previous_scores, score_parser=self.score_parser)
 
         msg = Message(content=scores, role=self.name)
         self.rc.memory.add(msg)
         return msg
 
-async def debate(question:str, answer1:str, answer2:str, investment: float = 3.0, n_round: int = 5, n_advocates: int = 3) -> List[str]:
+DEBATE_ROLES = ("advocate", "aggregator", "judge", "scorer")
+
+def build_role_contexts(llm_config: Optional[Union[LLMConfig, dict]] = None,
+                        role_llm_configs: Optional[Dict[str, Union[LLMConfig, dict]]] = None) -> Dict[str, Optional[Context]]:
+    """Map each debate role to an in-memory Context.
+
+    `role_llm_configs` (keyed by "advocate", "aggregator", "judge" or "scorer") overrides `llm_config` for that role.
+    Roles left without a config get None and fall back to the default config2.yaml.
+    """
+    role_llm_configs = role_llm_configs or {}
+    unknown = set(role_llm_configs) - set(DEBATE_ROLES)
+    if unknown:
+        raise ValueError(f"Unknown debate roles {unknown}, expected some of {DEBATE_ROLES}")
+    shared = Context.from_llm_config(llm_config) if llm_config else None
+    return {
+        role: Context.from_llm_config(role_llm_configs[role]) if role in role_llm_configs else shared
+        for role in DEBATE_ROLES
+    }
+
+def deliver_to_group(group: AdvocateGroup, argument: str):
+    """Hand the opponent group's aggregated argument to every advocate of `group`."""
+    for adv in group.advocates:
+        adv.rc.memory.add(Message(content=argument, role=f"Opponent of {adv.name}", cause_by=AggregateDefense))
+
+async def debate(question:str, answer1:str, answer2:str, investment: float = 3.0, n_round: int = 5, n_advocates: int = 3,
+                 simultaneous: bool = False, llm_config: Optional[Union[LLMConfig, dict]] = None,
+                 role_llm_configs: Optional[Dict[str, Union[LLMConfig, dict]]] = None,
+                 transcript_tokens: int = 0, share_transcript: bool = True,
+                 round_log: Optional[List[DebateRound]] = None, cost_manager: Optional[CostManager] = None) -> List[str]:
+    """Run a multi-advocate debate and return the raw scorer output of each round.
+
+    Within a round, LLM calls are scheduled by their data dependencies: the judge and the scorer run together
+    once both defenses are in. By default group 2 replies to the argument of group 1 in the same round, so a round
+    takes three serial LLM stages: group 1, group 2, then judge and scorer. With `simultaneous=True` both groups
+    open each round at the same time, each answering the opponent's argument from the previous round, which takes
+    two stages. The default stays sequential because simultaneous openings change what group 2 argues against.
+
+    `llm_config` binds the whole debate to one model and `role_llm_configs` binds single roles, see
+    `build_role_contexts`. Both are kept in memory, so debates of different models can run concurrently.
+
+    `transcript_tokens` and `share_transcript` give advocates a compressed transcript of the earlier rounds,
+    see `AdvocateGroup`.
+
+    `round_log` receives a `DebateRound` per completed round, and `cost_manager` the token usage of every role
+    of this debate only, e.g. to stream them with `BatchDebateRunner`.
+    """
     print("Initializing debate...")
-    advocate_group1 = AdvocateGroup(name="AdvocateGroup1", question=question, answer=answer1, opponent_answer=answer2, n_advocates=n_advocates)
-    advocate_group2 = AdvocateGroup(name="AdvocateGroup2", question=question, answer=answer2, opponent_answer=answer1, n_advocates=n_advocates)
-    judge = Judge(question=question, answer1=answer1, answer2=answer2)
-    scorer = Scorer(question=question, answer1=answer1, answer2=answer2)
+    contexts = build_role_contexts(llm_config, role_llm_configs)
+    advocate_group1 = AdvocateGroup(name="AdvocateGroup1", question=question, answer=answer1, opponent_answer=answer2, n_advocates=n_advocates,
+                                    advocate_context=contexts["advocate"], aggregator_context=contexts["aggregator"],
+                                    transcript_tokens=transcript_tokens, share_transcript=share_transcript)
+    advocate_group2 = AdvocateGroup(name="AdvocateGroup2", question=question, answer=answer2, opponent_answer=answer1, n_advocates=n_advocates,
+                                    advocate_context=contexts["advocate"], aggregator_context=contexts["aggregator"],
+                                    transcript_tokens=transcript_tokens, share_transcript=share_transcript)
+    judge = Judge(question=question, answer1=answer1, answer2=answer2, context=contexts["judge"])
+    scorer = Scorer(question=question, answer1=answer1, answer2=answer2, context=contexts["scorer"])
+    if cost_manager:
+        for role in [*advocate_group1.advocates, advocate_group1.aggregator, *advocate_group2.advocates,
+                     advocate_group2.aggregator, judge, scorer]:
+            role.llm.cost_manager = cost_manager
 
     print(f"Debate Question: {question}")
     print(f"AdvocateGroup1 defends: {answer1}")
@@ -275,46 +375,76 @@ async def debate(question:str, answer1:str, answer2:str, investment: float = 3.0
 
     for i in range(n_round):
         print(f"Starting Round {i+1}...")
-
-        print("AdvocateGroup1 preparing argument...")
-        msg1 = await advocate_group1.act()
-        print(f"AdvocateGroup1 aggregated argument: {msg1}")
-        for adv in advocate_group2.advocates:
-            adv.rc.memory.add(Message(content=msg1, role=f"Opponent of {adv.name}", cause_by=AggregateDefense))
-        judge.rc.memory.add(Message(content=msg1, role="AdvocateGroup1"))
-        scorer.rc.memory.add(Message(content=msg1, role="AdvocateGroup1"))
-
-        print("AdvocateGroup2 preparing argument...")
-        msg2 = await advocate_group2.act()
-        print(f"AdvocateGroup2 aggregated argument: {msg2}")
-        for adv in advocate_group1.advocates:
-            adv.rc.memory.add(Message(content=msg2, role=f"Opponent of {adv.name}", cause_by=AggregateDefense))
-        judge.rc.memory.add(Message(content=msg2, role="AdvocateGroup2"))
-        scorer.rc.memory.add(Message(content=msg2, role="AdvocateGroup2"))
-
-        print("Judge evaluating...")
-        judge_msg = await judge._act(current_round=i+1, total_rounds=n_round, previous_scores=previous_scores)
-        print(f"Judge evaluation: {judge_msg.content}")
-        for adv in advocate_group1.advocates + advocate_group2.advocates:
-            adv.rc.memory.add(judge_msg)
-        advocate_group1.aggregator.rc.memory.add(judge_msg)
-        advocate_group2.aggregator.rc.memory.add(judge_msg)
-
-        print("Scorer scoring...")
-        score_msg = await scorer._act(current_round=i+1, total_rounds=n_round, previous_scores=previous_scores)
+        round_start = time.perf_counter()
+
+        async def group1_step():
+            print("AdvocateGroup1 preparing argument...")
+            msg1 = await advocate_group1.act()
+            print(f"AdvocateGroup1 aggregated argument: {msg1}")
+            if not simultaneous:
+                deliver_to_group(advocate_group2, msg1)
+            return msg1
+
+        async def group2_step(*_):
+            print("AdvocateGroup2 preparing argument...")
+            msg2 = await advocate_group2.act()
+            print(f"AdvocateGroup2 aggregated argument: {msg2}")
+            return msg2
+
+        async def deliver_step(msg1, msg2):
+            # Judge and scorer read the two latest memories as (group1, group2), so keep this order
+            if simultaneous:
+                deliver_to_group(advocate_group2, msg1)
+            deliver_to_group(advocate_group1, msg2)
+            for role in (judge, scorer):
+                role.rc.memory.add(Message(content=msg1, role="AdvocateGroup1"))
+                role.rc.memory.add(Message(content=msg2, role="AdvocateGroup2"))
+
+        async def judge_step(_):
+            print("Judge evaluating...")
+            judge_msg = await judge._act(current_round=i+1, total_rounds=n_round, previous_scores=previous_scores)
+            print(f"Judge evaluation: {judge_msg.content}")
+            for adv in advocate_group1.advocates + advocate_group2.advocates:
+                adv.rc.memory.add(judge_msg)
+            advocate_group1.aggregator.rc.memory.add(judge_msg)
+            advocate_group2.aggregator.rc.memory.add(judge_msg)
+            return judge_msg
+
+        async def scorer_step(_):
+            print("Scorer scoring...")
+            return await scorer._act(current_round=i+1, total_rounds=n_round, previous_scores=previous_scores)
+
+        async def transcript_step(msg1, msg2, judge_msg):
+            await asyncio.gather(advocate_group1.record_round(i+1, msg2, judge_msg.content),
+                                 advocate_group2.record_round(i+1, msg1, judge_msg.content))
+
+        scheduler = RoundScheduler()
+        scheduler.add("group1", group1_step)
+        scheduler.add("group2", group2_step, deps=[] if simultaneous else ["group1"])
+        scheduler.add("deliver", deliver_step, deps=["group1", "group2"])
+        # Judge and scorer only read the two defenses, so they run concurrently
+        scheduler.add("judge", judge_step, deps=["deliver"])
+        scheduler.add("scorer", scorer_step, deps=["deliver"])
+        if transcript_tokens > 0:
+            scheduler.add("transcript", transcript_step, deps=["group1", "group2", "judge"])
+        results = await scheduler.run()
+
+        score_msg = results["scorer"]
         print(f"Raw Scores: {score_msg.content}")
         scores.append(score_msg.content)
 
         # Parse and store the new scores
-        try:
-            new_scores = eval(score_msg.content)
-            if not isinstance(new_scores, tuple) or len(new_scores) != 2:
-                raise ValueError("Invalid score format")
+        new_scores = extract_scores(score_msg.content)
+        if new_scores:
             previous_scores.append(new_scores)
             print(f"Parsed Scores: {new_scores}")
-        except Exception as e:
-                    print(f"Error parsing scores: {e}")
-                    previous_scores.append((0, 0))  # Default scores if parsing fails
+        else:
+            print(f"Error parsing scores: {score_msg.content}")
+            previous_scores.append((0, 0))  # Default scores if parsing fails
+        if round_log is not None:
+            round_log.append(DebateRound(round=i+1, defense1=results["group1"], defense2=results["group2"],
+                                         judge=results["judge"].content, scores=score_msg.content,
+                                         parsed_scores=new_scores, elapsed=time.perf_counter() - round_start))
 
         print()  # Add a blank line between rounds
 
@@ -323,13 +453,20 @@ async def debate(question:str, answer1:str, answer2:str, investment: float = 3.0
     for round_num, (score1, score2) in enumerate(previous_scores, 1):
         print(f"Round {round_num}: AdvocateGroup1 - {score1}, AdvocateGroup2 - {score2}")
 
+    logger.info(f"Score parsing: {scorer.score_parser.stats}")
     print("Debate completed.")
     return scores
 
-async def run_debate(question: str, answer1: str, answer2: str, investment: float = 0.1, n_round: int = 3, n_advocates: int = 3) -> List[str]:
+async def run_debate(question: str, answer1: str, answer2: str, investment: float = 0.1, n_round: int = 3, n_advocates: int = 3,
+                     simultaneous: bool = False, llm_config: Optional[Union[LLMConfig, dict]] = None,
+                     role_llm_configs: Optional[Dict[str, Union[LLMConfig, dict]]] = None,
+                     transcript_tokens: int = 0, share_transcript: bool = True) -> List[str]:
     try:
         print("Starting run_debate function...")
-        scores = await debate(question=question, answer1=answer1, answer2=answer2, investment=investment, n_round=n_round, n_advocates=n_advocates)
+        scores = await debate(question=question, answer1=answer1, answer2=answer2, investment=investment, n_round=n_round,
+                              n_advocates=n_advocates, simultaneous=simultaneous, llm_config=llm_config,
+                              role_llm_configs=role_llm_configs, transcript_tokens=transcript_tokens,
+                              share_transcript=share_transcript)
         print("Debate completed successfully.")
         return scores
     except Exception as e:
@@ -340,6 +477,10 @@ async def run_debate(question: str, answer1: str, answer2: str, investment: floa
 
 nest_asyncio.apply()
 
-def get_multi_debate_scores_20(question: str, answer1: str, answer2: str, investment: float = 0.1, n_round: int = 3, n_advocates: int = 3) -> List[str]:
+def get_multi_debate_scores_20(question: str, answer1: str, answer2: str, investment: float = 0.1, n_round: int = 3, n_advocates: int = 3,
+                               simultaneous: bool = False, llm_config: Optional[Union[LLMConfig, dict]] = None,
+                               role_llm_configs: Optional[Dict[str, Union[LLMConfig, dict]]] = None,
+                               transcript_tokens: int = 0, share_transcript: bool = True) -> List[str]:
     loop = asyncio.get_event_loop()
-    return loop.run_until_complete(run_debate(question, answer1, answer2, investment, n_round, n_advocates))
+    return loop.run_until_complete(run_debate(question, answer1, answer2, investment, n_round, n_advocates, simultaneous,
+                                              llm_config, role_llm_configs, transcript_tokens, share_transcript))
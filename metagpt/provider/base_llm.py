@@ -9,6 +9,7 @@
 from __future__ import annotations
 
 import json
+import time
 from abc import ABC, abstractmethod
 from typing import Optional, Union
 
@@ -25,9 +26,16 @@ from tenacity import (
 from metagpt.configs.llm_config import LLMConfig
 from metagpt.const import LLM_API_TIMEOUT, USE_CONFIG_TIMEOUT
 from metagpt.logs import logger
+from metagpt.provider.llm_cache import LLMCacheMissError, LLMResponseCache
+from metagpt.provider.rate_limiter import (
+    LLMRateLimiter,
+    estimate_tokens,
+    is_rate_limit_error,
+)
 from metagpt.schema import Message
 from metagpt.utils.common import log_and_reraise
 from metagpt.utils.cost_manager import CostManager, Costs
+from metagpt.utils.token_counter import count_output_tokens
 
 
 class BaseLLM(ABC):
@@ -149,7 +157,7 @@ class BaseLLM(ABC):
         if stream is None:
             stream = self.config.stream
         logger.debug(message)
-        rsp = await self.acompletion_text(message, stream=stream, timeout=self.get_timeout(timeout))
+        rsp = await self.acompletion_text_with_cache(message, stream=stream, timeout=self.get_timeout(timeout))
         return rsp
 
     def _extract_assistant_rsp(self, context):
@@ -161,7 +169,7 @@ class BaseLLM(ABC):
         for msg in msgs:
             umsg = self._user_msg(msg)
             context.append(umsg)
-            rsp_text = await self.acompletion_text(context, timeout=self.get_timeout(timeout))
+            rsp_text = await self.acompletion_text_with_cache(context, timeout=self.get_timeout(timeout))
             context.append(self._assistant_msg(rsp_text))
         return self._extract_assistant_rsp(context)
 
@@ -203,6 +211,64 @@ class BaseLLM(ABC):
         resp = await self._achat_completion(messages, timeout=self.get_timeout(timeout))
         return self.get_choice_text(resp)
 
+    def get_response_cache(self) -> Optional[LLMResponseCache]:
+        """Return the response cache configured by `LLMConfig.cache`, or None if caching is disabled."""
+        if not self.config.cache.enabled:
+            return None
+        return LLMResponseCache.from_config(self.config.cache)
+
+    async def acompletion_text_with_cache(
+        self, messages: list[dict], stream: bool = False, timeout: int = USE_CONFIG_TIMEOUT
+    ) -> str:
+        """`acompletion_text` behind the response cache. Identical requests are answered from disk."""
+        cache = self.get_response_cache()
+        if not cache:
+            return await self.acompletion_text_with_limit(messages, stream=stream, timeout=timeout)
+
+        key = cache.make_key(self.config, messages)
+        rsp = cache.get(key)
+        if self.cost_manager:
+            self.cost_manager.update_cache_stats(hit=rsp is not None)
+        if rsp is not None:
+            logger.debug(f"LLM cache hit: {key}")
+            return rsp
+        if cache.read_only:
+            raise LLMCacheMissError(f"No cached response for {self.config.model} request {key} in {cache.path}")
+        rsp = await self.acompletion_text_with_limit(messages, stream=stream, timeout=timeout)
+        cache.set(key, rsp)
+        return rsp
+
+    async def acompletion_text_with_limit(
+        self, messages: list[dict], stream: bool = False, timeout: int = USE_CONFIG_TIMEOUT
+    ) -> str:
+        """`acompletion_text` paced by the rate limiter of `LLMConfig.rate_limit`, shared by the whole process.
+
+        Rate-limited requests are retried once the limiter grants a new slot.
+        """
+        limiter = LLMRateLimiter.from_config(self.config)
+        if not limiter:
+            return await self.acompletion_text(messages, stream=stream, timeout=timeout)
+
+        model = self.pricing_plan or self.config.model
+        tokens = estimate_tokens(messages, model) if limiter.tokens else 0
+        for attempt in range(self.config.rate_limit.max_retries + 1):
+            await limiter.acquire(tokens)
+            start = time.monotonic()
+            rate_limited, completion_tokens = False, 0
+            try:
+                rsp = await self.acompletion_text(messages, stream=stream, timeout=timeout)
+                completion_tokens = count_output_tokens(rsp, model) if limiter.tokens else 0
+                return rsp
+            except Exception as e:
+                rate_limited = is_rate_limit_error(e)
+                if not rate_limited or attempt == self.config.rate_limit.max_retries:
+                    raise
+            finally:
+                # also on cancellation, which is not an Exception, or the slot would be lost for good
+                limiter.release(
+                    time.monotonic() - start, rate_limited=rate_limited, completion_tokens=completion_tokens
+                )
+
     def get_choice_text(self, rsp: dict) -> str:
         """Required to provide the first text of choice"""
         return rsp.get("choices")[0]["message"]["content"]
@@ -0,0 +1,124 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+@File    : llm_cache.py
+@Desc    : Persistent SQLite cache of LLM responses keyed by provider, model, sampling params and messages.
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Optional
+
+from metagpt.configs.llm_config import LLMCacheConfig, LLMConfig
+from metagpt.logs import logger
+
+# LLMConfig fields that change the response for the same messages
+KEY_CONFIG_FIELDS = (
+    "api_type",
+    "base_url",
+    "model",
+    "max_token",
+    "temperature",
+    "top_p",
+    "top_k",
+    "repetition_penalty",
+    "stop",
+    "presence_penalty",
+    "frequency_penalty",
+    "n",
+)
+
+
+class LLMCacheMissError(Exception):
+    """Raised in read-only replay mode when a request was never recorded."""
+
+
+class LLMResponseCache:
+    """SQLite storage of LLM responses with TTL and LRU size eviction."""
+
+    _instances: dict[tuple, LLMResponseCache] = {}
+    _instances_lock = threading.Lock()
+
+    def __init__(self, path: str | Path, ttl: int = 0, max_entries: int = 0, read_only: bool = False):
+        self.path = Path(path)
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.read_only = read_only
+        self._lock = threading.Lock()
+        if read_only:
+            self._conn = sqlite3.connect(f"file:{self.path}?mode=ro", uri=True, check_same_thread=False)
+        else:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._conn = sqlite3.connect(str(self.path), check_same_thread=False)
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS responses ("
+                "key TEXT PRIMARY KEY, response TEXT NOT NULL, created REAL NOT NULL, accessed REAL NOT NULL)"
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_accessed ON responses(accessed)")
+            self._conn.commit()
+
+    @classmethod
+    def from_config(cls, config: LLMCacheConfig) -> LLMResponseCache:
+        """Return the cache instance shared by all LLMs with the same cache config."""
+        ident = (str(Path(config.path).expanduser()), config.ttl, config.max_entries, config.read_only)
+        with cls._instances_lock:
+            if ident not in cls._instances:
+                cls._instances[ident] = cls(*ident)
+            return cls._instances[ident]
+
+    @staticmethod
+    def make_key(llm_config: LLMConfig, messages: list[dict]) -> str:
+        params = llm_config.model_dump(include=set(KEY_CONFIG_FIELDS), mode="json")
+        payload = json.dumps({"params": params, "messages": messages}, sort_keys=True, ensure_ascii=False)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            row = self._conn.execute("SELECT response, created FROM responses WHERE key = ?", (key,)).fetchone()
+            if not row:
+                return None
+            rsp, created = row
+            now = time.time()
+            if self.ttl and now - created > self.ttl:
+                if not self.read_only:
+                    self._conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+                    self._conn.commit()
+                return None
+            if not self.read_only:
+                self._conn.execute("UPDATE responses SET accessed = ? WHERE key = ?", (now, key))
+                self._conn.commit()
+            return rsp
+
+    def set(self, key: str, rsp: str):
+        if self.read_only:
+            return
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses (key, response, created, accessed) VALUES (?, ?, ?, ?)",
+                (key, rsp, now, now),
+            )
+            if self.max_entries:
+                self._conn.execute(
+                    "DELETE FROM responses WHERE key IN "
+                    "(SELECT key FROM responses ORDER BY accessed DESC LIMIT -1 OFFSET ?)",
+                    (self.max_entries,),
+                )
+            self._conn.commit()
+
+    def count(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+
+    def clear(self):
+        if self.read_only:
+            logger.warning(f"Cache {self.path} is read-only, skip clearing")
+            return
+        with self._lock:
+            self._conn.execute("DELETE FROM responses")
+            self._conn.commit()
@@ -0,0 +1,136 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+@File    : rate_limiter.py
+@Desc    : Process-wide RPM/TPM token buckets and AIMD concurrency control, shared per (base_url, model).
+"""
+from __future__ import annotations
+
+import asyncio
+import threading
+import time
+from typing import Optional
+
+from openai import RateLimitError
+
+from metagpt.configs.llm_config import LLMConfig, LLMRateLimitConfig
+from metagpt.logs import logger
+from metagpt.utils.token_counter import count_input_tokens, count_output_tokens
+
+POLL_INTERVAL = 0.05  # seconds between checks for a free concurrency slot
+# Providers enforce per-minute quotas over shorter windows, so bursts are capped at this many seconds of quota
+BURST_WINDOW = 10
+
+
+class TokenBucket:
+    """Bucket refilled continuously at `per_minute` units per minute, holding at most `window` seconds of them."""
+
+    def __init__(self, per_minute: int, window: float = BURST_WINDOW):
+        self.rate = per_minute / 60.0
+        self.capacity = max(1.0, self.rate * window)
+        self.level = self.capacity
+        self._updated = time.monotonic()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.level = min(self.capacity, self.level + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def wait_time(self, amount: float) -> float:
+        """Seconds until `amount` units are available, 0 if they are now."""
+        self._refill()
+        amount = min(amount, self.capacity)  # a request larger than the quota would wait forever
+        return max(0.0, (amount - self.level) / self.rate)
+
+    def consume(self, amount: float):
+        """Take `amount` units; the level goes negative to charge usage known only afterwards."""
+        self._refill()
+        self.level -= amount
+
+
+def is_rate_limit_error(e: BaseException) -> bool:
+    return isinstance(e, RateLimitError) or getattr(e, "status_code", None) == 429
+
+
+def estimate_tokens(messages: list[dict], model: str) -> int:
+    try:
+        return count_input_tokens(messages, model)
+    except NotImplementedError:
+        return count_output_tokens("\n".join(str(m.get("content", "")) for m in messages), model)
+
+
+class LLMRateLimiter:
+    """RPM/TPM limiter with adaptive concurrency for one provider endpoint.
+
+    Requests wait for a request token, their estimated prompt tokens and an in-flight slot. The number of slots
+    follows AIMD: +1 per window of successful requests, halved on a rate-limit error, and shrunk by 10% on
+    responses slower than `target_latency`. State is guarded by a thread lock and waiters poll, so the limiter works
+    across event loops.
+    """
+
+    _instances: dict[tuple, LLMRateLimiter] = {}
+    _instances_lock = threading.Lock()
+
+    def __init__(self, config: LLMRateLimitConfig):
+        self.config = config
+        self.requests = TokenBucket(config.rpm) if config.rpm else None
+        self.tokens = TokenBucket(config.tpm) if config.tpm else None
+        self.concurrency = float(config.max_concurrency) if config.max_concurrency else 0.0
+        self.in_flight = 0
+        self.rate_limited = 0
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_config(cls, llm_config: LLMConfig) -> Optional[LLMRateLimiter]:
+        """Return the limiter shared by all LLMs of the same endpoint and model, None if no limit is set."""
+        if not llm_config.rate_limit.enabled:
+            return None
+        ident = (llm_config.base_url, llm_config.model)
+        with cls._instances_lock:
+            if ident not in cls._instances:
+                cls._instances[ident] = cls(llm_config.rate_limit)
+            return cls._instances[ident]
+
+    def _try_acquire(self, tokens: int) -> float:
+        """Take a slot and the quota of one request, or return how long to wait before trying again."""
+        with self._lock:
+            if self.concurrency and self.in_flight >= int(self.concurrency):
+                return POLL_INTERVAL
+            wait = max(
+                self.requests.wait_time(1) if self.requests else 0.0,
+                self.tokens.wait_time(tokens) if self.tokens else 0.0,
+            )
+            if wait > 0:
+                return wait
+            if self.requests:
+                self.requests.consume(1)
+            if self.tokens:
+                self.tokens.consume(tokens)
+            self.in_flight += 1
+            return 0.0
+
+    async def acquire(self, tokens: int = 0):
+        while True:
+            wait = self._try_acquire(tokens)
+            if not wait:
+                return
+            await asyncio.sleep(wait)
+
+    def release(self, latency: float = 0.0, rate_limited: bool = False, completion_tokens: int = 0):
+        """Free the slot of a finished request and adapt the concurrency to how it went."""
+        cfg = self.config
+        with self._lock:
+            self.in_flight -= 1
+            if self.tokens and completion_tokens:
+                self.tokens.consume(completion_tokens)
+            if rate_limited:
+                self.rate_limited += 1
+            if not self.concurrency:
+                return
+            if rate_limited:
+                self.concurrency = max(cfg.min_concurrency, self.concurrency / 2)
+                logger.warning(f"Rate limited, concurrency down to {int(self.concurrency)}")
+            elif cfg.target_latency and latency > cfg.target_latency:
+                self.concurrency = max(cfg.min_concurrency, self.concurrency * 0.9)
+            else:
+                self.concurrency = min(cfg.max_concurrency, self.concurrency + 1 / self.concurrency)
@@ -28,6 +28,7 @@ from llama_index.core.schema import (
     TransformComponent,
 )
 
+from metagpt.logs import logger
 from metagpt.rag.factories import (
     get_index,
     get_rag_embedding,
@@ -35,6 +36,7 @@ from metagpt.rag.factories import (
     get_rankers,
     get_retriever,
 )
+from metagpt.rag.ingestion import IngestionManifest, StreamingIngestion
 from metagpt.rag.interface import NoEmbedding, RAGObject
 from metagpt.rag.retrievers.base import ModifiableRAGRetriever, PersistableRAGRetriever
 from metagpt.rag.retrievers.hybrid_retriever import SimpleHybridRetriever
@@ -43,8 +45,10 @@ from metagpt.rag.schema import (
     BaseRankerConfig,
     BaseRetrieverConfig,
     BM25RetrieverConfig,
+    IngestionConfig,
     ObjectNode,
 )
+from metagpt.utils.async_helper import run_coroutine_in_new_loop
 from metagpt.utils.common import import_class
 
 
@@ -64,6 +68,7 @@ class SimpleEngine(RetrieverQueryEngine):
         node_postprocessors: Optional[list[BaseNodePostprocessor]] = None,
         callback_manager: Optional[CallbackManager] = None,
         transformations: Optional[list[TransformComponent]] = None,
+        embed_model: Optional[BaseEmbedding] = None,
     ) -> None:
         super().__init__(
             retriever=retriever,
@@ -72,6 +77,7 @@ class SimpleEngine(RetrieverQueryEngine):
             callback_manager=callback_manager,
         )
         self._transformations = transformations or self._default_transformations()
+        self._embed_model = embed_model
 
     @classmethod
     def from_docs(
@@ -83,6 +89,7 @@ class SimpleEngine(RetrieverQueryEngine):
         llm: LLM = None,
         retriever_configs: list[BaseRetrieverConfig] = None,
         ranker_configs: list[BaseRankerConfig] = None,
+        ingestion_config: Optional[IngestionConfig] = None,
     ) -> "SimpleEngine":
         """From docs.
 
@@ -96,10 +103,27 @@ class SimpleEngine(RetrieverQueryEngine):
             llm: Must supported by llama index. Default OpenAI.
             retriever_configs: Configuration for retrievers. If more than one config, will use SimpleHybridRetriever.
             ranker_configs: Configuration for rankers.
+            ingestion_config: Stream the docs into the engine in batches with this config, see `aadd_docs`.
+                Its manifest is started over, as the new engine holds no node of the files it recorded.
         """
         if not input_dir and not input_files:
             raise ValueError("Must provide either `input_dir` or `input_files`.")
 
+        if ingestion_config:
+            input_files = SimpleDirectoryReader(input_dir=input_dir, input_files=input_files).input_files
+            engine = cls._from_nodes(
+                nodes=[],
+                transformations=transformations,
+                embed_model=embed_model,
+                llm=llm,
+                retriever_configs=retriever_configs,
+                ranker_configs=ranker_configs,
+            )
+            # The new engine holds none of the nodes of a previous run, so no file can be skipped as unchanged
+            IngestionManifest(ingestion_config.manifest_path).clear()
+            engine.add_docs(input_files, ingestion_config=ingestion_config)
+            return engine
+
         documents = SimpleDirectoryReader(input_dir=input_dir, input_files=input_files).load_data()
         cls._fix_document_metadata(documents)
 
@@ -184,16 +208,41 @@ class SimpleEngine(RetrieverQueryEngine):
         self._try_reconstruct_obj(nodes)
         return nodes
 
-    def add_docs(self, input_files: list[str]):
-        """Add docs to retriever. retriever must has add_nodes func."""
+    def add_docs(self, input_files: list[str], ingestion_config: Optional[IngestionConfig] = None):
+        """Add docs to retriever. retriever must has add_nodes func.
+
+        With `ingestion_config`, the docs are streamed in batches, see `aadd_docs`.
+        """
         self._ensure_retriever_modifiable()
 
+        if ingestion_config:
+            run_coroutine_in_new_loop(self.aadd_docs(input_files, ingestion_config))
+            return
+
         documents = SimpleDirectoryReader(input_files=input_files).load_data()
         self._fix_document_metadata(documents)
 
         nodes = run_transformations(documents, transformations=self._transformations)
         self._save_nodes(nodes)
 
+    async def aadd_docs(self, input_files: list[str], ingestion_config: Optional[IngestionConfig] = None) -> int:
+        """Stream docs into the retriever, return the number of nodes added.
+
+        Files are read and split in a process pool, embedded in concurrent batched requests and added to the
+        retriever batch by batch, see `StreamingIngestion`. With `ingestion_config.manifest_path`, files unchanged
+        since the last run are skipped and the nodes of changed ones are replaced, where the retrievers support it.
+        """
+        self._ensure_retriever_modifiable()
+
+        ingestion = StreamingIngestion(
+            transformations=self._transformations,
+            save_nodes=self._save_nodes,
+            embed_model=self._embed_model,
+            delete_nodes=self._delete_nodes,
+            config=ingestion_config,
+        )
+        return await ingestion.arun(input_files)
+
     def add_objs(self, objs: list[RAGObject]):
         """Adds objects to the retriever, storing each object's original form in metadata for future reference."""
         self._ensure_retriever_modifiable()
@@ -228,6 +277,7 @@ class SimpleEngine(RetrieverQueryEngine):
             node_postprocessors=rankers,
             response_synthesizer=get_response_synthesizer(llm=llm),
             transformations=transformations,
+            embed_model=embed_model,
         )
 
     @classmethod
@@ -273,6 +323,16 @@ class SimpleEngine(RetrieverQueryEngine):
     def _save_nodes(self, nodes: list[BaseNode]):
         self.retriever.add_nodes(nodes)
 
+    def _delete_nodes(self, node_ids: list[str]):
+        retrievers = (
+            self.retriever.retrievers if isinstance(self.retriever, SimpleHybridRetriever) else [self.retriever]
+        )
+        for retriever in retrievers:
+            if hasattr(retriever, "delete_nodes"):
+                retriever.delete_nodes(node_ids)
+            else:
+                logger.warning(f"{type(retriever).__name__} can't delete nodes, it keeps those of the changed files")
+
     def _persist(self, persist_dir: str, **kwargs):
         self.retriever.persist(persist_dir, **kwargs)
 
@@ -27,6 +27,7 @@ from metagpt.rag.schema import (
     ElasticsearchKeywordRetrieverConfig,
     ElasticsearchRetrieverConfig,
     FAISSRetrieverConfig,
+    HybridRetrieverConfig,
 )
 
 
@@ -62,13 +63,17 @@ class RetrieverFactory(ConfigBasedFactory):
     def get_retriever(self, configs: list[BaseRetrieverConfig] = None, **kwargs) -> RAGRetriever:
         """Creates and returns a retriever instance based on the provided configurations.
 
-        If multiple retrievers, using SimpleHybridRetriever.
+        If multiple retrievers, or a HybridRetrieverConfig among the configs, using SimpleHybridRetriever.
         """
+        hybrid_configs = [config for config in configs or [] if isinstance(config, HybridRetrieverConfig)]
+        configs = [config for config in configs or [] if not isinstance(config, HybridRetrieverConfig)]
         if not configs:
             return self._create_default(**kwargs)
 
         retrievers = super().get_instances(configs, **kwargs)
 
+        if hybrid_configs:
+            return SimpleHybridRetriever(*retrievers, **hybrid_configs[-1].model_dump())
         return SimpleHybridRetriever(*retrievers) if len(retrievers) > 1 else retrievers[0]
 
     def _create_default(self, **kwargs) -> RAGRetriever:
@@ -0,0 +1,162 @@
+"""Streaming ingestion of docs."""
+
+import asyncio
+import hashlib
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Callable, Optional, Union
+
+from llama_index.core import SimpleDirectoryReader
+from llama_index.core.embeddings import BaseEmbedding
+from llama_index.core.ingestion.pipeline import run_transformations
+from llama_index.core.schema import BaseNode, MetadataMode, TransformComponent
+
+from metagpt.logs import logger
+from metagpt.rag.schema import IngestionConfig
+
+
+def file_hash(path: Union[str, Path]) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def load_and_split(input_files: list[str], transformations: list[TransformComponent]) -> list[BaseNode]:
+    """Read and split files, in a worker process"""
+    documents = SimpleDirectoryReader(input_files=input_files).load_data()
+    for doc in documents:
+        doc.excluded_embed_metadata_keys.append("file_path")  # as SimpleEngine._fix_document_metadata
+    return run_transformations(documents, transformations=transformations)
+
+
+class IngestionManifest:
+    """Content hash and node ids of each ingested file, by absolute path, saved as JSON."""
+
+    def __init__(self, path: Optional[Union[str, Path]] = None):
+        self.path = Path(path) if path else None
+        self.files: dict[str, dict] = {}
+        if self.path and self.path.exists():
+            self.files = json.loads(self.path.read_text(encoding="utf-8"))
+
+    @staticmethod
+    def key(file: Union[str, Path]) -> str:
+        return str(Path(file).resolve())
+
+    def is_unchanged(self, file: Union[str, Path], content_hash: str) -> bool:
+        return self.files.get(self.key(file), {}).get("hash") == content_hash
+
+    def node_ids(self, file: Union[str, Path]) -> list[str]:
+        return self.files.get(self.key(file), {}).get("node_ids", [])
+
+    def record(self, file: Union[str, Path], content_hash: str, node_ids: list[str]):
+        self.files[self.key(file)] = {"hash": content_hash, "node_ids": node_ids}
+
+    def clear(self):
+        """Forget all the files, e.g. when the nodes they recorded are in no index anymore"""
+        self.files = {}
+        self.save()
+
+    def save(self):
+        if not self.path:
+            return
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_suffix(self.path.suffix + ".tmp")
+        tmp_path.write_text(json.dumps(self.files, ensure_ascii=False), encoding="utf-8")
+        os.replace(tmp_path, self.path)
+
+
+class StreamingIngestion:
+    """Read, split, embed and save docs in bounded batches.
+
+    Files are read and split `files_per_task` at a time in a process pool. The nodes of a task are embedded
+    `embed_batch_size` at a time, with up to `max_concurrent_embeds` requests in flight across tasks, and each batch is
+    handed to `save_nodes` as soon as it is embedded. At most two tasks per worker are in progress, so memory is
+    bounded by the batch sizes rather than the corpus.
+
+    With a `manifest_path`, files whose content hash is unchanged since the last run are skipped, and the nodes of
+    changed ones are first removed with `delete_nodes`.
+    """
+
+    def __init__(
+        self,
+        transformations: list[TransformComponent],
+        save_nodes: Callable[[list[BaseNode]], None],
+        embed_model: Optional[BaseEmbedding] = None,
+        delete_nodes: Optional[Callable[[list[str]], None]] = None,
+        config: Optional[IngestionConfig] = None,
+    ):
+        self.transformations = transformations
+        self.save_nodes = save_nodes
+        self.embed_model = embed_model
+        self.delete_nodes = delete_nodes
+        self.config = config or IngestionConfig()
+
+    async def arun(self, input_files: list[Union[str, Path]]) -> int:
+        """Ingest the files, return the number of nodes saved"""
+        manifest = IngestionManifest(self.config.manifest_path)
+        hashes = {str(file): file_hash(file) for file in input_files}
+        files = [file for file, content_hash in hashes.items() if not manifest.is_unchanged(file, content_hash)]
+        if len(files) < len(hashes):
+            logger.info(f"Skip {len(hashes) - len(files)} unchanged files of {len(hashes)}")
+
+        stale_node_ids = [node_id for file in files for node_id in manifest.node_ids(file)]
+        if stale_node_ids and self.delete_nodes:
+            self.delete_nodes(stale_node_ids)
+
+        size = self.config.files_per_task
+        tasks = [files[i : i + size] for i in range(0, len(files), size)]
+        num_workers = self.config.num_workers
+        executor = ProcessPoolExecutor(num_workers) if num_workers > 1 and len(tasks) > 1 else None
+        in_progress = asyncio.Semaphore(2 * max(num_workers, 1))
+        embed_slots = asyncio.Semaphore(self.config.max_concurrent_embeds)
+        try:
+            counts = await asyncio.gather(
+                *[self._ingest(task, hashes, manifest, executor, in_progress, embed_slots) for task in tasks]
+            )
+        finally:
+            manifest.save()
+            if executor:
+                executor.shutdown(cancel_futures=True)
+        return sum(counts)
+
+    async def _ingest(
+        self,
+        files: list[str],
+        hashes: dict[str, str],
+        manifest: IngestionManifest,
+        executor: Optional[ProcessPoolExecutor],
+        in_progress: asyncio.Semaphore,
+        embed_slots: asyncio.Semaphore,
+    ) -> int:
+        async with in_progress:
+            if executor:
+                loop = asyncio.get_running_loop()
+                nodes = await loop.run_in_executor(executor, load_and_split, files, self.transformations)
+            else:
+                nodes = await asyncio.to_thread(load_and_split, files, self.transformations)
+
+            size = self.config.embed_batch_size
+            batches = [nodes[i : i + size] for i in range(0, len(nodes), size)]
+            await asyncio.gather(*[self._embed_and_save(batch, embed_slots) for batch in batches])
+
+        node_ids = {manifest.key(file): [] for file in files}
+        for node in nodes:
+            file_path = node.metadata.get("file_path")
+            if file_path and manifest.key(file_path) in node_ids:
+                node_ids[manifest.key(file_path)].append(node.node_id)
+        for file in files:
+            manifest.record(file, hashes[file], node_ids[manifest.key(file)])
+        return len(nodes)
+
+    async def _embed_and_save(self, nodes: list[BaseNode], embed_slots: asyncio.Semaphore):
+        if self.embed_model:
+            texts = [node.get_content(metadata_mode=MetadataMode.EMBED) for node in nodes]
+            async with embed_slots:
+                embeddings = await self.embed_model.aget_text_embedding_batch(texts)
+            for node, embedding in zip(nodes, embeddings):
+                node.embedding = embedding
+        self.save_nodes(nodes)
@@ -0,0 +1,255 @@
+"""Incremental sparse BM25 index."""
+
+import json
+from array import array
+from collections import Counter
+from pathlib import Path
+from typing import Iterable, Optional, Union
+
+import numpy as np
+
+INDEX_META_FILE = "bm25_index.json"
+INDEX_ARRAYS = ("term_ptr", "post_docs", "post_tfs", "doc_ptr", "doc_terms", "doc_len")
+MIN_DELTA_POSTINGS = 4096  # postings kept in the delta before merging them into the base segment
+
+
+def _grow(values: np.ndarray, size: int) -> np.ndarray:
+    """Return `values` with room for at least `size` items, doubling its capacity"""
+    if size <= len(values):
+        return values
+    grown = np.zeros(max(size, 2 * len(values), 16), dtype=values.dtype)
+    grown[: len(values)] = values
+    return grown
+
+
+class SparseBM25Index:
+    """BM25 Okapi index updated in place, scoring the same as `rank_bm25.BM25Okapi`.
+
+    Postings are kept in two parts: a base segment in CSR form (per term, the documents holding it and the term
+    frequencies) and a delta of per-term append-only arrays for the documents added since the last merge. Adding a
+    document only touches the delta and the document frequencies, the delta is merged into the base once it outgrows
+    it, so ingesting is amortized linear. Deleted documents are masked out and dropped at the next merge. A query
+    scores with numpy over the postings of its terms only.
+
+    `persist` writes the merged base as .npy files next to a JSON of the vocabulary and node ids, and `load`
+    memory-maps them back.
+    """
+
+    def __init__(self, k1: float = 1.5, b: float = 0.75, epsilon: float = 0.25):
+        self.k1 = k1
+        self.b = b
+        self.epsilon = epsilon
+
+        self.vocab: dict[str, int] = {}
+        self.node_ids: list[str] = []  # doc id -> node id, deleted docs included until the next merge
+        self.corpus_size = 0  # live docs
+        self._doc_ids: dict[str, int] = {}  # node id -> live doc id
+        self._total_len = 0
+        self._df = np.zeros(0, dtype=np.int64)
+        self._doc_len = np.zeros(0, dtype=np.float64)
+        self._alive = np.zeros(0, dtype=bool)
+
+        # base segment, postings of term t are post_docs[term_ptr[t]:term_ptr[t + 1]], terms of doc d likewise
+        self._term_ptr = np.zeros(1, dtype=np.int64)
+        self._post_docs = np.zeros(0, dtype=np.int32)
+        self._post_tfs = np.zeros(0, dtype=np.int32)
+        self._doc_ptr = np.zeros(1, dtype=np.int64)
+        self._doc_terms = np.zeros(0, dtype=np.int32)
+
+        # delta: term id -> (doc ids, term frequencies), and the terms of the docs after the base ones
+        self._delta: dict[int, tuple[array, array]] = {}
+        self._delta_doc_terms: list[np.ndarray] = []
+        self._delta_postings = 0
+
+        self._idf: Optional[np.ndarray] = None  # cached until the next change
+
+    def __len__(self) -> int:
+        return self.corpus_size
+
+    @property
+    def _n_docs(self) -> int:
+        return len(self.node_ids)
+
+    @property
+    def _n_base_docs(self) -> int:
+        return len(self._doc_ptr) - 1
+
+    def add(self, node_id: str, tokens: list[str]):
+        """Index a document, replacing the one of the same node id"""
+        if node_id in self._doc_ids:
+            self.delete([node_id])
+        doc = self._n_docs
+        frequencies = Counter(tokens)
+        terms = np.fromiter((self._term_id(term) for term in frequencies), dtype=np.int32, count=len(frequencies))
+        for term, tf in zip(terms.tolist(), frequencies.values()):
+            docs, tfs = self._delta.setdefault(term, (array("i"), array("i")))
+            docs.append(doc)
+            tfs.append(tf)
+        self._df[terms] += 1
+        self._delta_doc_terms.append(terms)
+        self._delta_postings += len(terms)
+
+        self._doc_len = _grow(self._doc_len, doc + 1)
+        self._doc_len[doc] = len(tokens)
+        self._alive = _grow(self._alive, doc + 1)
+        self._alive[doc] = True
+        self.node_ids.append(node_id)
+        self._doc_ids[node_id] = doc
+        self._total_len += len(tokens)
+        self.corpus_size += 1
+        self._idf = None
+
+    def add_batch(self, documents: Iterable[tuple[str, list[str]]]):
+        for node_id, tokens in documents:
+            self.add(node_id, tokens)
+        if self._delta_postings > max(len(self._post_docs), MIN_DELTA_POSTINGS):
+            self.merge()
+
+    def delete(self, node_ids: Iterable[str]):
+        """Remove the documents of the node ids, unknown ids are ignored"""
+        for node_id in node_ids:
+            doc = self._doc_ids.pop(node_id, None)
+            if doc is None:
+                continue
+            self._df[self._terms_of(doc)] -= 1
+            self._alive[doc] = False
+            self._total_len -= int(self._doc_len[doc])
+            self.corpus_size -= 1
+            self._idf = None
+        if self.corpus_size < (self._n_docs - self.corpus_size):
+            self.merge()
+
+    def _term_id(self, term: str) -> int:
+        term_id = self.vocab.get(term)
+        if term_id is None:
+            term_id = self.vocab[term] = len(self.vocab)
+            self._df = _grow(self._df, term_id + 1)
+        return term_id
+
+    def _terms_of(self, doc: int) -> np.ndarray:
+        if doc < self._n_base_docs:
+            return self._doc_terms[self._doc_ptr[doc] : self._doc_ptr[doc + 1]]
+        return self._delta_doc_terms[doc - self._n_base_docs]
+
+    def _postings(self, term: int) -> tuple[np.ndarray, np.ndarray]:
+        docs = (
+            [self._post_docs[self._term_ptr[term] : self._term_ptr[term + 1]]] if term < len(self._term_ptr) - 1 else []
+        )
+        tfs = [self._post_tfs[self._term_ptr[term] : self._term_ptr[term + 1]]] if docs else []
+        if term in self._delta:
+            delta_docs, delta_tfs = self._delta[term]
+            docs.append(np.frombuffer(delta_docs, dtype=np.int32))
+            tfs.append(np.frombuffer(delta_tfs, dtype=np.int32))
+        if not docs:
+            return np.zeros(0, dtype=np.int32), np.zeros(0, dtype=np.int32)
+        return np.concatenate(docs), np.concatenate(tfs)
+
+    def merge(self):
+        """Merge the delta into the base segment, dropping the deleted documents and renumbering the others"""
+        base_terms = np.repeat(np.arange(len(self._term_ptr) - 1, dtype=np.int32), np.diff(self._term_ptr))
+        delta_terms = [np.full(len(docs), term, dtype=np.int32) for term, (docs, _) in self._delta.items()]
+        terms = np.concatenate([base_terms, *delta_terms])
+        docs = np.concatenate([self._post_docs, *[np.frombuffer(d, dtype=np.int32) for d, _ in self._delta.values()]])
+        tfs = np.concatenate([self._post_tfs, *[np.frombuffer(t, dtype=np.int32) for _, t in self._delta.values()]])
+
+        alive = self._alive[: self._n_docs]
+        keep = alive[docs]
+        terms, docs, tfs = terms[keep], docs[keep], tfs[keep]
+        new_ids = (np.cumsum(alive) - 1).astype(np.int32)
+        docs = new_ids[docs]
+
+        n_terms, n_docs = len(self.vocab), int(alive.sum())
+        by_term = np.lexsort((docs, terms))
+        self._term_ptr = np.concatenate([[0], np.cumsum(np.bincount(terms, minlength=n_terms))]).astype(np.int64)
+        self._post_docs, self._post_tfs = docs[by_term], tfs[by_term]
+        by_doc = np.lexsort((terms, docs))
+        self._doc_ptr = np.concatenate([[0], np.cumsum(np.bincount(docs, minlength=n_docs))]).astype(np.int64)
+        self._doc_terms = terms[by_doc]
+
+        self._doc_len = self._doc_len[: self._n_docs][alive].copy()
+        self._alive = np.ones(n_docs, dtype=bool)
+        self.node_ids = [node_id for node_id, live in zip(self.node_ids, alive.tolist()) if live]
+        self._doc_ids = {node_id: doc for doc, node_id in enumerate(self.node_ids)}
+        self._delta, self._delta_doc_terms, self._delta_postings = {}, [], 0
+
+    def idf(self) -> np.ndarray:
+        """IDF of every term, negative ones floored to epsilon times the average, as BM25Okapi does"""
+        if self._idf is None:
+            df = self._df[: len(self.vocab)]
+            idf = np.log(self.corpus_size - df + 0.5) - np.log(df + 0.5)
+            present = df > 0
+            average_idf = idf[present].mean() if present.any() else 0.0
+            idf[idf < 0] = self.epsilon * average_idf
+            self._idf = idf
+        return self._idf
+
+    def get_scores(self, tokens: list[str]) -> np.ndarray:
+        """BM25 scores of every doc id, deleted docs included"""
+        scores = np.zeros(self._n_docs)
+        if not self.corpus_size:
+            return scores
+        idf = self.idf()
+        avgdl = self._total_len / self.corpus_size
+        doc_len = self._doc_len[: self._n_docs]
+        for term, count in Counter(tokens).items():
+            term_id = self.vocab.get(term)
+            if term_id is None or not self._df[term_id]:
+                continue
+            docs, tfs = self._postings(term_id)
+            norm = self.k1 * (1 - self.b + self.b * doc_len[docs] / avgdl)
+            scores[docs] += count * idf[term_id] * (tfs * (self.k1 + 1) / (tfs + norm))
+        return scores
+
+    def top_k(self, tokens: list[str], k: int) -> list[tuple[str, float]]:
+        """(node id, score) of the `k` best live docs, ties in insertion order"""
+        scores = self.get_scores(tokens)
+        live = np.flatnonzero(self._alive[: self._n_docs])
+        best = live[np.argsort(-scores[live], kind="stable")[:k]]
+        return [(self.node_ids[doc], float(scores[doc])) for doc in best]
+
+    def persist(self, persist_dir: Union[str, Path]):
+        self.merge()
+        persist_dir = Path(persist_dir)
+        persist_dir.mkdir(parents=True, exist_ok=True)
+        arrays = {
+            "term_ptr": self._term_ptr,
+            "post_docs": self._post_docs,
+            "post_tfs": self._post_tfs,
+            "doc_ptr": self._doc_ptr,
+            "doc_terms": self._doc_terms,
+            "doc_len": self._doc_len[: self._n_docs],
+        }
+        for name, values in arrays.items():
+            np.save(persist_dir / f"bm25_{name}.npy", values)
+        meta = {
+            "k1": self.k1,
+            "b": self.b,
+            "epsilon": self.epsilon,
+            "vocab": list(self.vocab),
+            "node_ids": self.node_ids,
+        }
+        (persist_dir / INDEX_META_FILE).write_text(json.dumps(meta, ensure_ascii=False), encoding="utf-8")
+
+    @classmethod
+    def exists(cls, persist_dir: Union[str, Path]) -> bool:
+        return Path(persist_dir).joinpath(INDEX_META_FILE).exists()
+
+    @classmethod
+    def load(cls, persist_dir: Union[str, Path]) -> "SparseBM25Index":
+        """Load an index saved by `persist`, its postings memory-mapped"""
+        persist_dir = Path(persist_dir)
+        meta = json.loads((persist_dir / INDEX_META_FILE).read_text(encoding="utf-8"))
+        index = cls(k1=meta["k1"], b=meta["b"], epsilon=meta["epsilon"])
+        arrays = {name: np.load(persist_dir / f"bm25_{name}.npy", mmap_mode="r") for name in INDEX_ARRAYS}
+
+        index.vocab = {term: term_id for term_id, term in enumerate(meta["vocab"])}
+        index.node_ids = meta["node_ids"]
+        index._doc_ids = {node_id: doc for doc, node_id in enumerate(index.node_ids)}
+        index.corpus_size = len(index.node_ids)
+        index._term_ptr, index._post_docs, index._post_tfs = arrays["term_ptr"], arrays["post_docs"], arrays["post_tfs"]
+        index._doc_ptr, index._doc_terms = arrays["doc_ptr"], arrays["doc_terms"]
+        index._doc_len = np.array(arrays["doc_len"], dtype=np.float64)
+        index._total_len = int(index._doc_len.sum())
+        index._alive = np.ones(index.corpus_size, dtype=bool)
+        index._df = np.diff(arrays["term_ptr"]).astype(np.int64)
+        return index
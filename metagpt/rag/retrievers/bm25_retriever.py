@@ -1,16 +1,26 @@
 """BM25 retriever."""
-from typing import Callable, Optional
+from pathlib import Path
+from typing import Callable, Optional, Union
 
 from llama_index.core import VectorStoreIndex
+from llama_index.core.base.base_retriever import BaseRetriever
 from llama_index.core.callbacks.base import CallbackManager
 from llama_index.core.constants import DEFAULT_SIMILARITY_TOP_K
-from llama_index.core.schema import BaseNode, IndexNode
+from llama_index.core.schema import BaseNode, IndexNode, NodeWithScore, QueryBundle
 from llama_index.retrievers.bm25 import BM25Retriever
-from rank_bm25 import BM25Okapi
+from llama_index.retrievers.bm25.base import tokenize_remove_stopwords
+
+from metagpt.logs import logger
+from metagpt.rag.retrievers.bm25_index import SparseBM25Index
 
 
 class DynamicBM25Retriever(BM25Retriever):
-    """BM25 retriever."""
+    """BM25 retriever.
+
+    Scores like BM25Retriever, over a `SparseBM25Index` updated in place when nodes are added or deleted instead of
+    rebuilt from the whole corpus. Given the `persist_path` of a previous `persist`, the index is memory-mapped from it
+    rather than tokenizing the nodes again.
+    """
 
     def __init__(
         self,
@@ -22,28 +32,77 @@ class DynamicBM25Retriever(BM25Retriever):
         object_map: Optional[dict] = None,
         verbose: bool = False,
         index: VectorStoreIndex = None,
+        persist_path: Optional[Union[str, Path]] = None,
     ) -> None:
-        super().__init__(
-            nodes=nodes,
-            tokenizer=tokenizer,
-            similarity_top_k=similarity_top_k,
+        # BM25Retriever.__init__ builds a BM25Okapi of the whole corpus, skip it
+        BaseRetriever.__init__(
+            self,
             callback_manager=callback_manager,
             object_map=object_map,
             objects=objects,
             verbose=verbose,
         )
+        self._tokenizer = tokenizer or tokenize_remove_stopwords
+        self._similarity_top_k = similarity_top_k
+        self._nodes: list[BaseNode] = []
+        self._node_map: dict[str, BaseNode] = {}
         self._index = index
 
+        self.bm25 = self._load_bm25(persist_path, nodes)
+        if self.bm25 is not None:
+            self._add_to_nodes(nodes)
+        else:
+            self.bm25 = SparseBM25Index()
+            self._add_nodes(nodes)
+
     def add_nodes(self, nodes: list[BaseNode], **kwargs) -> None:
         """Support add nodes."""
-        self._nodes.extend(nodes)
-        self._corpus = [self._tokenizer(node.get_content()) for node in self._nodes]
-        self.bm25 = BM25Okapi(self._corpus)
+        self._add_nodes(nodes)
 
         if self._index:
             self._index.insert_nodes(nodes, **kwargs)
 
+    def delete_nodes(self, node_ids: list[str], **kwargs) -> None:
+        """Support delete nodes."""
+        node_ids = [node_id for node_id in node_ids if node_id in self._node_map]
+        self.bm25.delete(node_ids)
+        for node_id in node_ids:
+            del self._node_map[node_id]
+        self._nodes = list(self._node_map.values())
+
+        if self._index:
+            self._index.delete_nodes(node_ids, **kwargs)
+
     def persist(self, persist_dir: str, **kwargs) -> None:
         """Support persist."""
         if self._index:
             self._index.storage_context.persist(persist_dir)
+        self.bm25.persist(persist_dir)
+
+    def _retrieve(self, query_bundle: QueryBundle) -> list[NodeWithScore]:
+        if query_bundle.custom_embedding_strs or query_bundle.embedding:
+            logger.warning("BM25Retriever does not support embeddings, skipping...")
+
+        scored = self.bm25.top_k(self._tokenizer(query_bundle.query_str), self._similarity_top_k)
+        return [NodeWithScore(node=self._node_map[node_id], score=score) for node_id, score in scored]
+
+    def _add_nodes(self, nodes: list[BaseNode]):
+        self._add_to_nodes(nodes)
+        self.bm25.add_batch((node.node_id, self._tokenizer(node.get_content())) for node in nodes)
+
+    def _add_to_nodes(self, nodes: list[BaseNode]):
+        for node in nodes:
+            self._node_map[node.node_id] = node
+        self._nodes = list(self._node_map.values())
+
+    @staticmethod
+    def _load_bm25(persist_path: Optional[Union[str, Path]], nodes: list[BaseNode]) -> Optional[SparseBM25Index]:
+        """The persisted index, if it indexes exactly `nodes`"""
+        if not persist_path or not SparseBM25Index.exists(persist_path):
+            return None
+
+        bm25 = SparseBM25Index.load(persist_path)
+        if set(bm25.node_ids) != {node.node_id for node in nodes}:
+            logger.warning(f"Rebuild the BM25 index, the one in {persist_path} doesn't match the nodes")
+            return None
+        return bm25
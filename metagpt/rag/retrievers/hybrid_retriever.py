@@ -1,41 +1,111 @@
 """Hybrid retriever."""
 
-import copy
+import asyncio
+import dataclasses
+from typing import Optional
 
-from llama_index.core.schema import BaseNode, QueryType
+from llama_index.core.retrievers import BaseRetriever
+from llama_index.core.schema import BaseNode, NodeWithScore, QueryBundle, QueryType
+from llama_index.core.vector_stores.types import BasePydanticVectorStore, VectorStore
 
+from metagpt.logs import logger
 from metagpt.rag.retrievers.base import RAGRetriever
+from metagpt.rag.schema import FusionMode
 
 
 class SimpleHybridRetriever(RAGRetriever):
-    """A composite retriever that aggregates search results from multiple retrievers."""
+    """A composite retriever that aggregates search results from multiple retrievers.
+
+    The retrievers are queried concurrently, those whose async retrieval would block the event loop (e.g. BM25, FAISS,
+    Chroma) in a thread, and their results are merged according to `fusion_mode`.
+    """
+
+    def __init__(
+        self,
+        *retrievers,
+        fusion_mode: FusionMode = FusionMode.FIRST_SEEN,
+        weights: Optional[list[float]] = None,
+        rrf_k: int = 60,
+        timeout: Optional[float] = None,
+        similarity_top_k: Optional[int] = None,
+    ):
+        if weights is not None and len(weights) != len(retrievers):
+            raise ValueError(f"Got {len(weights)} weights for {len(retrievers)} retrievers.")
 
-    def __init__(self, *retrievers):
         self.retrievers: list[RAGRetriever] = retrievers
+        self.fusion_mode = FusionMode(fusion_mode)
+        self.weights = weights or [1.0] * len(retrievers)
+        self.rrf_k = rrf_k
+        self.timeout = timeout
+        self.similarity_top_k = similarity_top_k
         super().__init__()
 
     async def _aretrieve(self, query: QueryType, **kwargs):
-        """Asynchronously retrieves and aggregates search results from all configured retrievers.
+        """Asynchronously retrieves and fuses search results from all configured retrievers.
 
-        This method queries each retriever in the `retrievers` list with the given query and
-        additional keyword arguments. It then combines the results, ensuring that each node is
-        unique, based on the node's ID.
+        Each retriever gets its own copy of the query, so that one can't change what another sees. A retriever
+        exceeding `timeout` is logged and contributes no results.
         """
-        all_nodes = []
-        for retriever in self.retrievers:
-            # Prevent retriever changing query
-            query_copy = copy.deepcopy(query)
-            nodes = await retriever.aretrieve(query_copy, **kwargs)
-            all_nodes.extend(nodes)
-
-        # combine all nodes
-        result = []
-        node_ids = set()
-        for n in all_nodes:
-            if n.node.node_id not in node_ids:
-                result.append(n)
-                node_ids.add(n.node.node_id)
-        return result
+        query = QueryBundle(query) if isinstance(query, str) else query
+        results = await asyncio.gather(
+            *[self._retrieve_one(retriever, dataclasses.replace(query), **kwargs) for retriever in self.retrievers]
+        )
+
+        fused = self._fuse(results)
+        return fused[: self.similarity_top_k] if self.similarity_top_k is not None else fused
+
+    async def _retrieve_one(self, retriever: RAGRetriever, query: QueryBundle, **kwargs) -> list[NodeWithScore]:
+        if self._blocks_event_loop(retriever):
+            coro = asyncio.to_thread(retriever.retrieve, query, **kwargs)
+        else:
+            coro = retriever.aretrieve(query, **kwargs)
+
+        try:
+            return await asyncio.wait_for(coro, self.timeout)
+        except asyncio.TimeoutError:
+            logger.warning(f"{type(retriever).__name__} timed out after {self.timeout}s, its results are skipped")
+            return []
+
+    @staticmethod
+    def _blocks_event_loop(retriever: RAGRetriever) -> bool:
+        """Whether the async retrieval of `retriever` just runs its sync one"""
+        if getattr(type(retriever), "_aretrieve", None) is BaseRetriever._aretrieve:
+            return True
+        vector_store = getattr(retriever, "_vector_store", None)
+        aquery = getattr(type(vector_store), "aquery", None)
+        return aquery is not None and aquery in (VectorStore.aquery, BasePydanticVectorStore.aquery)
+
+    def _fuse(self, results: list[list[NodeWithScore]]) -> list[NodeWithScore]:
+        if self.fusion_mode == FusionMode.FIRST_SEEN:
+            first_seen = {}
+            for n in (n for nodes in results for n in nodes):
+                first_seen.setdefault(n.node.node_id, n)
+            return list(first_seen.values())
+
+        nodes, scores = {}, {}
+        for retriever_nodes, weight in zip(results, self.weights):
+            for node_id, score in self._retriever_scores(retriever_nodes).items():
+                scores[node_id] = scores.get(node_id, 0.0) + weight * score
+            for n in retriever_nodes:
+                nodes.setdefault(n.node.node_id, n.node)
+
+        ranked = sorted(scores, key=scores.get, reverse=True)
+        return [NodeWithScore(node=nodes[node_id], score=scores[node_id]) for node_id in ranked]
+
+    def _retriever_scores(self, nodes: list[NodeWithScore]) -> dict[str, float]:
+        """Unweighted fusion score of each node of one retriever, its best one if the node is returned twice"""
+        scores = {}
+        if self.fusion_mode == FusionMode.RECIPROCAL_RANK:
+            for rank, n in enumerate(nodes, start=1):
+                scores.setdefault(n.node.node_id, 1.0 / (self.rrf_k + rank))
+            return scores
+
+        raw = [n.score or 0.0 for n in nodes]
+        low, high = min(raw, default=0.0), max(raw, default=0.0)
+        for n, score in zip(nodes, raw):
+            normalized = (score - low) / (high - low) if high > low else 1.0
+            scores[n.node.node_id] = max(scores.get(n.node.node_id, 0.0), normalized)
+        return scores
 
     def add_nodes(self, nodes: list[BaseNode]) -> None:
         """Support add nodes."""
@@ -1,5 +1,6 @@
 """RAG schemas."""
 
+from enum import Enum
 from pathlib import Path
 from typing import Any, ClassVar, Literal, Optional, Union
 
@@ -59,6 +60,10 @@ class FAISSRetrieverConfig(IndexRetrieverConfig):
 class BM25RetrieverConfig(IndexRetrieverConfig):
     """Config for BM25-based retrievers."""
 
+    persist_path: Optional[Union[str, Path]] = Field(
+        default=None, description="The directory of a persisted BM25 index, loaded instead of indexing the nodes again."
+    )
+
     _no_embedding: bool = PrivateAttr(default=True)
 
 
@@ -101,6 +106,33 @@ class ElasticsearchKeywordRetrieverConfig(ElasticsearchRetrieverConfig):
     )
 
 
+class FusionMode(str, Enum):
+    """How SimpleHybridRetriever merges the results of its retrievers."""
+
+    FIRST_SEEN = "first_seen"  # every node once, in the order the retrievers returned them
+    RECIPROCAL_RANK = "reciprocal_rank"  # sum of weight / (rrf_k + rank) over the retrievers
+    RELATIVE_SCORE = "relative_score"  # sum of the weighted scores, min-max normalized per retriever
+
+
+class HybridRetrieverConfig(BaseRetrieverConfig):
+    """Config for combining the other retrievers, not a retriever itself.
+
+    Put it in the retriever configs alongside the retrievers to combine.
+    """
+
+    similarity_top_k: Optional[int] = Field(default=None, description="Number of fused results to return, all if None.")
+    fusion_mode: FusionMode = Field(default=FusionMode.FIRST_SEEN, description="How to merge the results.")
+    weights: Optional[list[float]] = Field(
+        default=None, description="Weight of each retriever, in the order of the configs. Default all 1.0."
+    )
+    rrf_k: int = Field(default=60, description="Rank offset of reciprocal rank fusion.")
+    timeout: Optional[float] = Field(
+        default=None, description="Seconds to wait for each retriever, the results of slower ones are skipped."
+    )
+
+    _no_embedding: bool = PrivateAttr(default=True)  # embeddings are up to the retrievers combined
+
+
 class BaseRankerConfig(BaseModel):
     """Common config for rankers.
 
@@ -189,6 +221,20 @@ class ElasticsearchKeywordIndexConfig(ElasticsearchIndexConfig):
     _no_embedding: bool = PrivateAttr(default=True)
 
 
+class IngestionConfig(BaseModel):
+    """Config for streaming docs into an engine in bounded batches, instead of loading them all at once."""
+
+    num_workers: int = Field(
+        default=4, description="Processes reading and splitting files, 1 or less to do it in a thread instead."
+    )
+    files_per_task: int = Field(default=8, description="Number of files read and split by a worker at a time.")
+    embed_batch_size: int = Field(default=64, description="Number of nodes per embedding request and index insert.")
+    max_concurrent_embeds: int = Field(default=4, description="Maximum embedding requests in flight.")
+    manifest_path: Optional[Union[str, Path]] = Field(
+        default=None, description="JSON file of the content hash of the ingested files, unchanged ones are skipped."
+    )
+
+
 class ObjectNodeMetadata(BaseModel):
     """Metadata of ObjectNode."""
 
@@ -120,16 +120,22 @@ class Team(BaseModel):
         return self.run_project(idea=idea, send_to=send_to)
 
     @serialize_decorator
-    async def run(self, n_round=3, idea="", send_to="", auto_archive=True):
-        """Run company until target round or no money"""
+    async def run(self, n_round=3, idea="", send_to="", auto_archive=True, event_driven=False):
+        """Run company until target round or no money.
+
+        With `event_driven`, roles are run only when messages are delivered to them and the team stops as soon as
+        no role has pending work, running each role at most `n_round` times on average.
+        """
         if idea:
             self.run_project(idea=idea, send_to=send_to)
+        if event_driven:
+            await self.env.run_until_idle(max_runs=n_round * len(self.env.roles), before_run=self._check_balance)
+        else:
+            while n_round > 0:
+                n_round -= 1
+                self._check_balance()
+                await self.env.run()
 
-        while n_round > 0:
-            n_round -= 1
-            self._check_balance()
-            await self.env.run()
-
-            logger.debug(f"max {n_round=} left.")
+                logger.debug(f"max {n_round=} left.")
         self.env.archive(auto_archive)
         return self.env.history
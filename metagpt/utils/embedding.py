@@ -5,15 +5,17 @@
 @Author  : alexanderwu
 @File    : embedding.py
 """
+from llama_index.core.embeddings import BaseEmbedding
 from llama_index.embeddings.openai import OpenAIEmbedding
 
 from metagpt.config2 import config
+from metagpt.utils.embedding_cache import cache_embedding
 
 
-def get_embedding() -> OpenAIEmbedding:
+def get_embedding() -> BaseEmbedding:
     llm = config.get_openai_llm()
     if llm is None:
         raise ValueError("To use OpenAIEmbedding, please ensure that config.llm.api_type is correctly set to 'openai'.")
 
     embedding = OpenAIEmbedding(api_key=llm.api_key, api_base=llm.base_url)
-    return embedding
+    return cache_embedding(embedding)
@@ -0,0 +1,259 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+@File    : embedding_cache.py
+@Desc    : Persistent content-hash cache of embeddings, and a llama-index embedding model answering from it.
+"""
+import asyncio
+import hashlib
+import sqlite3
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Iterable, Optional, Union
+
+import numpy as np
+from llama_index.core.base.embeddings.base import BaseEmbedding, Embedding
+from llama_index.core.bridge.pydantic import Field, PrivateAttr
+
+from metagpt.config2 import config
+from metagpt.const import CONFIG_ROOT
+
+EMBEDDING_CACHE_PATH = CONFIG_ROOT / "embedding_cache.sqlite"
+# Fields of the llama-index embedding models changing the vectors returned for the same model name
+NAMESPACE_FIELDS = ("dimensions", "api_base", "base_url", "azure_endpoint", "azure_deployment", "task_type")
+
+
+class EmbeddingCache:
+    """SQLite storage of float32 embeddings keyed by the hash of model name and text"""
+
+    def __init__(self, path: Union[str, Path]):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False)
+        self._conn.execute("CREATE TABLE IF NOT EXISTS embeddings (key TEXT PRIMARY KEY, vector BLOB NOT NULL)")
+        self._conn.commit()
+
+    def get(self, key: str) -> Optional[np.ndarray]:
+        with self._lock:
+            row = self._conn.execute("SELECT vector FROM embeddings WHERE key = ?", (key,)).fetchone()
+        return np.frombuffer(row[0], dtype=np.float32) if row else None
+
+    def put_many(self, items: Iterable[tuple[str, np.ndarray]]):
+        rows = [(key, np.asarray(vector, dtype=np.float32).tobytes()) for key, vector in items]
+        with self._lock:
+            self._conn.executemany("INSERT OR REPLACE INTO embeddings (key, vector) VALUES (?, ?)", rows)
+            self._conn.commit()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+
+    def close(self):
+        self._conn.close()
+
+
+_caches: dict[Path, EmbeddingCache] = {}
+
+
+def get_embedding_cache(path: Union[str, Path] = EMBEDDING_CACHE_PATH) -> EmbeddingCache:
+    """The cache of `path`, one connection per file in the process"""
+    path = Path(path).expanduser().resolve()
+    if path not in _caches:
+        _caches[path] = EmbeddingCache(path)
+    return _caches[path]
+
+
+class CachedEmbedding(BaseEmbedding):
+    """Embedding model wrapping another one, remembering every embedding it returns.
+
+    Embeddings are looked up by the hash of the wrapped model and the text, in an in-process LRU and then in an
+    optional persistent `EmbeddingCache`; only the texts found in neither are sent to the wrapped model, once each
+    even if requested concurrently. Concurrent `aget_text_embedding` calls are coalesced into batched requests of
+    up to `embed_batch_size` texts, sent at the latest `max_wait` seconds after the first one.
+    """
+
+    max_wait: float = Field(default=0.01, description="Seconds a single text waits for others to batch with.")
+    memo_size: int = Field(default=4096, description="Number of embeddings kept in the in-process LRU.")
+
+    _embed_model: BaseEmbedding = PrivateAttr()
+    _cache: Optional[EmbeddingCache] = PrivateAttr()
+    _namespace: str = PrivateAttr()
+    _memo: OrderedDict = PrivateAttr()
+    _pending: dict = PrivateAttr()  # key -> future of the embedding requested
+    _queue: dict = PrivateAttr()  # key -> text, waiting for the next coalesced request
+    _flush_task: Optional[asyncio.Task] = PrivateAttr(default=None)
+    _tasks: set = PrivateAttr()
+    _api_calls: int = PrivateAttr(default=0)
+
+    def __init__(self, embed_model: BaseEmbedding, cache: Optional[EmbeddingCache] = None, **kwargs: Any):
+        super().__init__(model_name=f"cached-{embed_model.model_name}", **kwargs)
+        self._embed_model = embed_model
+        self._cache = cache
+        self._namespace = self.namespace(embed_model)
+        self._memo = OrderedDict()
+        self._pending = {}
+        self._queue = {}
+        self._tasks = set()
+
+    @classmethod
+    def class_name(cls) -> str:
+        return "CachedEmbedding"
+
+    @staticmethod
+    def namespace(embed_model: BaseEmbedding) -> str:
+        """What the cached embeddings of `embed_model` depend on: its class, model, endpoint and dimensions"""
+        fields = [
+            f"{name}={getattr(embed_model, name)}" for name in NAMESPACE_FIELDS if getattr(embed_model, name, None)
+        ]
+        return ":".join([type(embed_model).__name__, embed_model.model_name, *fields])
+
+    @property
+    def embed_model(self) -> BaseEmbedding:
+        return self._embed_model
+
+    @property
+    def api_calls(self) -> int:
+        """Number of requests sent to the wrapped model"""
+        return self._api_calls
+
+    def _key(self, kind: str, text: str) -> str:
+        return hashlib.sha256(f"{self._namespace}\n{kind}\n{text}".encode("utf-8")).hexdigest()
+
+    def _lookup(self, key: str) -> Optional[np.ndarray]:
+        vector = self._memo.get(key)
+        if vector is not None:
+            self._memo.move_to_end(key)
+            return vector
+        vector = self._cache.get(key) if self._cache is not None else None
+        if vector is not None:
+            self._remember(key, vector)
+        return vector
+
+    def _remember(self, key: str, vector: np.ndarray):
+        self._memo[key] = vector
+        self._memo.move_to_end(key)
+        while len(self._memo) > self.memo_size:
+            self._memo.popitem(last=False)
+
+    def _store(self, keys: list[str], embeddings: list[Embedding]) -> list[np.ndarray]:
+        self._api_calls += 1
+        vectors = [np.asarray(embedding, dtype=np.float32) for embedding in embeddings]
+        for key, vector in zip(keys, vectors):
+            self._remember(key, vector)
+        if self._cache is not None:
+            self._cache.put_many(zip(keys, vectors))
+        return vectors
+
+    def _get_query_embedding(self, query: str) -> Embedding:
+        key = self._key("query", query)
+        vector = self._lookup(key)
+        if vector is None:
+            (vector,) = self._store([key], [self._embed_model.get_query_embedding(query)])
+        return vector.tolist()
+
+    async def _aget_query_embedding(self, query: str) -> Embedding:
+        key = self._key("query", query)
+        vector = self._lookup(key)
+        if vector is None:
+            (vector,) = self._store([key], [await self._embed_model.aget_query_embedding(query)])
+        return vector.tolist()
+
+    def _get_text_embedding(self, text: str) -> Embedding:
+        return self._get_text_embeddings([text])[0]
+
+    def _get_text_embeddings(self, texts: list[str]) -> list[Embedding]:
+        found = {text: self._lookup(self._key("text", text)) for text in texts}
+        missing = [text for text, vector in found.items() if vector is None]
+        if missing:
+            embeddings = self._embed_model.get_text_embedding_batch(missing)
+            found.update(zip(missing, self._store([self._key("text", text) for text in missing], embeddings)))
+        return [found[text].tolist() for text in texts]
+
+    def get_text_embedding_batch(self, texts: list[str], show_progress: bool = False, **kwargs: Any) -> list[Embedding]:
+        """Embed the texts, the wrapped model batching the ones not cached"""
+        return self._get_text_embeddings(texts)
+
+    async def _aget_text_embedding(self, text: str) -> Embedding:
+        key = self._key("text", text)
+        vector = self._lookup(key)
+        if vector is not None:
+            return vector.tolist()
+
+        future = self._pending.get(key)
+        if future is None:
+            future = self._request_later(key, text)
+        return (await asyncio.shield(future)).tolist()
+
+    async def _aget_text_embeddings(self, texts: list[str]) -> list[Embedding]:
+        found = {text: self._lookup(self._key("text", text)) for text in texts}
+        futures, missing = {}, {}
+        for text in (text for text, vector in found.items() if vector is None):
+            key = self._key("text", text)
+            futures[text] = self._pending.get(key)
+            if futures[text] is None:
+                futures[text] = self._pending[key] = asyncio.get_running_loop().create_future()
+                missing[key] = text
+        await self._request(missing)
+        for text, future in futures.items():
+            found[text] = await asyncio.shield(future)
+        return [found[text].tolist() for text in texts]
+
+    async def aget_text_embedding_batch(
+        self, texts: list[str], show_progress: bool = False, **kwargs: Any
+    ) -> list[Embedding]:
+        """Embed the texts, the wrapped model batching the ones neither cached nor already requested"""
+        return await self._aget_text_embeddings(texts)
+
+    def _request_later(self, key: str, text: str) -> asyncio.Future:
+        """Queue the text for the next coalesced request"""
+        future = self._pending[key] = asyncio.get_running_loop().create_future()
+        self._queue[key] = text
+        if len(self._queue) >= self.embed_batch_size:
+            if self._flush_task is not None:
+                self._flush_task.cancel()
+                self._flush_task = None
+            self._spawn(self._request(self._take_queue()))
+        elif self._flush_task is None:
+            self._flush_task = self._spawn(self._flush_later())
+        return future
+
+    def _spawn(self, coro) -> asyncio.Task:
+        task = asyncio.create_task(coro)
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return task
+
+    def _take_queue(self) -> dict[str, str]:
+        queue, self._queue = self._queue, {}
+        return queue
+
+    async def _flush_later(self):
+        await asyncio.sleep(self.max_wait)
+        self._flush_task = None
+        await self._request(self._take_queue())
+
+    async def _request(self, texts: dict[str, str]):
+        """Embed the texts by key in one call of the wrapped model and resolve their pending futures"""
+        if not texts:
+            return
+        futures = [self._pending.pop(key) for key in texts]
+        try:
+            vectors = self._store(list(texts), await self._embed_model.aget_text_embedding_batch(list(texts.values())))
+        except Exception as exp:
+            for future in futures:
+                if not future.done():
+                    future.set_exception(exp)
+            return
+        for future, vector in zip(futures, vectors):
+            if not future.done():
+                future.set_result(vector)
+
+
+def cache_embedding(embed_model: BaseEmbedding) -> BaseEmbedding:
+    """`embed_model` behind a `CachedEmbedding` sharing the persistent cache, unless disabled by `embedding.cache`"""
+    if not config.embedding.cache or isinstance(embed_model, CachedEmbedding):
+        return embed_model
+    cache = get_embedding_cache(config.embedding.cache_path or EMBEDDING_CACHE_PATH)
+    return CachedEmbedding(embed_model, cache=cache)
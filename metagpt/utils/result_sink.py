@@ -0,0 +1,154 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+@File    : result_sink.py
+@Desc    : Append-only JSONL/Parquet sinks streaming sweep results to disk as soon as each one completes.
+"""
+import json
+import os
+import time
+from abc import ABC, abstractmethod
+from pathlib import Path
+from typing import Iterator, Union
+
+from pydantic import BaseModel
+
+from metagpt.logs import logger
+
+
+class ResultSink(ABC):
+    """Append-only store of result records, identified by their `key` field, that survives crashes.
+
+    Usage:
+        with open_result_sink("sweep.jsonl") as sink:
+            done = sink.keys()
+            sink.write(outcome)
+    """
+
+    def __init__(self, path: Union[str, Path], key: str = "index"):
+        self.path = Path(path)
+        self.key = key
+
+    @abstractmethod
+    def read(self) -> Iterator[dict]:
+        """Iterate over the records already stored."""
+
+    def keys(self) -> set:
+        return {r[self.key] for r in self.read()}
+
+    @abstractmethod
+    def write(self, record: Union[BaseModel, dict]):
+        """Append a record."""
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self.flush()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class JsonlResultSink(ResultSink):
+    """One JSON record per line, flushed after every write. A line torn by a crash is skipped on reading."""
+
+    def __init__(self, path: Union[str, Path], key: str = "index"):
+        super().__init__(path, key)
+        self._file = None
+
+    def read(self) -> Iterator[dict]:
+        if not self.path.exists():
+            return
+        with open(self.path, "r", encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    yield json.loads(line)
+                except ValueError:
+                    logger.warning(f"Skip malformed result line: {line[:100]}")
+
+    def write(self, record: Union[BaseModel, dict]):
+        if self._file is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._file = open(self.path, "a", encoding="utf-8")
+        line = record.model_dump_json() if isinstance(record, BaseModel) else json.dumps(record, ensure_ascii=False)
+        self._file.write(line + "\n")
+        self._file.flush()
+
+    def close(self):
+        if self._file:
+            self._file.close()
+            self._file = None
+
+
+class ParquetResultSink(ResultSink):
+    """A directory of Parquet part files, one per `flush_every` records, each written atomically.
+
+    A crash loses at most the buffered records, never a written part. Nested values (lists, dicts) are stored as
+    JSON strings so every part shares a flat schema. Requires `pyarrow`.
+    """
+
+    JSON_FIELDS_KEY = b"json_fields"
+
+    def __init__(self, path: Union[str, Path], key: str = "index", flush_every: int = 20):
+        super().__init__(path, key)
+        self.flush_every = flush_every
+        self._buffer: list[dict] = []
+
+    def _parts(self) -> list[Path]:
+        return sorted(self.path.glob("part-*.parquet")) if self.path.is_dir() else []
+
+    def read(self) -> Iterator[dict]:
+        import pyarrow.parquet as pq
+
+        for part in self._parts():
+            table = pq.read_table(part)
+            json_fields = json.loads((table.schema.metadata or {}).get(self.JSON_FIELDS_KEY, b"[]"))
+            for row in table.to_pylist():
+                for name in json_fields:
+                    if row.get(name) is not None:
+                        row[name] = json.loads(row[name])
+                yield row
+
+    def keys(self) -> set:
+        import pyarrow.parquet as pq
+
+        return {k for part in self._parts() for k in pq.read_table(part, columns=[self.key]).column(0).to_pylist()}
+
+    def write(self, record: Union[BaseModel, dict]):
+        self._buffer.append(record.model_dump() if isinstance(record, BaseModel) else dict(record))
+        if len(self._buffer) >= self.flush_every:
+            self.flush()
+
+    def flush(self):
+        if not self._buffer:
+            return
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        json_fields = sorted({k for r in self._buffer for k, v in r.items() if isinstance(v, (list, tuple, dict))})
+        rows = [
+            {k: json.dumps(v, ensure_ascii=False) if k in json_fields else v for k, v in r.items()}
+            for r in self._buffer
+        ]
+        table = pa.Table.from_pylist(rows).replace_schema_metadata({self.JSON_FIELDS_KEY: json.dumps(json_fields)})
+
+        self.path.mkdir(parents=True, exist_ok=True)
+        name = f"part-{time.time_ns()}-{os.getpid()}.parquet"
+        tmp = self.path / f".{name}.tmp"
+        pq.write_table(table, tmp)
+        tmp.replace(self.path / name)
+        self._buffer = []
+
+
+def open_result_sink(path: Union[str, Path], key: str = "index", **kwargs) -> ResultSink:
+    """Open a `ParquetResultSink` for `*.parquet` paths, a `JsonlResultSink` otherwise."""
+    if Path(path).suffix == ".parquet":
+        return ParquetResultSink(path, key=key, **kwargs)
+    return JsonlResultSink(path, key=key)
@@ -0,0 +1,61 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+@File    : round_scheduler.py
+@Desc    : Dependency-aware scheduler for the LLM calls of one debate round.
+"""
+
+import asyncio
+from typing import Any, Awaitable, Callable, Iterable
+
+
+class RoundScheduler:
+    """Run interdependent async steps, starting each one as soon as all of its dependencies have finished.
+
+    Steps without a path between them run concurrently. A step function receives the results of its
+    dependencies as positional arguments, in the order the dependencies were declared.
+
+    Example:
+        scheduler = RoundScheduler()
+        scheduler.add("defense", make_defense)
+        scheduler.add("judge", judge, deps=["defense"])
+        scheduler.add("score", score, deps=["defense"])  # runs together with "judge"
+        results = await scheduler.run()
+    """
+
+    def __init__(self):
+        self._steps: dict[str, tuple[Callable[..., Awaitable[Any]], tuple[str, ...]]] = {}
+
+    def add(self, name: str, func: Callable[..., Awaitable[Any]], deps: Iterable[str] = ()) -> "RoundScheduler":
+        """Register a step. Dependencies must be registered first, which keeps the graph acyclic."""
+        if name in self._steps:
+            raise ValueError(f"Step {name} already exists")
+        deps = tuple(deps)
+        unknown = [d for d in deps if d not in self._steps]
+        if unknown:
+            raise ValueError(f"Step {name} depends on unknown steps {unknown}")
+        self._steps[name] = (func, deps)
+        return self
+
+    async def run(self) -> dict[str, Any]:
+        """Run all steps and return their results keyed by step name.
+
+        If a step fails, the unfinished steps are cancelled and the exception is raised.
+        """
+        tasks: dict[str, asyncio.Task] = {}
+
+        async def _run_step(name: str):
+            func, deps = self._steps[name]
+            args = [await tasks[d] for d in deps]
+            return await func(*args)
+
+        for name in self._steps:
+            tasks[name] = asyncio.create_task(_run_step(name))
+        try:
+            await asyncio.gather(*tasks.values())
+        except BaseException:
+            for task in tasks.values():
+                task.cancel()
+            await asyncio.gather(*tasks.values(), return_exceptions=True)
+            raise
+        return {name: task.result() for name, task in tasks.items()}
@@ -0,0 +1,159 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+@File    : score_parser.py
+@Desc    : Extract the final (score1, score2) tally from debate scorer output, re-asking the LLM only when needed.
+"""
+import re
+from typing import Optional
+
+from pydantic import BaseModel
+
+from metagpt.logs import logger
+from metagpt.provider.base_llm import BaseLLM
+from metagpt.utils.custom_decoder import CustomDecoder
+from metagpt.utils.repair_llm_raw_output import repair_json_format
+
+Scores = tuple[float, float]
+
+_NUMBER = r"(\d+(?:\.\d+)?)"
+# "(95, 87)", the first one in the text is the tally as the former `eval` parsing read it. Bracketed pairs are not
+# accepted, the scorer prompts use them for the per-criterion scores.
+SCORE_PAIR_PATTERN = re.compile(rf"\(\s*{_NUMBER}\s*,\s*{_NUMBER}\s*\)")
+# "Final Scores: 95 and 87", "final score tuple: (95, 87)", preferred to any other pair when present
+FINAL_SCORES_PATTERN = re.compile(rf"final[^\d\n]*{_NUMBER}[^\d\n]+?{_NUMBER}", re.IGNORECASE)
+JSON_OBJECT_PATTERN = re.compile(r"\{[^{}]*\}", re.DOTALL)
+
+SCORE_FUNCTION_SCHEMA = {
+    "name": "report_scores",
+    "description": "Report the final score of each answer of the debate",
+    "parameters": {
+        "type": "object",
+        "properties": {
+            "score1": {"type": "number", "description": "The final score of answer 1"},
+            "score2": {"type": "number", "description": "The final score of answer 2"},
+        },
+        "required": ["score1", "score2"],
+    },
+}
+SCORE_TOOL_CHOICE = {"type": "function", "function": {"name": "report_scores"}}
+
+REASK_PROMPT = """The following evaluation of a debate should end with the final score tuple (score1, score2), but it could not be read.
+## Evaluation
+{output}
+
+Reply with the final score tuple only, for example: (95, 87)"""
+
+
+class ScoreParseStats(BaseModel):
+    """Counters of how the scores of each round were obtained."""
+
+    parsed: int = 0  # read directly by the regex
+    repaired: int = 0  # read after repairing a JSON payload
+    reasked: int = 0  # read from a short follow-up request
+    failed: int = 0  # no scores, caller falls back to a default
+
+
+def _to_number(value: str) -> float:
+    number = float(value)
+    return int(number) if number.is_integer() else number
+
+
+def _scores_from_json(data) -> Optional[Scores]:
+    if isinstance(data, dict):
+        keys = [("score1", "score2"), ("answer1", "answer2"), ("Answer1_score", "Answer2_score")]
+        for k1, k2 in keys:
+            if k1 in data and k2 in data:
+                return _to_number(str(data[k1])), _to_number(str(data[k2]))
+    elif isinstance(data, list) and len(data) == 2:
+        return _to_number(str(data[0])), _to_number(str(data[1]))
+    return None
+
+
+def extract_scores(text: str) -> Optional[Scores]:
+    """Return the last pair announced as final in `text`, else its first `(a, b)` pair, or None."""
+    if not text:
+        return None
+    matches = FINAL_SCORES_PATTERN.findall(text)
+    if matches:
+        return tuple(_to_number(v) for v in matches[-1])
+    match = SCORE_PAIR_PATTERN.search(text)
+    if match:
+        return tuple(_to_number(v) for v in match.groups())
+    return None
+
+
+def repair_scores(text: str) -> Optional[Scores]:
+    """Read scores from a (possibly broken) JSON payload such as `{"score1": 95, "score2": 87}]`."""
+    for candidate in [text.strip()] + JSON_OBJECT_PATTERN.findall(text):
+        try:
+            data = CustomDecoder(strict=False).decode(repair_json_format(candidate))
+        except (ValueError, IndexError):
+            continue
+        scores = _scores_from_json(data)
+        if scores:
+            return scores
+    return None
+
+
+def format_scores(scores: Scores) -> str:
+    return f"({scores[0]}, {scores[1]})"
+
+
+def supports_function_calling(llm: BaseLLM) -> bool:
+    return type(llm).aask_code is not BaseLLM.aask_code
+
+
+class ScoreParser:
+    """Score-parsing pipeline: regex, then JSON repair, then one targeted re-ask of the LLM.
+
+    The re-ask uses function calling through `aask_code` when the provider implements it, otherwise a short
+    plain prompt. Outcomes are counted in `stats`.
+    """
+
+    def __init__(self):
+        self.stats = ScoreParseStats()
+
+    def parse(self, text: str) -> Optional[Scores]:
+        """Parse without any LLM call."""
+        scores = extract_scores(text)
+        if scores:
+            self.stats.parsed += 1
+            return scores
+        scores = repair_scores(text)
+        if scores:
+            self.stats.repaired += 1
+        return scores
+
+    async def aparse(self, text: str, llm: Optional[BaseLLM] = None) -> Optional[Scores]:
+        """Parse `text`, re-asking `llm` for the scores alone if they cannot be read."""
+        scores = self.parse(text)
+        if scores or not llm:
+            if not scores:
+                self.stats.failed += 1
+            return scores
+
+        scores = await self._reask(text, llm)
+        if scores:
+            self.stats.reasked += 1
+        else:
+            self.stats.failed += 1
+            logger.warning(f"Unparseable scores after re-ask: {text[-200:]}")
+        return scores
+
+    async def _reask(self, text: str, llm: BaseLLM) -> Optional[Scores]:
+        prompt = REASK_PROMPT.format(output=text[-2000:])
+        if supports_function_calling(llm):
+            try:
+                rsp = await llm.aask_code(
+                    [{"role": "user", "content": prompt}],
+                    tools=[{"type": "function", "function": SCORE_FUNCTION_SCHEMA}],
+                    tool_choice=SCORE_TOOL_CHOICE,
+                )
+                scores = _scores_from_json(rsp)
+                if scores:
+                    return scores
+            except Exception as e:  # also provider errors, e.g. an OpenAI-compatible endpoint without tools
+                logger.warning(f"Score function call failed, fall back to a plain re-ask: {e}")
+        rsp = await llm.aask(prompt, stream=False)
+        return extract_scores(rsp) or repair_scores(rsp)
@@ -28,6 +28,7 @@ extras_require = {
     "search-google": ["google-api-python-client==2.94.0"],
     "search-ddg": ["duckduckgo-search~=4.1.1"],
     "ocr": ["paddlepaddle==2.4.2", "paddleocr~=2.7.3", "tabulate==0.9.0"],
+    "parquet": ["pyarrow"],
     "rag": [
         "llama-index-core==0.10.15",
         "llama-index-embeddings-azure-openai==0.1.6",
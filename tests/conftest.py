@@ -18,6 +18,7 @@ from typing import Callable
 import aiohttp.web
 import pytest
 
+from metagpt.config2 import config
 from metagpt.const import DEFAULT_WORKSPACE_ROOT, TEST_DATA_PATH
 from metagpt.context import Context as MetagptContext
 from metagpt.llm import LLM
@@ -164,7 +165,9 @@ def context(request):
 
 @pytest.fixture(scope="session", autouse=True)
 def init_config():
-    pass
+    # Tests mock the embedding models, a persistent embedding cache enabled in the local config would carry their
+    # vectors from run to run.
+    config.embedding.cache = False
 
 
 @pytest.fixture(scope="function")
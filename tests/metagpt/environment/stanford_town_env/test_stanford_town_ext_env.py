@@ -10,7 +10,10 @@ from metagpt.environment.stanford_town.env_space import (
     EnvObsParams,
     EnvObsType,
 )
+from metagpt.environment.stanford_town.maze_cache import CompiledMaze
+from metagpt.environment.stanford_town.path_finder import GridPathFinder
 from metagpt.environment.stanford_town.stanford_town_ext_env import StanfordTownExtEnv
+from metagpt.ext.stanford_town.utils.utils import path_finder
 
 maze_asset_path = (
     Path(__file__)
@@ -62,3 +65,91 @@ def test_stanford_town_ext_env_observe_step():
     event = ("double studio:double studio:bedroom 2:bed", None, None, None)
     obs, _, _, _, _ = ext_env.step(action=EnvAction(action_type=EnvActionType.ADD_TILE_EVENT, coord=tile, event=event))
     assert len(ext_env.tiles[tile[1]][tile[0]]["events"]) == 1
+
+
+def test_grid_path_finder():
+    maze = [
+        ["0", "0", "0", "0"],
+        ["0", "1", "1", "0"],
+        ["0", "0", "1", "0"],
+        ["1", "1", "1", "1"],
+    ]
+    finder = GridPathFinder(maze)
+    path = finder.find_path((1, 2), (3, 2))
+    assert path[0] == (1, 2) and path[-1] == (3, 2)
+    assert len(path) == 9 == finder.distance((1, 2), (3, 2)) + 1
+    assert finder.find_path((2, 0), (2, 0)) == [(2, 0)]
+    assert finder.find_path((0, 0), (0, 3)) == [(0, 3)]  # blocked destination
+    assert finder.distance((1, 1), (0, 0)) == 2  # step off a blocked tile
+
+    misses = finder.distance_field.cache_info().misses
+    finder.find_path((0, 0), (3, 2))
+    assert finder.distance_field.cache_info().misses == misses
+
+
+def test_stanford_town_find_path():
+    ext_env = StanfordTownExtEnv(maze_asset_path=maze_asset_path)
+    start, end = (16, 18), (72, 19)  # a spawn location and Hobbs Cafe
+    path = ext_env.find_path(start, end)
+    assert path[0] == start and path[-1] == end and len(path) == 92
+    for (x1, y1), (x2, y2) in zip(path, path[1:]):
+        assert abs(x1 - x2) + abs(y1 - y2) == 1
+        assert not ext_env.access_tile((x2, y2))["collision"]
+    assert path_finder(ext_env.collision_maze, start, end, "32125") == path
+
+
+def test_stanford_town_nearby_events():
+    ext_env = StanfordTownExtEnv(maze_asset_path=maze_asset_path)
+
+    def brute_force(tile, vision_r):
+        return [
+            (nbr, ext_env.access_tile(nbr)["events"])
+            for nbr in ext_env.get_nearby_tiles(tile, vision_r)
+            if ext_env.access_tile(nbr)["events"]
+        ]
+
+    for tile, vision_r in [((58, 9), 4), ((0, 0), 8), ((72, 19), 12), ((139, 99), 3)]:
+        assert ext_env.get_nearby_events(tile, vision_r) == brute_force(tile, vision_r)
+
+    event = ("Isabella Rodriguez", "is", "idle", "idle")
+    ext_env.add_event_from_tile(event, (72, 19))
+    ext_env.step(EnvAction(action_type=EnvActionType.ADD_TILE_EVENT, coord=(73, 19), event=event))
+    assert ext_env.get_subject_tiles("Isabella Rodriguez") == [(72, 19), (73, 19)]
+    obs = ext_env.observe(EnvObsParams(obs_type=EnvObsType.TILE_EVENTS, coord=(72, 19), vision_radius=2))
+    assert event in dict(obs)[(73, 19)]
+    assert obs == brute_force((72, 19), 2)
+
+    ext_env.step(EnvAction(action_type=EnvActionType.RM_TITLE_SUB_EVENT, coord=(73, 19), subject=event[0]))
+    assert ext_env.get_subject_tiles("Isabella Rodriguez") == [(72, 19)]
+    ext_env.remove_subject_events("Isabella Rodriguez")
+    assert ext_env.get_subject_tiles("Isabella Rodriguez") == []
+    assert ext_env.get_nearby_events((72, 19), 2) == brute_force((72, 19), 2)
+
+
+def test_stanford_town_event_index_first_use():
+    ext_env = StanfordTownExtEnv(maze_asset_path=maze_asset_path)  # the event index is not built yet
+    event = ("Isabella Rodriguez", "is", "idle", "idle")
+
+    ext_env.add_event_from_tile(event, (58, 9))
+    ext_env.remove_event_from_tile(event, (58, 9))
+
+    assert event not in ext_env.access_tile((58, 9))["events"]
+    assert ext_env.get_subject_tiles("Isabella Rodriguez") == []
+
+
+def test_compiled_maze(tmp_path):
+    compiled = CompiledMaze.compile(maze_asset_path)
+    compiled.save(tmp_path / "the_ville.maze")
+    loaded = CompiledMaze.load(tmp_path / "the_ville.maze")
+    assert loaded.build_tiles() == compiled.build_tiles()
+    assert loaded.collision_maze() == compiled.collision_maze()
+    assert loaded.address_tiles() == compiled.address_tiles()
+    assert len(loaded.address_tiles()) == 306
+
+    CompiledMaze._loaded.clear()
+    ext_env = StanfordTownExtEnv(maze_asset_path=maze_asset_path, maze_cache_dir=tmp_path)
+    assert len(list(tmp_path.glob("*.maze"))) == 2
+    assert ext_env.tiles == compiled.build_tiles()
+    assert ext_env.tiles is not StanfordTownExtEnv(maze_asset_path=maze_asset_path, maze_cache_dir=tmp_path).tiles
+    ext_env.add_event_from_tile(("Isabella Rodriguez", "is", "idle", "idle"), (58, 9))
+    assert len(StanfordTownExtEnv(maze_asset_path=maze_asset_path).access_tile((58, 9))["events"]) == 0
@@ -66,7 +66,8 @@ class TestAgentMemory:
         result2 = agent_memory.get_last_chat("customers")
         logger.info(f"上一次对话是{result2}")
 
-    def test_retrieve_function(self, agent_memory):
+    @pytest.mark.asyncio
+    async def test_retrieve_function(self, agent_memory):
         focus_points = ["who i love?"]
         retrieved = dict()
         for focal_pt in focus_points:
@@ -77,7 +78,7 @@ class TestAgentMemory:
             ]
             nodes = sorted(nodes, key=lambda x: x[0])
             nodes = [i for created, i in nodes]
-            results = agent_retrieve(agent_memory, datetime.now() - timedelta(days=120), 0.99, focal_pt, nodes, 5)
+            results = await agent_retrieve(agent_memory, datetime.now() - timedelta(days=120), 0.99, focal_pt, nodes, 5)
             final_result = []
             for n in results:
                 for i in agent_memory.storage:
@@ -87,3 +88,32 @@ class TestAgentMemory:
 
             retrieved[focal_pt] = final_result
         logger.info(f"检索结果为{retrieved}")
+
+
+def test_binary_storage(tmp_path):
+    memory = AgentMemory(storage_format="binary")
+    created = datetime(2023, 2, 13, 8)
+    for i in range(6):
+        add = memory.add_thought if i % 2 else memory.add_event
+        add(created, None, "Isabella", "plans", f"party {i}", f"party {i}", {"party"}, i, (f"party {i}", [i, 1.0]), [])
+    memory.add_chat(created, None, "Isabella", "chat with", "Maria", "chat", {"maria"}, 3, ("chat", [0.5, 0.5]), [])
+    memory.save(tmp_path)
+
+    loaded = AgentMemory()
+    loaded.set_mem_path(tmp_path)
+    assert loaded.storage_format == "binary"
+    assert [n.memory_id for n in loaded.event_list] == [n.memory_id for n in memory.event_list]
+    assert [n.memory_id for n in loaded.thought_keywords["party"]] == [
+        n.memory_id for n in memory.thought_keywords["party"]
+    ]
+    assert loaded.get_last_chat("maria").object == "Maria"
+    assert list(loaded.embeddings["party 3"]) == [3.0, 1.0]
+
+    loaded.add_event(created, None, "Isabella", "is", "idle", "idle", set(), 1, ("idle", [0.0, 0.0]), [])
+    loaded.save(tmp_path)
+    with open(tmp_path / "nodes.jsonl", "a") as f:
+        f.write('{"node_id": "node_9", "ty')  # torn by a crash
+    reloaded = AgentMemory()
+    reloaded.load(tmp_path)
+    assert len(reloaded.storage) == 8
+    assert reloaded.event_list[0].embedding_key == "idle"
@@ -0,0 +1,84 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# @Desc   : the unittest of the vectorized retrieval
+
+from datetime import datetime, timedelta
+
+import numpy as np
+import pytest
+
+from metagpt.ext.stanford_town.memory.agent_memory import AgentMemory
+from metagpt.ext.stanford_town.memory.retrieve import (
+    agent_retrieve,
+    extract_importance,
+    extract_recency,
+    extract_relevance,
+    new_agent_retrieve,
+    normalize_score_floats,
+    top_highest_x_values,
+)
+
+
+def build_memory(n: int = 40, dim: int = 8) -> AgentMemory:
+    rng = np.random.default_rng(0)
+    memory = AgentMemory()
+    start = datetime(2023, 2, 13)
+    for i in range(n):
+        add = memory.add_thought if i % 3 == 0 else memory.add_event
+        add(
+            start + timedelta(hours=7 * i),
+            None,
+            "Isabella",
+            "is",
+            f"thing {i}",
+            f"Isabella is doing thing {i}",
+            {"thing"},
+            int(rng.integers(1, 10)),
+            (f"thing {i}", rng.normal(size=dim).tolist()),
+            None,
+        )
+    return memory
+
+
+async def reference_retrieve(agent_memory, curr_time, memory_forget, query, nodes, topk):
+    memories = sorted(nodes, key=lambda node: node.last_accessed, reverse=True)
+    score_list = extract_importance(memories, [])
+    score_list = extract_recency(curr_time, memory_forget, score_list)
+    score_list = await extract_relevance(agent_memory.embeddings, query, score_list)
+    score_list = normalize_score_floats(score_list, 0, 1)
+    total = {s["memory"].memory_id: s["importance"] + s["recency"] + s["relevance"] for s in score_list}
+    return top_highest_x_values(total, topk)
+
+
+@pytest.mark.asyncio
+async def test_agent_retrieve(mocker):
+    query = np.random.default_rng(1).normal(size=8).tolist()
+    mocker.patch("metagpt.ext.stanford_town.memory.retrieve.aget_embedding", return_value=query)
+    memory = build_memory()
+    nodes = memory.event_list + memory.thought_list
+    curr_time = datetime(2023, 2, 25)
+
+    expected = await reference_retrieve(memory, curr_time, 0.9, "query", nodes, 10)
+    assert await agent_retrieve(memory, curr_time, 0.9, "query", nodes, 10) == expected
+    assert len(memory.retrieval_index) == 40
+    assert await agent_retrieve(memory, curr_time, 0.9, "query", [], 10) == []
+
+
+@pytest.mark.asyncio
+async def test_new_agent_retrieve(mocker):
+    mocker.patch(
+        "metagpt.ext.stanford_town.memory.retrieve.aget_embeddings", side_effect=lambda texts: [[1.0] * 8] * len(texts)
+    )
+    memory = build_memory()
+    role = mocker.Mock(memory=memory)
+    role.scratch.curr_time = datetime(2023, 2, 25)
+    role.scratch.recency_decay = 0.99
+
+    retrieved = await new_agent_retrieve(role, ["a", "b"], n_count=5)
+    assert len(retrieved["a"]) == len(retrieved["b"]) == 5
+    assert all(node.last_accessed == role.scratch.curr_time for node in retrieved["a"])
+
+    node = memory.add_event(
+        datetime(2023, 2, 24), None, "Isabella", "is", "new", "new", set(), 9, ("new", [1.0] * 8), None
+    )
+    assert node in (await new_agent_retrieve(role, ["c"], n_count=1))["c"]
@@ -0,0 +1,57 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# @Desc   : the unittest of StanfordTown ticks
+
+import asyncio
+
+import pytest
+
+from metagpt.environment.stanford_town.env_space import EnvAction, EnvActionType
+from metagpt.environment.stanford_town.stanford_town_ext_env import StanfordTownExtEnv
+from metagpt.ext.stanford_town.actions.dummy_action import DummyMessage
+from metagpt.ext.stanford_town.roles.st_role import STRole
+from metagpt.ext.stanford_town.stanford_town import StanfordTown
+
+PERSONAS = ["Isabella Rodriguez", "Maria Lopez", "Klaus Mueller"]
+
+
+@pytest.mark.asyncio
+async def test_run_tick(mocker):
+    town = StanfordTown(max_concurrency=2)
+    roles = [
+        STRole(
+            name=name,
+            profile=name,
+            sim_code="base_the_ville_isabella_maria_klaus",
+            start_time="February 13, 2023",
+            curr_time="February 13, 2023, 00:00:00",
+        )
+        for name in PERSONAS
+    ]
+    await town.hire(roles)
+
+    running, peak, finished = 0, 0, []
+
+    async def think_step(role: STRole, moved: bool):
+        nonlocal running, peak
+        running += 1
+        peak = max(peak, running)
+        event = (role.name, "thinks", "tick", "thinking")
+        role.rc.env.step(EnvAction(action_type=EnvActionType.ADD_TILE_EVENT, coord=(72, 19), event=event))
+        assert event not in role.rc.env.access_tile((72, 19))["events"]  # buffered until the end of the tick
+        await asyncio.sleep(0.01 * (len(PERSONAS) - PERSONAS.index(role.name)))  # the first hired finishes last
+        finished.append(role.name)
+        running -= 1
+        return DummyMessage(content=role.name)
+
+    update_role_env = mocker.patch.object(STRole, "update_role_env", autospec=True, return_value=True)
+    mocker.patch.object(STRole, "think_step", autospec=True, side_effect=think_step)
+    add_event = mocker.spy(StanfordTownExtEnv, "add_event_from_tile")
+
+    rsps = await town.run_tick()
+    assert update_role_env.call_count == len(PERSONAS)
+    assert peak == 2
+    assert finished != PERSONAS
+    assert [rsp.content for rsp in rsps] == PERSONAS
+    assert [call.kwargs["curr_event"][0] for call in add_event.call_args_list] == PERSONAS  # in hiring order
+    assert (72, 19) in town.env.get_subject_tiles("Maria Lopez")
@@ -0,0 +1,64 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# @Desc   : unittest of the StanfordTown embedding broker
+
+import asyncio
+
+import numpy as np
+import pytest
+
+from metagpt.ext.stanford_town.utils.embedding_broker import (
+    EmbeddingBroker,
+    EmbeddingCache,
+    HashingEmbeddingModel,
+)
+
+
+class CountingModel(HashingEmbeddingModel):
+    def __init__(self):
+        super().__init__(dim=16)
+        self.batches = []
+
+    def embed(self, texts: list[str]) -> list[list[float]]:
+        self.batches.append(list(texts))
+        return super().embed(texts)
+
+
+def test_hashing_embedding_model():
+    model = HashingEmbeddingModel(dim=64)
+    walk, stroll, cook = model.embed(["Isabella walks to the cafe", "Isabella walks in the park", "cooking dinner"])
+    assert walk == HashingEmbeddingModel(dim=64).embed(["Isabella walks to the cafe"])[0]
+    assert np.linalg.norm(walk) == pytest.approx(1)
+    assert np.dot(walk, stroll) > np.dot(walk, cook)
+
+
+@pytest.mark.asyncio
+async def test_embedding_broker_batches(tmp_path):
+    model = CountingModel()
+    broker = EmbeddingBroker(model, cache=EmbeddingCache(tmp_path / "cache.sqlite"), max_batch_size=3)
+
+    texts = ["sleeping", "eating\nbreakfast", "sleeping", "", "painting"]
+    embeddings = await broker.aembed_batch(texts)
+    assert model.batches == [["sleeping", "eating breakfast", "this is blank"], ["painting"]]
+    assert embeddings[0] == embeddings[2]
+    assert embeddings[1] == pytest.approx(model.embed(["eating breakfast"])[0])
+
+    assert await asyncio.gather(broker.aembed("sleeping"), broker.aembed("painting")) == [embeddings[0], embeddings[4]]
+    assert broker.embed("eating\nbreakfast") == embeddings[1]
+    assert broker.api_calls == 2
+
+    restarted = EmbeddingBroker(CountingModel(), cache=EmbeddingCache(tmp_path / "cache.sqlite"))
+    assert restarted.embed_batch(["painting", "reading"]) == [embeddings[4], pytest.approx(model.embed(["reading"])[0])]
+    assert restarted.model.batches == [["reading"]]
+
+
+@pytest.mark.asyncio
+async def test_embedding_broker_error():
+    class FailingModel(CountingModel):
+        def embed(self, texts: list[str]) -> list[list[float]]:
+            raise ValueError("get_embedding failed")
+
+    broker = EmbeddingBroker(FailingModel())
+    with pytest.raises(ValueError):
+        await broker.aembed_batch(["a", "b"])
+    assert not broker._pending
@@ -28,14 +28,12 @@ text_idx_dict = {item["text"]: idx for idx, item in enumerate(text_embed_arr)}
 
 
 def mock_openai_embed_documents(self, texts: list[str], show_progress: bool = False) -> list[list[float]]:
-    idx = text_idx_dict.get(texts[0])
-    embed = text_embed_arr[idx].get("embed")
-    return embed
+    return [mock_openai_embed_document(self, text) for text in texts]
 
 
 def mock_openai_embed_document(self, text: str) -> list[float]:
-    embeds = mock_openai_embed_documents(self, [text])
-    return embeds[0]
+    idx = text_idx_dict.get(text)
+    return text_embed_arr[idx].get("embed")[0]
 
 
 async def mock_openai_aembed_document(self, text: str) -> list[float]:
@@ -0,0 +1,41 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# @Desc   : unittest of debate_transcript
+
+import pytest
+
+from metagpt.memory.debate_transcript import DebateTranscript
+
+argument = "Immersion forces learners to use the language every day, which builds fluency fast. " * 5
+
+
+def test_debate_transcript_render_within_budget():
+    transcript = DebateTranscript(max_tokens=120, model="unknown-model")
+    for i in range(3):
+        transcript.add_round(i + 1, {"Our team": argument, "Opponent": "", "Judge": "Be concrete."})
+
+    assert "Opponent" not in transcript.rounds[0]
+    text = transcript.render()
+    assert transcript.count_tokens(text) < 120
+    assert text.startswith("Round 3:")
+
+
+@pytest.mark.asyncio
+async def test_debate_transcript_update(mocker):
+    summarize = mocker.patch.object(DebateTranscript, "_summarize", return_value="Both sides argued fluency.")
+    transcript = DebateTranscript(max_tokens=150, keep_rounds=1)
+
+    transcript.add_round(1, {"Our team": argument})
+    await transcript.update(llm=None)
+    summarize.assert_not_called()  # within budget, nothing to fold
+
+    transcript.add_round(2, {"Our team": argument})
+    transcript.add_round(3, {"Our team": "Short closing."})
+    await transcript.update(llm=None)
+    assert summarize.call_count == 1
+    assert len(summarize.call_args.args[1]) == 2
+    assert transcript.rounds == ["Round 3:\nOur team: Short closing."]
+    assert (
+        transcript.render()
+        == "Summary of earlier rounds: Both sides argued fluency.\nRound 3:\nOur team: Short closing."
+    )
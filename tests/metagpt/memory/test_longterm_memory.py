@@ -58,5 +58,37 @@ async def test_ltm_search(mocker):
     ltm.clear()
 
 
+@pytest.mark.asyncio
+async def test_ltm_batch(mocker):
+    mocker.patch("llama_index.embeddings.openai.base.OpenAIEmbedding._get_text_embeddings", mock_openai_embed_documents)
+    aembed = mocker.patch(
+        "llama_index.embeddings.openai.base.OpenAIEmbedding._aget_query_embedding",
+        side_effect=mock_openai_aembed_document,
+        autospec=True,
+    )
+
+    role_id = "UTUserLtmBatch(Product Manager)"
+    from metagpt.environment import Environment
+
+    Environment
+    RoleContext.model_rebuild()
+    rc = RoleContext(watch={"metagpt.actions.add_requirement.UserRequirement"})
+    ltm = LongTermMemory()
+    ltm.recover_memory(role_id, rc)
+    ltm.clear()
+    ltm.recover_memory(role_id, rc)
+
+    idea, sim_idea, new_idea = [
+        Message(role="User", content=text_embed_arr[i]["text"], cause_by=UserRequirement) for i in range(3)
+    ]
+    ltm.add_batch([idea])
+
+    news = await ltm.find_news([sim_idea, new_idea])
+    assert news == [new_idea]
+    assert aembed.call_count == 2  # one query per watched message
+
+    ltm.clear()
+
+
 if __name__ == "__main__":
     pytest.main([__file__, "-s"])
@@ -55,3 +55,37 @@ def test_memory():
     memory.clear()
     assert memory.count() == 0
     assert len(memory.index) == 0
+
+
+def test_memory_indexes():
+    memory = Memory(token_index=True)
+    messages = [Message(content=f"message {i} from alice", role="user", sent_from="alice") for i in range(3)]
+    messages.append(Message(content="reply from bob", role="assistant", sent_from="bob"))
+    memory.add_batch(messages + messages)
+    assert memory.count() == 4
+    assert memory.contains(messages[0])
+    assert not memory.contains(Message(content="message 0 from alice"))
+
+    assert memory.get_by_role("user") == messages[:3]
+    assert memory.get_by_sent_from("bob") == messages[3:]
+    assert memory.try_remember("from") == messages
+    assert memory.get_by_content("sage 1 fr") == [messages[1]]
+    assert memory.get_by_content("carol") == []
+    assert memory.get_by_content("e") == messages  # shorter than a trigram, scans the storage
+
+    memory.delete(messages[1])
+    assert memory.get_by_content("sage 1") == []
+    assert memory.delete_newest() == messages[3]
+    assert memory.get_by_role("assistant") == []
+    assert memory.find_news(messages) == [messages[1], messages[3]]
+
+
+def test_memory_reindex_after_load():
+    messages = [Message(content=f"message {i}", role="user") for i in range(3)]
+    memory = Memory.model_validate(Memory(storage=messages).model_dump())
+    assert memory.get_by_role("user") == messages
+    memory.add(messages[0])
+    assert memory.count() == 3
+
+    memory.storage.append(Message(content="appended directly", role="user"))
+    assert len(memory.get_by_role("user")) == 4
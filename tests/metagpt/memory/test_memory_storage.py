@@ -5,6 +5,7 @@
 """
 
 import shutil
+import time
 from pathlib import Path
 from typing import List
 
@@ -99,3 +100,37 @@ async def test_actionout_message(mocker):
 
     memory_storage.clean()
     assert memory_storage.is_initialized is False
+
+
+@pytest.mark.asyncio
+async def test_batch_and_expire(mocker):
+    mocker.patch("llama_index.embeddings.openai.base.OpenAIEmbedding._get_text_embeddings", mock_openai_embed_documents)
+    mocker.patch("llama_index.embeddings.openai.base.OpenAIEmbedding._get_text_embedding", mock_openai_embed_document)
+    mocker.patch(
+        "llama_index.embeddings.openai.base.OpenAIEmbedding._aget_query_embedding", mock_openai_aembed_document
+    )
+
+    role_id = "UTUser3(Product Manager)"
+    idea, sim_idea, new_idea = [
+        Message(role="User", content=text_embed_arr[i]["text"], cause_by=UserRequirement) for i in range(3)
+    ]
+
+    shutil.rmtree(Path(DATA_PATH / f"role_mem/{role_id}/"), ignore_errors=True)
+
+    memory_storage: MemoryStorage = MemoryStorage(mem_ttl=60)
+    memory_storage.recover_memory(role_id)
+
+    memory_storage.add_batch([idea, new_idea])
+    similar = await memory_storage.search_similar_batch([sim_idea, new_idea])
+    assert [len(messages) for messages in similar] == [1, 1]
+    assert similar[0][0].content == idea.content
+
+    memory_storage.persist()
+    mocker.patch("metagpt.memory.memory_storage.time.time", return_value=time.time() + 120)
+    assert await memory_storage.search_similar_batch([sim_idea]) == [[]]
+
+    memory_storage: MemoryStorage = MemoryStorage(mem_ttl=60)
+    memory_storage.recover_memory(role_id)  # forgets the expired messages
+    assert not memory_storage.faiss_engine.retriever._vector_store._faiss_index.ntotal
+
+    memory_storage.clean()
@@ -0,0 +1,77 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# @Desc   : unittest of the LLM response cache
+
+import time
+
+import pytest
+
+from metagpt.configs.llm_config import LLMCacheConfig
+from metagpt.provider.llm_cache import LLMCacheMissError, LLMResponseCache
+from metagpt.utils.cost_manager import CostManager
+from tests.metagpt.provider.mock_llm_config import mock_llm_config
+from tests.metagpt.provider.test_base_llm import MockBaseLLM
+
+messages = [{"role": "system", "content": "You are a judge."}, {"role": "user", "content": "Score (a, b)"}]
+
+
+class CountingLLM(MockBaseLLM):
+    calls = 0
+
+    async def acompletion_text(self, messages: list[dict], stream=False, timeout=3) -> str:
+        self.calls += 1
+        return f"(90, {self.calls})"
+
+
+def make_llm(cache_config: LLMCacheConfig, **kwargs) -> CountingLLM:
+    llm = CountingLLM(mock_llm_config.model_copy(update={"cache": cache_config, **kwargs}))
+    llm.cost_manager = CostManager()
+    return llm
+
+
+@pytest.mark.asyncio
+async def test_llm_cache_hit_and_miss(tmp_path):
+    cache_config = LLMCacheConfig(enabled=True, path=str(tmp_path / "cache.sqlite3"))
+    llm = make_llm(cache_config)
+
+    assert await llm.acompletion_text_with_cache(messages) == "(90, 1)"
+    assert await llm.acompletion_text_with_cache(messages) == "(90, 1)"
+    assert llm.calls == 1
+    assert (llm.cost_manager.cache_hits, llm.cost_manager.cache_misses) == (1, 1)
+
+    # temperature is part of the key
+    hot_llm = make_llm(cache_config, temperature=0.7)
+    assert await hot_llm.acompletion_text_with_cache(messages) == "(90, 1)"
+    assert hot_llm.calls == 1
+
+    replay = make_llm(cache_config.model_copy(update={"read_only": True}))
+    assert await replay.acompletion_text_with_cache(messages) == "(90, 1)"
+    with pytest.raises(LLMCacheMissError):
+        await replay.acompletion_text_with_cache(messages[-1:])
+    assert replay.calls == 0
+
+
+@pytest.mark.asyncio
+async def test_llm_cache_disabled():
+    llm = make_llm(LLMCacheConfig())
+    await llm.acompletion_text_with_cache(messages)
+    await llm.acompletion_text_with_cache(messages)
+    assert llm.calls == 2
+    assert llm.cost_manager.cache_hits == 0
+
+
+def test_llm_cache_eviction(tmp_path):
+    cache = LLMResponseCache(tmp_path / "lru.sqlite3", max_entries=2)
+    for i in range(3):
+        cache.set(f"k{i}", f"v{i}")
+        time.sleep(0.01)
+    assert cache.count() == 2
+    assert cache.get("k0") is None
+    assert cache.get("k2") == "v2"
+
+    cache = LLMResponseCache(tmp_path / "ttl.sqlite3", ttl=1)
+    cache.set("k", "v")
+    assert cache.get("k") == "v"
+    cache.ttl = -1
+    assert cache.get("k") is None
+    assert cache.count() == 0
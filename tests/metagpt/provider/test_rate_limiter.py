@@ -0,0 +1,96 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# @Desc   : unittest of the LLM rate limiter
+
+import asyncio
+
+import pytest
+
+from metagpt.configs.llm_config import LLMRateLimitConfig
+from metagpt.provider.rate_limiter import LLMRateLimiter, TokenBucket
+from tests.metagpt.provider.mock_llm_config import mock_llm_config
+from tests.metagpt.provider.test_base_llm import MockBaseLLM
+
+
+class TooManyRequests(Exception):
+    status_code = 429
+
+
+class FlakyLLM(MockBaseLLM):
+    def __init__(self, config, fail_first: int = 0):
+        super().__init__(config)
+        self.fail_first = fail_first
+        self.calls = 0
+        self.running = 0
+        self.peak = 0
+
+    async def acompletion_text(self, messages: list[dict], stream=False, timeout=3) -> str:
+        self.calls += 1
+        call = self.calls
+        self.running += 1
+        self.peak = max(self.peak, self.running)
+        await asyncio.sleep(0.01)
+        self.running -= 1
+        if call <= self.fail_first:
+            raise TooManyRequests()
+        return "ok"
+
+
+def test_token_bucket():
+    bucket = TokenBucket(per_minute=60, window=1)
+    assert bucket.wait_time(1) == 0
+    bucket.consume(1)
+    assert 0.9 < bucket.wait_time(1) <= 1
+    assert bucket.wait_time(100) <= 1  # clamped to the capacity
+
+
+def test_rate_limiter_aimd():
+    limiter = LLMRateLimiter(LLMRateLimitConfig(max_concurrency=8, min_concurrency=2, target_latency=1))
+    for rate_limited in (True, True, True):
+        limiter.in_flight += 1
+        limiter.release(rate_limited=rate_limited)
+    assert limiter.concurrency == 2
+    assert limiter.rate_limited == 3
+
+    for _ in range(2):
+        limiter.in_flight += 1
+        limiter.release(latency=0.1)
+    assert limiter.concurrency == pytest.approx(2.9)  # +1/concurrency per success, about +1 per window
+
+    limiter.in_flight += 1
+    limiter.release(latency=5)
+    assert limiter.concurrency == pytest.approx(2.61)
+
+
+@pytest.mark.asyncio
+async def test_llm_rate_limit():
+    config = mock_llm_config.model_copy(
+        update={"model": "rate-limited-model", "rate_limit": LLMRateLimitConfig(max_concurrency=2, rpm=600)}
+    )
+    llm = FlakyLLM(config, fail_first=1)
+    assert await asyncio.gather(*[llm.acompletion_text_with_limit([]) for _ in range(6)]) == ["ok"] * 6
+    assert llm.calls == 7  # the rate-limited request was retried
+    assert llm.peak == 2
+
+    limiter = LLMRateLimiter.from_config(config)
+    assert limiter is LLMRateLimiter.from_config(config.model_copy())
+    assert limiter.in_flight == 0
+    assert LLMRateLimiter.from_config(mock_llm_config) is None
+
+    failing = FlakyLLM(config.model_copy(update={"model": "always-429"}), fail_first=100)
+    with pytest.raises(TooManyRequests):
+        await failing.acompletion_text_with_limit([])
+    assert failing.calls == config.rate_limit.max_retries + 1
+
+
+@pytest.mark.asyncio
+async def test_llm_rate_limit_cancelled():
+    config = mock_llm_config.model_copy(
+        update={"model": "cancelled-model", "rate_limit": LLMRateLimitConfig(max_concurrency=1)}
+    )
+    llm = FlakyLLM(config)
+    with pytest.raises(asyncio.TimeoutError):
+        await asyncio.wait_for(llm.acompletion_text_with_limit([]), timeout=0.001)
+
+    assert LLMRateLimiter.from_config(config).in_flight == 0
+    assert await asyncio.wait_for(llm.acompletion_text_with_limit([]), timeout=1) == "ok"
@@ -9,7 +9,12 @@ from llama_index.core.schema import Document, NodeWithScore, TextNode
 from metagpt.rag.engines import SimpleEngine
 from metagpt.rag.retrievers import SimpleHybridRetriever
 from metagpt.rag.retrievers.base import ModifiableRAGRetriever, PersistableRAGRetriever
-from metagpt.rag.schema import BM25RetrieverConfig, ObjectNode
+from metagpt.rag.schema import (
+    BM25RetrieverConfig,
+    FAISSRetrieverConfig,
+    HybridRetrieverConfig,
+    ObjectNode,
+)
 
 
 class TestSimpleEngine:
@@ -126,6 +131,18 @@ class TestSimpleEngine:
                 ranker_configs=[],
             )
 
+    def test_resolve_embed_model_with_hybrid_config(self, mocker):
+        # Mock
+        mock_get_rag_embedding = mocker.patch("metagpt.rag.engines.simple.get_rag_embedding")
+
+        # Exec
+        bm25_only = SimpleEngine._resolve_embed_model(configs=[BM25RetrieverConfig(), HybridRetrieverConfig()])
+        with_faiss = SimpleEngine._resolve_embed_model(configs=[FAISSRetrieverConfig(), HybridRetrieverConfig()])
+
+        # Assert
+        assert isinstance(bm25_only, MockEmbedding)
+        assert with_faiss is mock_get_rag_embedding.return_value
+
     def test_from_index(self, mocker, mock_llm, mock_embedding):
         # Mock
         mock_index = mocker.MagicMock(spec=VectorStoreIndex)
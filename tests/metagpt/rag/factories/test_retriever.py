@@ -18,6 +18,8 @@ from metagpt.rag.schema import (
     ElasticsearchRetrieverConfig,
     ElasticsearchStoreConfig,
     FAISSRetrieverConfig,
+    FusionMode,
+    HybridRetrieverConfig,
 )
 
 
@@ -81,6 +83,18 @@ class TestRetrieverFactory:
 
         assert isinstance(retriever, SimpleHybridRetriever)
 
+    def test_get_retriever_with_hybrid_config(self, mock_nodes):
+        hybrid_config = HybridRetrieverConfig(fusion_mode=FusionMode.RECIPROCAL_RANK, timeout=1.0)
+
+        retriever = self.retriever_factory.get_retriever(
+            configs=[BM25RetrieverConfig(), hybrid_config], nodes=mock_nodes
+        )
+
+        assert isinstance(retriever, SimpleHybridRetriever)
+        assert isinstance(retriever.retrievers[0], DynamicBM25Retriever)
+        assert retriever.fusion_mode == FusionMode.RECIPROCAL_RANK
+        assert retriever.timeout == 1.0
+
     def test_get_retriever_with_chroma_config(self, mocker, mock_chroma_vector_store, mock_embedding):
         mock_config = ChromaRetrieverConfig(persist_path="/path/to/chroma", collection_name="test_collection")
         mock_chromadb = mocker.patch("metagpt.rag.factories.retriever.chromadb.PersistentClient")
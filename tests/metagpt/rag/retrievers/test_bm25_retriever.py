@@ -1,37 +1,105 @@
 import pytest
 from llama_index.core import VectorStoreIndex
-from llama_index.core.schema import Node
+from llama_index.core.schema import QueryBundle, TextNode
+from rank_bm25 import BM25Okapi
 
+from metagpt.rag.retrievers.bm25_index import SparseBM25Index
 from metagpt.rag.retrievers.bm25_retriever import DynamicBM25Retriever
 
+TEXTS = [
+    "the cat sat on the mat",
+    "the dog sat on the log",
+    "cats and dogs are pets",
+    "a bird sang on the tree",
+    "the cat chased the bird and the cat won",
+]
+
+
+def tokenize(text: str) -> list[str]:
+    return text.split()
+
+
+def assert_same_top(top, expected):
+    assert [node_id for node_id, _ in top] == [node_id for node_id, _ in expected]
+    assert [score for _, score in top] == pytest.approx([score for _, score in expected])
+
+
+class TestSparseBM25Index:
+    @pytest.fixture
+    def index(self):
+        index = SparseBM25Index()
+        index.add_batch((str(i), tokenize(text)) for i, text in enumerate(TEXTS))
+        return index
+
+    @pytest.mark.parametrize("query", ["cat", "the cat sat", "bird bird tree", "unknown words", "the"])
+    def test_scores_match_bm25okapi(self, index, query):
+        expected = BM25Okapi([tokenize(text) for text in TEXTS]).get_scores(tokenize(query))
+
+        assert index.get_scores(tokenize(query)) == pytest.approx(expected)
+
+    def test_add_and_delete(self, index):
+        index.delete(["1", "3", "missing"])
+        index.add("5", tokenize("the cat and the bird"))
+        texts = [TEXTS[0], TEXTS[2], TEXTS[4], "the cat and the bird"]
+
+        expected = BM25Okapi([tokenize(text) for text in texts]).get_scores(tokenize("the cat bird"))
+        top = index.top_k(tokenize("the cat bird"), k=10)
+
+        assert len(index) == 4
+        assert sorted(score for _, score in top) == pytest.approx(sorted(expected))
+        assert top[0][0] == "4"
+
+    def test_merge_keeps_scores(self, index):
+        index.delete(["0"])
+        before = index.top_k(tokenize("cat bird"), k=10)
+
+        index.merge()
+
+        assert index.node_ids == ["1", "2", "3", "4"]
+        assert_same_top(index.top_k(tokenize("cat bird"), k=10), before)
+
+    def test_persist_and_load(self, index, tmp_path):
+        index.delete(["2"])
+        index.persist(tmp_path)
+
+        loaded = SparseBM25Index.load(tmp_path)
+        loaded.add("5", tokenize("a cat on a tree"))
+        index.add("5", tokenize("a cat on a tree"))
+
+        assert_same_top(loaded.top_k(tokenize("cat tree"), k=3), index.top_k(tokenize("cat tree"), k=3))
+
 
 class TestDynamicBM25Retriever:
     @pytest.fixture(autouse=True)
     def setup(self, mocker):
-        self.doc1 = mocker.MagicMock(spec=Node)
-        self.doc1.get_content.return_value = "Document content 1"
-        self.doc2 = mocker.MagicMock(spec=Node)
-        self.doc2.get_content.return_value = "Document content 2"
-        self.mock_nodes = [self.doc1, self.doc2]
+        self.nodes = [TextNode(id_=str(i), text=text) for i, text in enumerate(TEXTS)]
+        self.index = mocker.MagicMock(spec=VectorStoreIndex)
+        self.retriever = DynamicBM25Retriever(
+            nodes=self.nodes[:3], tokenizer=tokenize, similarity_top_k=2, index=self.index
+        )
+
+    def test_add_nodes(self):
+        self.retriever.add_nodes(self.nodes[3:])
+
+        nodes = self.retriever.retrieve(QueryBundle("cat bird"))
+
+        assert len(self.retriever._nodes) == len(self.nodes)
+        assert [node.node_id for node in nodes] == ["4", "0"]
+        self.index.insert_nodes.assert_called_once_with(self.nodes[3:])
 
-        index = mocker.MagicMock(spec=VectorStoreIndex)
-        index.storage_context.persist.return_value = "ok"
+    def test_delete_nodes(self):
+        self.retriever.add_nodes(self.nodes[3:])
+        self.retriever.delete_nodes(["4", "missing"])
 
-        mock_nodes = []
-        mock_tokenizer = mocker.MagicMock()
-        self.mock_bm25okapi = mocker.patch("rank_bm25.BM25Okapi.__init__", return_value=None)
+        nodes = self.retriever.retrieve(QueryBundle("cat bird"))
 
-        self.retriever = DynamicBM25Retriever(nodes=mock_nodes, tokenizer=mock_tokenizer, index=index)
+        assert [node.node_id for node in nodes] == ["0", "3"]
+        self.index.delete_nodes.assert_called_once_with(["4"])
 
-    def test_add_docs_updates_nodes_and_corpus(self):
-        # Exec
-        self.retriever.add_nodes(self.mock_nodes)
+    def test_persist(self, tmp_path):
+        self.retriever.persist(str(tmp_path))
 
-        # Assert
-        assert len(self.retriever._nodes) == len(self.mock_nodes)
-        assert len(self.retriever._corpus) == len(self.mock_nodes)
-        self.retriever._tokenizer.assert_called()
-        self.mock_bm25okapi.assert_called()
+        loaded = DynamicBM25Retriever(nodes=self.nodes[:3], tokenizer=tokenize, persist_path=tmp_path)
 
-    def test_persist(self):
-        self.retriever.persist("")
+        self.index.storage_context.persist.assert_called_once_with(str(tmp_path))
+        assert_same_top(loaded.bm25.top_k(["cat"], k=3), self.retriever.bm25.top_k(["cat"], k=3))
@@ -1,7 +1,28 @@
+import asyncio
+import time
+
 import pytest
-from llama_index.core.schema import NodeWithScore, TextNode
+from llama_index.core.retrievers import BaseRetriever
+from llama_index.core.schema import NodeWithScore, QueryBundle, TextNode
 
 from metagpt.rag.retrievers import SimpleHybridRetriever
+from metagpt.rag.schema import FusionMode
+
+
+class SleepyRetriever(BaseRetriever):
+    """Sync only, as BM25, its aretrieve blocks unless run in a thread."""
+
+    def __init__(self, node_ids: list[str], delay: float):
+        self.node_ids = node_ids
+        self.delay = delay
+        super().__init__()
+
+    def _retrieve(self, query_bundle: QueryBundle) -> list[NodeWithScore]:
+        time.sleep(self.delay)
+        return [
+            NodeWithScore(node=TextNode(id_=node_id, text=node_id), score=1.0 / (i + 1))
+            for i, node_id in enumerate(self.node_ids)
+        ]
 
 
 class TestSimpleHybridRetriever:
@@ -48,6 +69,63 @@ class TestSimpleHybridRetriever:
         node_scores = {node.node.node_id: node.score for node in results}
         assert node_scores["2"] == 0.95
 
+    @pytest.mark.asyncio
+    async def test_aretrieve_concurrently(self, mocker):
+        async def aretrieve(query, **kwargs):
+            await asyncio.sleep(0.2)
+            return [NodeWithScore(node=TextNode(id_="async"), score=0.5)]
+
+        async_retriever = mocker.AsyncMock()
+        async_retriever.aretrieve.side_effect = aretrieve
+        hybrid_retriever = SimpleHybridRetriever(
+            SleepyRetriever(["1"], delay=0.2), SleepyRetriever(["2"], delay=0.2), async_retriever
+        )
+
+        start = time.perf_counter()
+        results = await hybrid_retriever._aretrieve("test query")
+
+        assert time.perf_counter() - start < 0.5
+        assert [node.node.node_id for node in results] == ["1", "2", "async"]
+
+    @pytest.mark.asyncio
+    async def test_aretrieve_timeout(self):
+        hybrid_retriever = SimpleHybridRetriever(
+            SleepyRetriever(["1"], delay=0.01), SleepyRetriever(["2"], delay=1.0), timeout=0.3
+        )
+
+        results = await hybrid_retriever._aretrieve("test query")
+
+        assert [node.node.node_id for node in results] == ["1"]
+
+    @pytest.mark.asyncio
+    async def test_aretrieve_reciprocal_rank(self):
+        hybrid_retriever = SimpleHybridRetriever(
+            SleepyRetriever(["1", "2", "3"], delay=0),
+            SleepyRetriever(["3", "2"], delay=0),
+            fusion_mode=FusionMode.RECIPROCAL_RANK,
+            rrf_k=1,
+            similarity_top_k=2,
+        )
+
+        results = await hybrid_retriever._aretrieve("test query")
+
+        assert [node.node.node_id for node in results] == ["3", "2"]
+        assert results[0].score == pytest.approx(1 / 4 + 1 / 2)
+
+    @pytest.mark.asyncio
+    async def test_aretrieve_relative_score(self):
+        hybrid_retriever = SimpleHybridRetriever(
+            SleepyRetriever(["1", "2", "3"], delay=0),
+            SleepyRetriever(["3", "2"], delay=0),
+            fusion_mode=FusionMode.RELATIVE_SCORE,
+            weights=[2.0, 1.0],
+        )
+
+        results = await hybrid_retriever._aretrieve("test query")
+
+        assert [node.node.node_id for node in results] == ["1", "3", "2"]
+        assert [node.score for node in results] == pytest.approx([2.0, 1.0, 0.5])
+
     def test_add_nodes(self, mock_hybrid_retriever: SimpleHybridRetriever, mock_node):
         mock_hybrid_retriever.add_nodes([mock_node])
         mock_hybrid_retriever.retrievers[0].add_nodes.assert_called_once()
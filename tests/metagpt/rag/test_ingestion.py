@@ -0,0 +1,96 @@
+import pytest
+from llama_index.core.embeddings import MockEmbedding
+from llama_index.core.llms import MockLLM
+from llama_index.core.node_parser import SentenceSplitter
+
+from metagpt.rag.engines import SimpleEngine
+from metagpt.rag.ingestion import IngestionManifest, StreamingIngestion
+from metagpt.rag.schema import BM25RetrieverConfig, IngestionConfig
+
+
+class CountingEmbedding(MockEmbedding):
+    batches: list[int] = []
+
+    async def _aget_text_embeddings(self, texts: list[str]) -> list[list[float]]:
+        self.batches.append(len(texts))
+        return self._get_text_embeddings(texts)
+
+
+@pytest.fixture
+def docs_dir(tmp_path):
+    docs_dir = tmp_path / "docs"
+    docs_dir.mkdir()
+    for i in range(5):
+        docs_dir.joinpath(f"doc_{i}.txt").write_text(f"document {i} is about topic {i}. " * 50)
+    return docs_dir
+
+
+class TestStreamingIngestion:
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize("num_workers", [1, 2])
+    async def test_arun(self, docs_dir, num_workers):
+        saved = []
+        embed_model = CountingEmbedding(embed_dim=2, embed_batch_size=100)
+        config = IngestionConfig(num_workers=num_workers, files_per_task=2, embed_batch_size=3)
+        ingestion = StreamingIngestion(
+            transformations=[SentenceSplitter(chunk_size=128, chunk_overlap=0)],
+            save_nodes=saved.append,
+            embed_model=embed_model,
+            config=config,
+        )
+
+        count = await ingestion.arun(sorted(docs_dir.iterdir()))
+
+        assert count == sum(len(batch) for batch in saved) > 5
+        assert max(len(batch) for batch in saved) == 3
+        assert sorted(embed_model.batches) == sorted(len(batch) for batch in saved)
+        assert all(node.embedding == [0.5, 0.5] for batch in saved for node in batch)
+
+    @pytest.mark.asyncio
+    async def test_arun_skips_unchanged_files(self, docs_dir, tmp_path):
+        saved, deleted = [], []
+        config = IngestionConfig(num_workers=1, manifest_path=tmp_path / "manifest.json")
+        ingestion = StreamingIngestion(
+            transformations=[SentenceSplitter()], save_nodes=saved.extend, delete_nodes=deleted.extend, config=config
+        )
+        files = sorted(docs_dir.iterdir())
+
+        assert await ingestion.arun(files) == 5
+        first_ids = IngestionManifest(config.manifest_path).node_ids(files[0])
+        files[0].write_text("changed")
+
+        assert await ingestion.arun(files) == 1
+        assert deleted == first_ids
+        assert saved[-1].get_content() == "changed"
+
+
+class TestSimpleEngineIngestion:
+    def test_from_docs_and_add_docs(self, docs_dir, tmp_path):
+        config = IngestionConfig(num_workers=1, manifest_path=tmp_path / "manifest.json")
+        engine = SimpleEngine.from_docs(
+            input_dir=str(docs_dir),
+            llm=MockLLM(),
+            retriever_configs=[BM25RetrieverConfig()],
+            ingestion_config=config,
+        )
+        docs_dir.joinpath("doc_0.txt").write_text("a brand new text about elephants")
+
+        engine.add_docs(sorted(docs_dir.iterdir()), ingestion_config=config)
+
+        nodes = engine.retrieve("elephants")
+        assert len(engine.retriever._nodes) == 5
+        assert nodes[0].get_content() == "a brand new text about elephants"
+
+    def test_from_docs_twice_with_manifest(self, docs_dir, tmp_path):
+        config = IngestionConfig(num_workers=1, manifest_path=tmp_path / "manifest.json")
+        for _ in range(2):
+            engine = SimpleEngine.from_docs(
+                input_dir=str(docs_dir),
+                llm=MockLLM(),
+                retriever_configs=[BM25RetrieverConfig()],
+                ingestion_config=config,
+            )
+            assert len(engine.retriever._nodes) == 5
+
+        engine.add_docs(sorted(docs_dir.iterdir()), ingestion_config=config)
+        assert len(engine.retriever._nodes) == 5
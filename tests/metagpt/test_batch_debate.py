@@ -0,0 +1,101 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# @Desc   : unittest of batch_debate
+
+import asyncio
+
+import pytest
+
+from metagpt.batch_debate import (
+    BatchDebateRunner,
+    DebateItem,
+    DebateRound,
+    load_debate_items,
+)
+from metagpt.const import METAGPT_ROOT
+
+
+def _items(n: int, provider: str = "") -> list[DebateItem]:
+    return [DebateItem(index=i, question=f"q{i}", answer1="a", answer2="b", provider=provider) for i in range(n)]
+
+
+@pytest.mark.asyncio
+async def test_batch_debate_concurrency():
+    running, peak = 0, 0
+
+    async def fake_debate(question, answer1, answer2, n_round=1):
+        nonlocal running, peak
+        running += 1
+        peak = max(peak, running)
+        await asyncio.sleep(0.01)
+        running -= 1
+        return [f"({n_round}, 1)"]
+
+    runner = BatchDebateRunner(debate_fn=fake_debate, concurrency=3, n_round=2)
+    outcomes = await runner.run(_items(10))
+
+    assert [o.index for o in outcomes] == list(range(10))
+    assert all(o.scores == ["(2, 1)"] for o in outcomes)
+    assert peak == 3
+
+
+@pytest.mark.asyncio
+async def test_batch_debate_provider_limit():
+    running, peak = 0, 0
+
+    async def fake_debate(question, answer1, answer2):
+        nonlocal running, peak
+        running += 1
+        peak = max(peak, running)
+        await asyncio.sleep(0.01)
+        running -= 1
+        return []
+
+    runner = BatchDebateRunner(debate_fn=fake_debate, concurrency=8, provider_limits={"together": {"concurrency": 2}})
+    await runner.run(_items(6, provider="together"))
+    assert peak == 2
+
+
+@pytest.mark.asyncio
+async def test_batch_debate_resume(tmp_path):
+    calls = []
+
+    async def fake_debate(question, answer1, answer2):
+        calls.append(question)
+        if question == "q1" and calls.count("q1") == 1:
+            raise ValueError("provider error")
+        return ["(10, 9)"]
+
+    checkpoint = tmp_path / "sweep.jsonl"
+    runner = BatchDebateRunner(debate_fn=fake_debate, checkpoint_path=checkpoint)
+    outcomes = await runner.run(_items(3))
+    assert outcomes[1].error
+    assert len(runner.load_checkpoint()) == 2
+
+    outcomes = await runner.run(_items(3))
+    assert sorted(calls) == ["q0", "q1", "q1", "q2"]
+    assert all(o.scores == ["(10, 9)"] for o in outcomes)
+
+
+def test_load_debate_items():
+    items = load_debate_items(METAGPT_ROOT / "datasets" / "mt_bench_human_judgments.xlsx")
+    assert items[0].index == 0
+    assert items[0].question and items[0].answer1 and items[0].answer2
+
+
+@pytest.mark.asyncio
+async def test_batch_debate_streaming(tmp_path):
+    async def fake_debate(question, answer1, answer2, round_log, cost_manager):
+        round_log.append(DebateRound(round=1, defense1="d1", defense2="d2", scores="(7, 8)", parsed_scores=(7, 8)))
+        cost_manager.update_cost(10, 5, "gpt-4o")
+        return ["(7, 8)"]
+
+    checkpoint = tmp_path / "sweep.jsonl"
+    runner = BatchDebateRunner(debate_fn=fake_debate, concurrency=2, checkpoint_path=checkpoint)
+    assert await runner.run(_items(3), collect=False) == []
+
+    outcomes = runner.load_checkpoint()
+    assert sorted(outcomes) == [0, 1, 2]
+    assert outcomes[0].rounds[0].defense1 == "d1"
+    assert outcomes[0].parsed_scores == [(7, 8)]
+    assert (outcomes[0].prompt_tokens, outcomes[0].completion_tokens) == (10, 5)
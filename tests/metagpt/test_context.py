@@ -71,3 +71,11 @@ def test_context_3():
     # assert ctx.llm() is not None
     # assert "gpt" in ctx.llm().model
     pass
+
+
+def test_context_from_llm_config():
+    ctx = Context.from_llm_config({"api_type": "openai", "api_key": "sk-xxx", "model": "gpt-4o"})
+    other = Context.from_llm_config({"api_type": "openai", "api_key": "sk-xxx", "model": "gpt-3.5-turbo"})
+    assert ctx.config.llm.api_type == LLMType.OPENAI
+    assert ctx.llm().model == "gpt-4o"
+    assert other.llm().model == "gpt-3.5-turbo"
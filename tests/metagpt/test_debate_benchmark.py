@@ -0,0 +1,47 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# @Desc   : unittest of debate_benchmark
+
+import pytest
+
+from metagpt.debate_benchmark import (
+    MockLLMProfile,
+    format_report,
+    mock_llm_provider,
+    run_scenario,
+)
+from metagpt.provider.base_llm import BaseLLM
+from metagpt.provider.llm_provider_registry import LLM_REGISTRY, create_llm_instance
+from tests.metagpt.provider.mock_llm_config import mock_llm_config
+
+base_aask = BaseLLM.aask  # conftest mocks `aask`, the benchmark needs the real one in front of the mock provider
+
+fast_profile = MockLLMProfile(latency=0.001, tokens_per_second=1e5, output_tokens=20, seed=0)
+
+
+@pytest.mark.asyncio
+async def test_mock_llm_provider(mocker):
+    mocker.patch.object(BaseLLM, "aask", base_aask)
+    providers = LLM_REGISTRY.providers
+    with mock_llm_provider(fast_profile):
+        llm = create_llm_instance(mock_llm_config)
+        rsp = await llm.aask("Score the debate")
+    assert rsp.startswith("argument")
+    assert rsp.rstrip().endswith(")")
+    assert LLM_REGISTRY.providers is providers
+
+
+@pytest.mark.asyncio
+async def test_run_scenario(mocker):
+    mocker.patch.object(BaseLLM, "aask", base_aask)
+    result = await run_scenario(
+        "new_multi_adv", n_round=2, n_advocates=2, concurrency=2, n_debates=2, profile=fast_profile
+    )
+
+    assert (result.debates, result.failed) == (2, 0)
+    # per round: 2 groups x (2 advocates + 1 aggregator) + judge + scorer
+    assert result.llm_calls_per_debate == 16
+    assert result.tokens_per_debate > result.prompt_tokens_per_debate > 0
+    assert 0 < result.round_p50 <= result.round_p95
+    assert result.debates_per_minute > 0
+    assert "| new_multi_adv | 2 | 2 | 2 |" in format_report([result])
@@ -60,5 +60,30 @@ async def test_publish_and_process_message(env: Environment):
     assert len(env.history) > 10
 
 
+def test_publish_message_routing(env: Environment):
+    alice = Role(name="Alice", profile="product manager")
+    bob = Role(name="Bob", profile="engineer")
+    env.add_roles([alice, bob])
+
+    assert env.get_recipients(Message(content="hi", send_to="Bob")) == [bob]
+    assert set(env.get_recipients(Message(content="hi", send_to={"Alice", "Bob", "Carol"}))) == {alice, bob}
+    assert env.get_recipients(Message(content="hi")) == [alice, bob]
+    assert env.get_recipients(Message(content="hi", send_to="Carol")) == []
+
+    bob.set_addresses({"Robert"})
+    assert env.get_recipients(Message(content="hi", send_to="Bob")) == []
+    assert env.get_recipients(Message(content="hi", send_to="Robert")) == [bob]
+
+
+def test_bounded_history():
+    env = Environment(max_history=2)
+    for i in range(3):
+        env.publish_message(Message(content=f"msg{i}"))
+    assert env.history == "\nuser: msg1\nuser: msg2"
+
+    new_env = Environment(**env.model_dump())
+    assert new_env.history == env.history
+
+
 if __name__ == "__main__":
     pytest.main([__file__, "-s"])
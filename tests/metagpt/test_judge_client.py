@@ -0,0 +1,53 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# @Desc   : unittest of judge_client
+
+import asyncio
+
+import pytest
+
+from metagpt.configs.llm_config import LLMType
+from metagpt.judge_client import JudgeClient, JudgeItem, judge_llm_config
+
+models = {"haiku": "claude-3-haiku-20240307", "gpt-4o": "gpt-4o", "Qwen": "Qwen/Qwen2-72B-Instruct"}
+
+
+def test_judge_llm_config():
+    assert judge_llm_config("haiku", 0.0, models).api_type == LLMType.ANTHROPIC
+    assert judge_llm_config("gpt-4o", 0.0, models).api_type == LLMType.OPENAI
+    config = judge_llm_config("Qwen", 0.5, models)
+    assert config.api_type == LLMType.TOGETHER
+    assert config.model == "Qwen/Qwen2-72B-Instruct"
+    assert config.temperature == 0.5
+    with pytest.raises(ValueError):
+        judge_llm_config("cohere", 0.0, models)
+
+
+@pytest.mark.asyncio
+async def test_judge_client_batch(mocker):
+    running, peak = {}, {}
+
+    class FakeLLM:
+        use_system_prompt = True
+        cost_manager = None
+
+        def __init__(self, config):
+            self.config = config
+
+        async def aask(self, msg, stream=None):
+            provider = self.config.api_type.value
+            running[provider] = running.get(provider, 0) + 1
+            peak[provider] = max(peak.get(provider, 0), running[provider])
+            await asyncio.sleep(0.01)
+            running[provider] -= 1
+            return f"{self.config.model}: {msg}"
+
+    mocker.patch("metagpt.judge_client.create_llm_instance", FakeLLM)
+    client = JudgeClient(models, provider_limits={"anthropic": 2})
+    items = [JudgeItem(question=f"q{i}", answer1="a", answer2="b") for i in range(5)]
+    results = await client.ajudge_batch(["haiku", "gpt-4o"], 0.0, items, lambda q, a1, a2: q)
+
+    assert results["haiku"] == [f"claude-3-haiku-20240307: q{i}" for i in range(5)]
+    assert results["gpt-4o"][0] == "gpt-4o: q0"
+    assert peak == {"anthropic": 2, "openai": 5}
+    assert client.get_llm("haiku", 0.0).use_system_prompt is False
@@ -2,6 +2,10 @@
 # -*- coding: utf-8 -*-
 # @Desc   : unittest of team
 
+import pytest
+
+from metagpt.actions import Action, UserRequirement
+from metagpt.roles import Role
 from metagpt.roles.project_manager import ProjectManager
 from metagpt.team import Team
 
@@ -11,3 +15,47 @@ def test_team():
     company.hire([ProjectManager()])
 
     assert len(company.env.roles) == 1
+
+
+class ActionA(Action):
+    async def run(self, *args, **kwargs):
+        return "a"
+
+
+class ActionB(Action):
+    async def run(self, *args, **kwargs):
+        return "b"
+
+
+class Relay(Role):
+    next: str = ""
+
+    def __init__(self, watch, action, **kwargs):
+        super().__init__(**kwargs)
+        self._watch([watch])
+        self.set_actions([action])
+
+    async def _act(self):
+        msg = await super()._act()
+        msg.send_to = {self.next or "nobody"}
+        return msg
+
+
+@pytest.mark.asyncio
+async def test_team_event_driven():
+    company = Team()
+    idle_roles = [Relay(ActionB, ActionA, name=f"idle{i}", profile=f"idle{i}") for i in range(5)]
+    company.hire(
+        [
+            Relay(UserRequirement, ActionA, name="first", profile="first", next="second"),
+            Relay(ActionA, ActionB, name="second", profile="second"),
+            *idle_roles,
+        ]
+    )
+
+    company.run_project("start", send_to="first")
+    assert await company.env.run_until_idle() == 2
+    assert [m.content for m in company.env.roles["second"].rc.memory.get()] == ["a", "b"]
+
+    history = await company.run(n_round=5, idea="again", send_to="first", event_driven=True, auto_archive=False)
+    assert history.count("second: b") == 2
@@ -0,0 +1,88 @@
+import asyncio
+from typing import Optional
+
+import pytest
+from llama_index.core.embeddings import MockEmbedding
+
+from metagpt.config2 import config
+from metagpt.utils.embedding_cache import (
+    CachedEmbedding,
+    EmbeddingCache,
+    cache_embedding,
+)
+
+
+class CountingEmbedding(MockEmbedding):
+    batches: list = []
+    dimensions: Optional[int] = None
+    base_url: Optional[str] = None
+
+    def _get_vector(self, text: str) -> list[float]:
+        return [float(len(text)), 1.0]
+
+    def _get_query_embedding(self, query: str) -> list[float]:
+        self.batches.append([query])
+        return self._get_vector(query)
+
+    def _get_text_embeddings(self, texts: list[str]) -> list[list[float]]:
+        self.batches.append(list(texts))
+        return [self._get_vector(text) for text in texts]
+
+    async def _aget_text_embeddings(self, texts: list[str]) -> list[list[float]]:
+        return self._get_text_embeddings(texts)
+
+
+def test_cached_embedding(tmp_path):
+    model = CountingEmbedding(embed_dim=2)
+    embedding = CachedEmbedding(model, cache=EmbeddingCache(tmp_path / "cache.sqlite"))
+
+    assert embedding.get_text_embedding_batch(["a", "bb", "a"]) == [[1.0, 1.0], [2.0, 1.0], [1.0, 1.0]]
+    assert embedding.get_text_embedding("bb") == [2.0, 1.0]
+    assert embedding.get_query_embedding("bb") == embedding.get_query_embedding("bb") == [2.0, 1.0]
+    assert model.batches == [["a", "bb"], ["bb"]]
+
+    restarted = CachedEmbedding(CountingEmbedding(embed_dim=2), cache=EmbeddingCache(tmp_path / "cache.sqlite"))
+    assert restarted.get_text_embedding_batch(["bb", "ccc"]) == [[2.0, 1.0], [3.0, 1.0]]
+    assert restarted.embed_model.batches == [["ccc"]]
+    assert restarted.api_calls == 1
+
+
+@pytest.mark.asyncio
+async def test_cached_embedding_coalesces():
+    model = CountingEmbedding(embed_dim=2)
+    embedding = CachedEmbedding(model, embed_batch_size=3)
+
+    embeddings = await asyncio.gather(
+        *[embedding.aget_text_embedding(text) for text in ["a", "bb", "a", "ccc", "dddd"]]
+    )
+    assert embeddings == [[1.0, 1.0], [2.0, 1.0], [1.0, 1.0], [3.0, 1.0], [4.0, 1.0]]
+    assert model.batches == [["a", "bb", "ccc"], ["dddd"]]
+
+    assert await embedding.aget_text_embedding_batch(["dddd", "eeeee"]) == [[4.0, 1.0], [5.0, 1.0]]
+    assert model.batches[-1] == ["eeeee"]
+    assert not embedding._pending
+
+
+def test_cache_embedding(mocker, tmp_path):
+    mocker.patch.object(config.embedding, "cache", True)
+    mocker.patch.object(config.embedding, "cache_path", str(tmp_path / "cache.sqlite"))
+    model = CountingEmbedding(embed_dim=2)
+
+    embedding = cache_embedding(model)
+
+    assert isinstance(embedding, CachedEmbedding)
+    assert cache_embedding(embedding) is embedding
+
+    mocker.patch.object(config.embedding, "cache", False)
+    assert cache_embedding(model) is model
+
+
+def test_cached_embedding_namespace(tmp_path):
+    cache = EmbeddingCache(tmp_path / "cache.sqlite")
+    small = CachedEmbedding(CountingEmbedding(embed_dim=2, dimensions=2), cache=cache)
+    small.get_text_embedding("a")
+
+    for other in (CountingEmbedding(embed_dim=2, dimensions=4), CountingEmbedding(embed_dim=2, base_url="http://b")):
+        assert CachedEmbedding.namespace(other) != CachedEmbedding.namespace(small.embed_model)
+        CachedEmbedding(other, cache=cache).get_text_embedding("a")
+        assert other.batches == [["a"]]
@@ -0,0 +1,44 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# @Desc   : unittest of result_sink
+
+import pytest
+
+from metagpt.batch_debate import DebateOutcome, DebateRound
+from metagpt.utils.result_sink import (
+    JsonlResultSink,
+    ParquetResultSink,
+    open_result_sink,
+)
+
+
+def _outcome(index: int) -> DebateOutcome:
+    rounds = [DebateRound(round=1, defense1="d1", defense2="d2", scores="(9, 8)", parsed_scores=(9, 8))]
+    return DebateOutcome(index=index, scores=["(9, 8)"], parsed_scores=[(9, 8)], rounds=rounds, prompt_tokens=12)
+
+
+def test_jsonl_result_sink(tmp_path):
+    path = tmp_path / "sweep.jsonl"
+    with open_result_sink(path) as sink:
+        assert isinstance(sink, JsonlResultSink)
+        sink.write(_outcome(0))
+        sink.write(_outcome(1))
+    path.open("a").write('{"index": 2, "sco')  # torn by a crash
+
+    sink = open_result_sink(path)
+    assert sink.keys() == {0, 1}
+    assert DebateOutcome.model_validate(next(sink.read())) == _outcome(0)
+
+
+def test_parquet_result_sink(tmp_path):
+    pytest.importorskip("pyarrow")
+    path = tmp_path / "sweep.parquet"
+    with open_result_sink(path, flush_every=2) as sink:
+        assert isinstance(sink, ParquetResultSink)
+        for i in range(3):
+            sink.write(_outcome(i))
+        assert len(list(path.glob("part-*.parquet"))) == 1  # the third record is still buffered
+
+    sink = open_result_sink(path)
+    assert sink.keys() == {0, 1, 2}
+    assert [DebateOutcome.model_validate(r) for r in sink.read()] == [_outcome(i) for i in range(3)]
@@ -0,0 +1,54 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# @Desc   : unittest of round_scheduler
+
+import asyncio
+
+import pytest
+
+from metagpt.utils.round_scheduler import RoundScheduler
+
+
+@pytest.mark.asyncio
+async def test_round_scheduler_runs_independent_steps_together():
+    events = []
+
+    def make_step(name, result):
+        async def step(*args):
+            events.append(f"start {name}")
+            await asyncio.sleep(0.01)
+            events.append(f"end {name}")
+            return (result, args)
+
+        return step
+
+    scheduler = RoundScheduler()
+    scheduler.add("defense", make_step("defense", 1))
+    scheduler.add("judge", make_step("judge", 2), deps=["defense"])
+    scheduler.add("score", make_step("score", 3), deps=["defense"])
+    results = await scheduler.run()
+
+    assert results["judge"] == (2, ((1, ()),))
+    assert results["score"] == (3, ((1, ()),))
+    assert events[:2] == ["start defense", "end defense"]
+    assert events[2:4] == ["start judge", "start score"]
+
+
+@pytest.mark.asyncio
+async def test_round_scheduler_errors():
+    scheduler = RoundScheduler()
+    with pytest.raises(ValueError):
+        scheduler.add("judge", asyncio.sleep, deps=["defense"])
+
+    async def fail():
+        raise RuntimeError("llm down")
+
+    async def slow():
+        await asyncio.sleep(10)
+
+    scheduler.add("defense", fail)
+    scheduler.add("other", slow)
+    with pytest.raises(ValueError):
+        scheduler.add("defense", fail)
+    with pytest.raises(RuntimeError):
+        await asyncio.wait_for(scheduler.run(), timeout=1)
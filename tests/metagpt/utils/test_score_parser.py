@@ -0,0 +1,73 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# @Desc   : unittest of score_parser
+
+import pytest
+
+from metagpt.utils.score_parser import (
+    ScoreParser,
+    extract_scores,
+    format_scores,
+    repair_scores,
+)
+from tests.metagpt.provider.mock_llm_config import mock_llm_config
+from tests.metagpt.provider.test_base_llm import MockBaseLLM
+
+
+@pytest.mark.parametrize(
+    ("text", "expected"),
+    [
+        ("(18, 9)", (18, 9)),
+        ("Round 1 was (10, 12). Final score tuple: (18, 9)", (18, 9)),
+        ("(7.5, 8) then (1, 2)", (7.5, 8)),  # the first pair, as the former eval parsing
+        ("(18, 9)\nClarity: [9, 8]\nDepth: [9, 1]", (18, 9)),  # bracketed pairs are per-criterion scores
+        ("Clarity: [9, 8]", None),
+        ("Clarity: (9, 8)\nFinal Scores (sum of above): [18, 9]", (18, 9)),
+        ("Final Scores: 95 and 87", (95, 87)),
+        ("no scores here", None),
+        ("", None),
+    ],
+)
+def test_extract_scores(text, expected):
+    assert extract_scores(text) == expected
+
+
+def test_repair_scores():
+    assert repair_scores('{"score1": 95, "score2": 87}]') == (95, 87)
+    assert repair_scores('Here you go: {"score1": 95.5, "score2": "87"} Thanks') == (95.5, 87)
+    assert repair_scores("nothing") is None
+    assert format_scores((95, 87.5)) == "(95, 87.5)"
+
+
+class ReaskLLM(MockBaseLLM):
+    prompts = []
+
+    async def aask(self, msg, *args, **kwargs) -> str:
+        self.prompts.append(msg)
+        return "(90, 80)"
+
+
+class NoToolsLLM(ReaskLLM):
+    async def aask_code(self, messages, **kwargs) -> dict:
+        raise RuntimeError("tools are not supported by this endpoint")
+
+
+class FunctionCallLLM(ReaskLLM):
+    async def aask_code(self, messages, **kwargs) -> dict:
+        assert kwargs["tool_choice"]["function"]["name"] == "report_scores"
+        return {"score1": 70, "score2": 60}
+
+
+@pytest.mark.asyncio
+async def test_score_parser_reask():
+    parser = ScoreParser()
+    assert await parser.aparse("(1, 2)") == (1, 2)
+    assert await parser.aparse("I cannot decide") is None
+
+    llm = ReaskLLM(mock_llm_config)
+    assert await parser.aparse("Answer 1 is better.", llm) == (90, 80)
+    assert "Answer 1 is better." in llm.prompts[-1]
+
+    assert await parser.aparse("Answer 2 is better.", FunctionCallLLM(mock_llm_config)) == (70, 60)
+    assert await parser.aparse("Both are good.", NoToolsLLM(mock_llm_config)) == (90, 80)
+    assert parser.stats.model_dump() == {"parsed": 1, "repaired": 0, "reasked": 3, "failed": 1}
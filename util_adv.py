@@ -12,7 +12,8 @@ models = {"opus": "claude-3-opus-20240229", "haiku": "claude-3-haiku-20240307",
 
 
 
-def initiate_model(model_name, temp, provider):
+def model_config(model_name, temp, provider):
+    """Return the `config2.yaml` content selecting `model_name` as a dict."""
     config = {}
     if provider == "together":
         config = {
@@ -33,6 +34,19 @@ def initiate_model(model_name, temp, provider):
                 "api_key": openai_api_key
             }
         }
+    return config
+
+
+def llm_config(model_name, temp, provider):
+    """Return an in-memory LLMConfig for `model_name`, e.g. for `debate(..., llm_config=...)` or
+    `Context.from_llm_config`, so several models can run in one process without rewriting config2.yaml."""
+    from metagpt.configs.llm_config import LLMConfig
+
+    return LLMConfig.model_validate(model_config(model_name, temp, provider)["llm"])
+
+
+def initiate_model(model_name, temp, provider):
+    config = model_config(model_name, temp, provider)
 
     # Ensure the directory exists
     os.makedirs(os.path.expanduser("~/.metagpt"), exist_ok=True)